@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Git Provisioner Module
+Parallel WebUI and extension clones backed by a local bare-mirror object cache
+"""
+
+import os
+import re
+import time
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Never let git wait for credentials on a private or renamed repository
+GIT_ENV = {**os.environ, 'GIT_TERMINAL_PROMPT': '0'}
+
+# Set in every mirror; see GitObjectCache
+MIRROR_CONFIG = {'gc.auto': '0', 'gc.pruneExpire': 'never', 'gc.reflogExpireUnreachable': 'never'}
+
+@dataclass
+class RepoSpec:
+    """A repository to provision: where it comes from and where it goes"""
+    url: str
+    path: Path
+    branch: Optional[str] = None
+
+@dataclass
+class ProvisionResult:
+    """Outcome of provisioning one RepoSpec"""
+    spec: RepoSpec
+    action: str                 # cloned, updated, current, failed
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.action != 'failed'
+
+def run_git(args: List[str], cwd=None, timeout: float = 600) -> str:
+    """Run git and return stdout; raises CalledProcessError with stderr attached"""
+    result = subprocess.run(['git'] + args, cwd=cwd, env=GIT_ENV, capture_output=True,
+                            text=True, timeout=timeout)
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, ['git'] + args,
+                                            result.stdout, result.stderr)
+    return result.stdout
+
+def read_repo_list(list_file: Path) -> List[Tuple[str, str]]:
+    """(url, directory name) per line of an _extensions.txt-style list
+
+    Lines are "URL [name]"; '#' starts a comment. Without a name the
+    directory is the last URL component minus ".git".
+    """
+    repos = []
+    with open(list_file, 'r') as f:
+        for line in f:
+            parts = line.split('#', 1)[0].split()
+            if not parts:
+                continue
+            url = parts[0]
+            name = parts[1] if len(parts) > 1 else url.rstrip('/').split('/')[-1]
+            if name.endswith('.git'):
+                name = name[:-4]
+            repos.append((url, name))
+    return repos
+
+class GitObjectCache:
+    """Bare mirrors of every repository provisioned on this machine
+
+    Working copies are cloned with `--reference-if-able` against the
+    mirror, so a re-clone only transfers objects the mirror lacks and the
+    checkout borrows the rest through .git/objects/info/alternates. The
+    mirrors must therefore live as long as the clones that borrow from
+    them; keep `cache_dir` outside anything the cache cleaner deletes.
+    For the same reason mirrors never gc or prune objects, even after a
+    force-push or deleted branch upstream. Each mirror is fetched at most
+    once per process.
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        self._fresh: Set[str] = set()
+
+    @staticmethod
+    def key(url: str) -> str:
+        """Filesystem-safe mirror name for a URL"""
+        name = re.sub(r'^[a-z+]+://', '', url.strip().rstrip('/'))
+        name = re.sub(r'\.git$', '', name)
+        return re.sub(r'[^A-Za-z0-9._-]+', '_', name).strip('_') + '.git'
+
+    def mirror_path(self, url: str) -> Path:
+        return self.cache_dir / self.key(url)
+
+    def _lock(self, url: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(self.key(url), threading.Lock())
+
+    @staticmethod
+    def _protect(mirror: Path):
+        # Borrowing clones break if an unreachable object is ever dropped
+        for key, value in MIRROR_CONFIG.items():
+            run_git(['config', key, value], cwd=mirror)
+
+    def ensure(self, url: str, timeout: float = 900) -> Optional[Path]:
+        """Create or refresh the mirror for `url`; None if that failed"""
+        mirror = self.mirror_path(url)
+        with self._lock(url):
+            if url in self._fresh:
+                return mirror
+            try:
+                if (mirror / 'HEAD').exists():
+                    self._protect(mirror)
+                    run_git(['fetch', '--prune', '--quiet', 'origin'], cwd=mirror, timeout=timeout)
+                else:
+                    self.cache_dir.mkdir(parents=True, exist_ok=True)
+                    partial = mirror.with_name(mirror.name + '.partial')
+                    shutil.rmtree(partial, ignore_errors=True)
+                    run_git(['clone', '--mirror', '--quiet', url, str(partial)], timeout=timeout)
+                    self._protect(partial)
+                    os.replace(partial, mirror)
+            except (subprocess.SubprocessError, OSError) as e:
+                logger.debug(f"Mirror of {url} unavailable: {getattr(e, 'stderr', None) or e}")
+                return mirror if (mirror / 'HEAD').exists() else None
+            self._fresh.add(url)
+            return mirror
+
+class GitProvisioner:
+    """Clones missing repositories and updates stale ones on a bounded pool
+
+    An existing checkout is compared with `git ls-remote` first and only
+    pulled (fast-forward only) when the remote head moved, so a warm
+    session costs one round-trip per repository.
+    """
+
+    def __init__(self, cache: GitObjectCache = None, max_workers: int = 8, timeout: float = 900):
+        self.cache = cache
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='git')
+
+    def remote_head(self, url: str, branch: Optional[str] = None) -> Optional[str]:
+        ref = f"refs/heads/{branch}" if branch else 'HEAD'
+        try:
+            output = run_git(['ls-remote', url, ref], timeout=60)
+        except (subprocess.SubprocessError, OSError):
+            return None
+        line = output.split('\n', 1)[0]
+        return line.split()[0] if line.strip() else None
+
+    @staticmethod
+    def local_head(path: Path) -> Optional[str]:
+        try:
+            return run_git(['rev-parse', 'HEAD'], cwd=path, timeout=30).strip()
+        except (subprocess.SubprocessError, OSError):
+            return None
+
+    def _clone(self, spec: RepoSpec):
+        args = ['clone', '--quiet']
+        mirror = self.cache.ensure(spec.url, self.timeout) if self.cache else None
+        if mirror is not None:
+            args += ['--reference-if-able', str(mirror)]
+        else:
+            # No object cache to lean on: keep the transfer small instead
+            args += ['--depth', '1']
+        if spec.branch:
+            args += ['-b', spec.branch]
+        run_git(args + [spec.url, str(spec.path)], timeout=self.timeout)
+
+    def _update(self, spec: RepoSpec) -> str:
+        remote = self.remote_head(spec.url, spec.branch)
+        if remote is not None and remote == self.local_head(spec.path):
+            return 'current'
+        run_git(['pull', '--ff-only', '--quiet'], cwd=spec.path, timeout=self.timeout)
+        return 'updated'
+
+    def provision(self, spec: RepoSpec, update: bool = True) -> ProvisionResult:
+        """Clone `spec` if missing, else bring it up to date"""
+        start = time.time()
+        spec.path = Path(spec.path)
+        try:
+            if not spec.path.exists():
+                self._clone(spec)
+                action = 'cloned'
+            elif update:
+                action = self._update(spec)
+            else:
+                action = 'current'
+        except (subprocess.SubprocessError, OSError) as e:
+            error = (getattr(e, 'stderr', None) or str(e)).strip()
+            return ProvisionResult(spec, 'failed', time.time() - start, error)
+        return ProvisionResult(spec, action, time.time() - start)
+
+    def submit(self, spec: RepoSpec, update: bool = True) -> 'Future[ProvisionResult]':
+        return self._executor.submit(self.provision, spec, update)
+
+    def provision_many(self, specs: Iterable[RepoSpec], update: bool = True) -> List[ProvisionResult]:
+        """Provision all specs concurrently; results in input order"""
+        futures = [self.submit(spec, update) for spec in specs]
+        return [future.result() for future in futures]
+
+    def prefetch(self, urls: Iterable[str]) -> List[Future]:
+        """Warm mirrors in the background, e.g. while the WebUI itself clones"""
+        if self.cache is None:
+            return []
+        return [self._executor.submit(self.cache.ensure, url, self.timeout) for url in urls]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+_provisioner: Optional[GitProvisioner] = None
+_provisioner_lock = threading.Lock()
+
+def get_git_provisioner(cache_dir: Path = None) -> GitProvisioner:
+    """Get the process-wide GitProvisioner (the first call fixes the cache dir)"""
+    global _provisioner
+    with _provisioner_lock:
+        if _provisioner is None:
+            _provisioner = GitProvisioner(GitObjectCache(cache_dir) if cache_dir else None)
+        return _provisioner
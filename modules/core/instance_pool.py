@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Instance Pool Module
+One WebUI process per GPU, each on its own port, served as a pool
+"""
+
+import time
+import socket
+import subprocess
+import threading
+import urllib.request
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+def allocate_ports(count: int, start: int, exclude: Iterable[int] = (), limit: int = 200) -> List[int]:
+    """`count` ports from `start` upward that are free to bind right now"""
+    taken = set(exclude)
+    ports = []
+    for port in range(start, start + limit):
+        if len(ports) == count:
+            break
+        if port in taken:
+            continue
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            try:
+                sock.bind(('', port))
+            except OSError:
+                continue
+        ports.append(port)
+    if len(ports) < count:
+        raise RuntimeError(f"Only {len(ports)} of {count} free ports in {start}-{start + limit}")
+    return ports
+
+@dataclass
+class WebUIInstance:
+    """One WebUI process pinned to one device"""
+    index: int
+    device: str
+    port: int
+    process: Optional[subprocess.Popen] = None
+    status: str = 'starting'        # starting, ready, failed, stopped
+    started: float = field(default_factory=time.time)
+    in_flight: int = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+class SubprocessBackend:
+    """Starts instances as local processes; swap for a stub in tests"""
+
+    def spawn(self, command: List[str], cwd, env: Dict[str, str]) -> subprocess.Popen:
+        return subprocess.Popen(command, cwd=cwd, env=env, stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT, universal_newlines=True, bufsize=1)
+
+    def is_ready(self, instance: WebUIInstance) -> bool:
+        try:
+            with urllib.request.urlopen(instance.url, timeout=5) as response:
+                return response.status == 200
+        except Exception:
+            return False
+
+    def stop(self, instance: WebUIInstance, timeout: float = 10):
+        process = instance.process
+        try:
+            process.terminate()
+            process.wait(timeout=timeout)
+        except Exception:
+            process.kill()
+
+class InstancePool:
+    """WebUI instances sharing one install and unified storage
+
+    Each instance sees a single GPU through CUDA_VISIBLE_DEVICES and gets
+    a free port. acquire() hands callers the ready instance with the
+    fewest requests in flight.
+    """
+
+    def __init__(self, backend: SubprocessBackend = None,
+                 line_callback: Callable[[WebUIInstance, str], None] = None):
+        self.backend = backend or SubprocessBackend()
+        self.line_callback = line_callback
+        self.instances: List[WebUIInstance] = []
+        self._lock = threading.Lock()
+
+    def _spawn(self, device: str, port: int, build_command: Callable[[int], List[str]],
+               cwd, env: Dict[str, str]) -> WebUIInstance:
+        instance = WebUIInstance(len(self.instances), str(device), port)
+        instance_env = {**env, 'CUDA_VISIBLE_DEVICES': str(device)}
+        try:
+            instance.process = self.backend.spawn(build_command(port), cwd, instance_env)
+        except OSError as e:
+            logger.error(f"Instance on GPU {device} failed to start: {e}")
+            instance.status = 'failed'
+        with self._lock:
+            self.instances.append(instance)
+        if instance.process is not None:
+            logger.info(f"Started WebUI instance {instance.index} on GPU {device}, port {port}")
+            if getattr(instance.process, 'stdout', None) is not None:
+                threading.Thread(target=self._monitor, args=(instance,), daemon=True,
+                                 name=f"webui-{instance.index}").start()
+        return instance
+
+    def launch(self, build_command: Callable[[int], List[str]], cwd, env: Dict[str, str],
+               devices: List[str], base_port: int, warm_first: bool = True,
+               timeout: float = 300, poll_interval: float = 2) -> List[WebUIInstance]:
+        """Start one instance per device; `build_command(port)` gives its argv
+
+        With `warm_first` the first instance starts alone and the rest only
+        once it is ready: A1111/Forge prepare the shared venv and write
+        config.json/cache.json at start-up, which concurrent copies race on.
+        """
+        ports = allocate_ports(len(devices), base_port,
+                               exclude=[i.port for i in self.instances if i.running])
+        pending = list(zip(devices, ports))
+        launched = []
+        if warm_first and len(pending) > 1:
+            device, port = pending.pop(0)
+            first = self._spawn(device, port, build_command, cwd, env)
+            launched.append(first)
+            self.wait_ready(timeout, poll_interval)
+            if first.status != 'ready':
+                if first.running:
+                    self.backend.stop(first)
+                logger.error(f"First instance (GPU {device}) did not become ready; "
+                             f"not starting the other {len(pending)}")
+                return launched
+        for device, port in pending:
+            launched.append(self._spawn(device, port, build_command, cwd, env))
+        return launched
+
+    def _monitor(self, instance: WebUIInstance):
+        for line in iter(instance.process.stdout.readline, ''):
+            if line and self.line_callback:
+                try:
+                    self.line_callback(instance, line)
+                except Exception as e:
+                    logger.debug(f"Line callback failed: {e}")
+
+    def wait_ready(self, timeout: float = 300, poll_interval: float = 2) -> List[WebUIInstance]:
+        """Block until every instance is ready, failed or out of time"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            pending = [i for i in self.instances if i.status == 'starting']
+            if not pending:
+                break
+            for instance in pending:
+                if not instance.running:
+                    instance.status = 'failed'
+                    logger.error(f"Instance {instance.index} (GPU {instance.device}) exited during start-up")
+                elif self.backend.is_ready(instance):
+                    instance.status = 'ready'
+                    logger.info(f"✅ Instance {instance.index} ready at {instance.url}")
+            if any(i.status == 'starting' for i in pending):
+                time.sleep(poll_interval)
+        for instance in self.instances:
+            if instance.status == 'starting':
+                instance.status = 'failed'
+                logger.error(f"Instance {instance.index} (GPU {instance.device}) not ready after {timeout}s")
+                # A hung start-up would otherwise hold its GPU and port
+                if instance.running:
+                    self.backend.stop(instance)
+        return self.ready_instances()
+
+    def ready_instances(self) -> List[WebUIInstance]:
+        return [i for i in self.instances if i.status == 'ready' and i.running]
+
+    @contextmanager
+    def acquire(self):
+        """Least-busy ready instance for the duration of one request"""
+        with self._lock:
+            ready = self.ready_instances()
+            if not ready:
+                raise RuntimeError("No WebUI instance is ready")
+            instance = min(ready, key=lambda i: (i.in_flight, i.index))
+            instance.in_flight += 1
+        try:
+            yield instance
+        finally:
+            with self._lock:
+                instance.in_flight -= 1
+
+    def stop_all(self):
+        for instance in self.instances:
+            if instance.running:
+                self.backend.stop(instance)
+            instance.status = 'stopped'
+        with self._lock:
+            self.instances = []
+
+    def get_status(self) -> List[Dict]:
+        return [
+            {'index': i.index, 'device': i.device, 'port': i.port, 'url': i.url,
+             'status': i.status if i.running or i.status != 'ready' else 'exited',
+             'pid': i.process.pid if i.process else None, 'in_flight': i.in_flight}
+            for i in self.instances
+        ]
+
+_pool: Optional[InstancePool] = None
+_pool_lock = threading.Lock()
+
+def get_instance_pool() -> InstancePool:
+    """Get the process-wide InstancePool"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = InstancePool()
+        return _pool
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Launch Profiles Module
+Measured WebUI performance per GPU and flag set, used to pick launch flags
+"""
+
+import os
+import re
+import json
+import time
+import statistics
+import threading
+from pathlib import Path
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_DB = Path(__file__).resolve().parent.parent.parent / 'configs' / 'launch_profiles.json'
+
+# tqdm progress lines printed by A1111/Forge/ComfyUI samplers
+SPEED_PATTERN = re.compile(r"(\d+)/(\d+) \[[^\]]*?([\d.]+)\s*(it/s|s/it)\]")
+
+def gpu_fingerprint(device: Dict, driver: Optional[str], webui_type: str) -> str:
+    """name|VRAM MiB|driver|webui; profiles never carry across any of these"""
+    vram = re.sub(r'[^\d]', '', str(device.get('vram_total', ''))) or '0'
+    return f"{device.get('name', 'unknown')}|{vram}|{driver or 'unknown'}|{webui_type}"
+
+@dataclass
+class LaunchProfile:
+    """Measured speed and memory of one flag set on one GPU"""
+    flags: List[str]
+    its_per_sec: float
+    peak_vram_mb: Optional[float] = None
+    samples: int = 1
+    source: str = 'log'
+    updated: float = field(default_factory=time.time)
+
+class ProfileDB:
+    """Launch profiles persisted to configs/launch_profiles.json
+
+    Layout: {fingerprint: {" ".join(flags): LaunchProfile}}. Repeated
+    measurements of the same flag set are averaged by sample count.
+    """
+
+    def __init__(self, db_file: Path = None):
+        self.db_file = Path(db_file or DEFAULT_PROFILE_DB)
+        self._profiles: Dict[str, Dict[str, LaunchProfile]] = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if not self.db_file.exists():
+            return
+        try:
+            with open(self.db_file, 'r') as f:
+                data = json.load(f)
+            self._profiles = {
+                fingerprint: {key: LaunchProfile(**profile) for key, profile in profiles.items()}
+                for fingerprint, profiles in data.items()
+            }
+        except Exception as e:
+            logger.warning(f"Could not load launch profiles: {e}")
+
+    def save(self):
+        with self._lock:
+            data = {
+                fingerprint: {key: asdict(profile) for key, profile in profiles.items()}
+                for fingerprint, profiles in self._profiles.items()
+            }
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = self.db_file.with_suffix('.tmp')
+        with open(temp_file, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(temp_file, self.db_file)
+
+    def record(self, fingerprint: str, flags: List[str], its_per_sec: float,
+               peak_vram_mb: float = None, source: str = 'log', samples: int = 1) -> LaunchProfile:
+        """Fold a measurement into the profile for this GPU and flag set"""
+        key = ' '.join(flags)
+        with self._lock:
+            profiles = self._profiles.setdefault(fingerprint, {})
+            profile = profiles.get(key)
+            if profile is None:
+                profile = profiles[key] = LaunchProfile(list(flags), its_per_sec, peak_vram_mb,
+                                                        samples, source)
+            else:
+                total = profile.samples + samples
+                profile.its_per_sec = (profile.its_per_sec * profile.samples + its_per_sec * samples) / total
+                if peak_vram_mb is not None:
+                    profile.peak_vram_mb = max(profile.peak_vram_mb or 0, peak_vram_mb)
+                profile.samples = total
+                profile.source = source
+                profile.updated = time.time()
+        return profile
+
+    def profiles(self, fingerprint: str) -> List[LaunchProfile]:
+        """Known profiles for a GPU, fastest first"""
+        with self._lock:
+            profiles = list(self._profiles.get(fingerprint, {}).values())
+        return sorted(profiles, key=lambda p: p.its_per_sec, reverse=True)
+
+    def best(self, fingerprint: str, vram_limit_mb: float = None) -> Optional[LaunchProfile]:
+        """Fastest profile whose measured peak VRAM fits within the limit"""
+        for profile in self.profiles(fingerprint):
+            if vram_limit_mb and profile.peak_vram_mb and profile.peak_vram_mb > vram_limit_mb:
+                continue
+            return profile
+        return None
+
+class ProfileRecorder:
+    """Collects sampler speeds from WebUI log lines during one session"""
+
+    def __init__(self, fingerprint: str, flags: List[str]):
+        self.fingerprint = fingerprint
+        self.flags = list(flags)
+        self.speeds: List[float] = []
+
+    @staticmethod
+    def parse_speed(line: str) -> Optional[float]:
+        """it/s of a finished sampling run in a progress line, if any"""
+        match = SPEED_PATTERN.search(line)
+        if not match:
+            return None
+        done, total, value, unit = match.groups()
+        # Only completed runs: partial bars include warm-up steps
+        if done != total:
+            return None
+        value = float(value)
+        if value <= 0:
+            return None
+        return value if unit == 'it/s' else 1.0 / value
+
+    def feed(self, line: str) -> Optional[float]:
+        speed = self.parse_speed(line)
+        if speed:
+            self.speeds.append(speed)
+        return speed
+
+    def commit(self, db: ProfileDB, peak_vram_mb: float = None,
+               min_samples: int = 3) -> Optional[LaunchProfile]:
+        """Store the session's median speed once enough runs were seen"""
+        if len(self.speeds) < min_samples:
+            return None
+        # The first run includes model load and CUDA warm-up
+        speeds = self.speeds[1:]
+        profile = db.record(self.fingerprint, self.flags, statistics.median(speeds),
+                            peak_vram_mb, source='log', samples=len(speeds))
+        db.save()
+        logger.info(f"Launch profile updated: {' '.join(self.flags) or '(no flags)'} "
+                    f"-> {profile.its_per_sec:.2f} it/s")
+        return profile
+
+def run_api_benchmark(base_url: str, steps: int = 20, runs: int = 3,
+                      width: int = 512, height: int = 512) -> Optional[float]:
+    """Median it/s of txt2img calls against a running WebUI started with --api"""
+    import requests
+
+    payload = {'prompt': 'benchmark', 'steps': steps, 'width': width, 'height': height,
+               'batch_size': 1, 'save_images': False, 'send_images': False}
+    url = f"{base_url.rstrip('/')}/sdapi/v1/txt2img"
+    speeds = []
+    for run in range(runs + 1):
+        start = time.time()
+        response = requests.post(url, json=payload, timeout=600)
+        response.raise_for_status()
+        if run > 0:     # first call warms up
+            speeds.append(steps / (time.time() - start))
+    return statistics.median(speeds) if speeds else None
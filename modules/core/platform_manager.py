@@ -5,17 +5,74 @@ Enhanced 12+ platform detection and optimization
 """
 
 import os
+import re
 import sys
+import time
 import subprocess
 import platform
 import json
+import threading
 import psutil
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Optional, Tuple, List
+from typing import Callable, Dict, Optional, Tuple, List
 import logging
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_PROBE_CACHE = Path.home() / '.cache' / 'sd-darkmaster-pro' / 'platform_probes.json'
+
+def machine_key() -> str:
+    """hostname:boot_id, so cached probes never outlive a reboot or move hosts"""
+    try:
+        with open('/proc/sys/kernel/random/boot_id', 'r') as f:
+            boot_id = f.read().strip()
+    except OSError:
+        boot_id = str(int(psutil.boot_time()))
+    return f"{platform.node()}:{boot_id}"
+
+class ProbeCache:
+    """Probe results on disk, valid for one machine boot and at most `ttl` seconds"""
+
+    def __init__(self, cache_file: Path = None, ttl: float = 6 * 3600):
+        self.cache_file = Path(cache_file or os.environ.get('SD_DARKMASTER_PROBE_CACHE', DEFAULT_PROBE_CACHE))
+        self.ttl = ttl
+        self.key = machine_key()
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.cache_file, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data.get('probes', {}) if data.get('machine') == self.key else {}
+
+    def get(self, name: str):
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry and time.time() - entry['time'] < self.ttl:
+            return entry['value']
+        return None
+
+    def put(self, name: str, value):
+        with self._lock:
+            self._entries[name] = {'value': value, 'time': time.time()}
+            data = {'machine': self.key, 'probes': dict(self._entries)}
+            try:
+                self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+                temp_file = self.cache_file.with_suffix('.tmp')
+                with open(temp_file, 'w') as f:
+                    json.dump(data, f)
+                os.replace(temp_file, self.cache_file)
+            except OSError as e:
+                logger.debug(f"Could not save probe cache: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+
 class PlatformManager:
     """Advanced platform detection and management"""
     
@@ -78,12 +135,92 @@ class PlatformManager:
         }
     }
     
-    def __init__(self):
+    # Persistent (but slower) stores that can back a local hot tier:
+    # (mount that must exist, storage root on it, read-only)
+    PERSISTENT_STORES = {
+        'colab': ('/content/drive/MyDrive', '/content/drive/MyDrive/SD-DarkMaster-Pro/storage', False),
+        'kaggle': ('/kaggle/input', '/kaggle/input/sd-darkmaster-pro-storage', True),
+        'paperspace': ('/notebooks', '/notebooks/SD-DarkMaster-Pro/storage', False)
+    }
+    
+    def __init__(self, probe_cache: ProbeCache = None):
         self.platform = self._detect_platform()
         self.platform_config = self._get_platform_config()
-        self.gpu_info = self._detect_gpu()
-        self.system_info = self._get_system_info()
-        self.optimizations = self._calculate_optimizations()
+        
+        # Subprocess and hardware probes: lazy, concurrent, cached per boot
+        self.probe_cache = probe_cache or ProbeCache()
+        self._probes: Dict[str, Callable[[], Dict]] = {
+            'gpu': self._detect_gpu,
+            'cuda': self._detect_cuda,
+            'system': self._get_system_info
+        }
+        self._probe_results: Dict[str, Dict] = {}
+        self._probe_futures: Dict[str, Future] = {}
+        self._probe_lock = threading.Lock()
+        self._optimizations: Optional[Dict] = None
+    
+    def prefetch(self) -> 'PlatformManager':
+        """Start every uncached probe in the background, all at once"""
+        with self._probe_lock:
+            pending = [name for name in self._probes
+                       if name not in self._probe_results and name not in self._probe_futures
+                       and self.probe_cache.get(name) is None]
+            if pending:
+                executor = ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix='probe')
+                for name in pending:
+                    self._probe_futures[name] = executor.submit(self._probes[name])
+                executor.shutdown(wait=False)
+        return self
+    
+    def _probe(self, name: str) -> Dict:
+        """A probe's result: memoized, else from the disk cache, else run now"""
+        with self._probe_lock:
+            if name in self._probe_results:
+                return self._probe_results[name]
+            future = self._probe_futures.get(name)
+        
+        value = None if future else self.probe_cache.get(name)
+        if value is None:
+            value = future.result() if future else self._probes[name]()
+            self.probe_cache.put(name, value)
+        
+        with self._probe_lock:
+            self._probe_results[name] = value
+            self._probe_futures.pop(name, None)
+        return value
+    
+    def refresh(self):
+        """Forget cached probes, e.g. after a driver change"""
+        self.probe_cache.clear()
+        with self._probe_lock:
+            self._probe_results = {}
+            self._probe_futures = {}
+        self._optimizations = None
+    
+    @property
+    def gpu_info(self) -> Dict:
+        gpu_info = dict(self._probe('gpu'))
+        if gpu_info['available']:
+            gpu_info['cuda_version'] = self._probe('cuda').get('version')
+        return gpu_info
+    
+    @property
+    def system_info(self) -> Dict:
+        system_info = dict(self._probe('system'))
+        # Cheap and volatile, so always current
+        memory = psutil.virtual_memory()
+        system_info['memory_available_gb'] = memory.available / (1024**3)
+        try:
+            system_info['disk_free_gb'] = psutil.disk_usage('/').free / (1024**3)
+        except OSError:
+            pass
+        return system_info
+    
+    @property
+    def optimizations(self) -> Dict:
+        if self._optimizations is None:
+            self._optimizations = self._calculate_optimizations()
+        return self._optimizations
     
     def _detect_platform(self) -> str:
         """Detect current platform with enhanced detection"""
@@ -209,15 +346,6 @@ class PlatformManager:
                             'compute_cap': parts[4] if len(parts) > 4 else None
                         })
                 
-                # Get CUDA version
-                cuda_result = subprocess.run(['nvcc', '--version'], 
-                                           capture_output=True, text=True)
-                if cuda_result.returncode == 0:
-                    import re
-                    match = re.search(r'release (\d+\.\d+)', cuda_result.stdout)
-                    if match:
-                        gpu_info['cuda_version'] = match.group(1)
-                
                 logger.info(f"GPU detected: {gpu_info}")
                 
         except Exception as e:
@@ -225,6 +353,16 @@ class PlatformManager:
         
         return gpu_info
     
+    def _detect_cuda(self) -> Dict:
+        """CUDA toolkit version from nvcc"""
+        try:
+            result = subprocess.run(['nvcc', '--version'], capture_output=True, text=True, timeout=10)
+            match = re.search(r'release (\d+\.\d+)', result.stdout) if result.returncode == 0 else None
+            return {'version': match.group(1) if match else None}
+        except Exception as e:
+            logger.debug(f"CUDA detection failed: {e}")
+            return {'version': None}
+    
     def _get_system_info(self) -> Dict:
         """Get comprehensive system information"""
         return {
@@ -235,9 +373,7 @@ class PlatformManager:
             'cpu_count': psutil.cpu_count(logical=True),
             'cpu_count_physical': psutil.cpu_count(logical=False),
             'memory_gb': psutil.virtual_memory().total / (1024**3),
-            'memory_available_gb': psutil.virtual_memory().available / (1024**3),
             'disk_total_gb': psutil.disk_usage('/').total / (1024**3),
-            'disk_free_gb': psutil.disk_usage('/').free / (1024**3),
             'network_interfaces': list(psutil.net_if_addrs().keys())
         }
     
@@ -330,8 +466,89 @@ class PlatformManager:
         
         return optimizations
     
-    def get_launch_args(self, webui_type: str = 'A1111') -> List[str]:
+    def get_persistent_storage(self, project_root: Path = None) -> Optional[Tuple[Path, bool]]:
+        """Persistent cold store for tiered storage as (root, read_only)
+        
+        Only returned when the project itself lives elsewhere, i.e. on
+        ephemeral local disk. SD_DARKMASTER_COLD_STORAGE overrides detection.
+        """
+        override = os.environ.get('SD_DARKMASTER_COLD_STORAGE')
+        if override:
+            return Path(override), not os.access(override, os.W_OK)
+        
+        if self.platform not in self.PERSISTENT_STORES:
+            return None
+        
+        mount, storage_root, read_only = self.PERSISTENT_STORES[self.platform]
+        if not os.path.isdir(mount):
+            return None
+        
+        project_root = Path(project_root or self.platform_config['root']).resolve()
+        if Path(mount).resolve() in (project_root, *project_root.parents):
+            return None
+        
+        if read_only and not os.path.isdir(storage_root):
+            return None
+        
+        return Path(storage_root), read_only
+    
+    def gpu_fingerprint(self, webui_type: str = 'A1111', device_index: int = 0) -> Optional[str]:
+        """Profile database key for one GPU and WebUI (None without a GPU)"""
+        from modules.core.launch_profiles import gpu_fingerprint
+        
+        gpu_info = self.gpu_info
+        if not gpu_info['available'] or len(gpu_info['devices']) <= device_index:
+            return None
+        device = gpu_info['devices'][device_index]
+        return gpu_fingerprint(device, device.get('driver'), webui_type)
+    
+    def _heuristic_gpu_flags(self, webui_type: str) -> List[str]:
+        """Flags derived from the VRAM tiers in optimizations"""
+        if webui_type == 'ComfyUI':
+            return ['--lowvram'] if self.optimizations['cpu_offload'] else []
+        
+        flags = []
+        # One attention backend; WebUIs only honour the first anyway
+        if self.optimizations['xformers']:
+            flags.append('--xformers')
+        elif self.optimizations['sdp_attention']:
+            flags.append('--opt-sdp-attention')
+        
+        # fp16 is the WebUI default; only full precision needs flags
+        if self.optimizations['mixed_precision'] != 'fp16':
+            flags.extend(['--precision', 'full', '--no-half'])
+        
+        if self.optimizations['sequential_cpu_offload']:
+            flags.append('--lowvram')
+        elif self.optimizations['cpu_offload']:
+            flags.append('--medvram')
+        return flags
+    
+    def get_gpu_flags(self, webui_type: str = 'A1111', profile_db=None) -> List[str]:
+        """Fastest measured flag set for this GPU, else the VRAM heuristic"""
+        fingerprint = self.gpu_fingerprint(webui_type)
+        if profile_db is not None and fingerprint:
+            device = self.gpu_info['devices'][0]
+            try:
+                vram_limit = float(re.sub(r'[^\d.]', '', device.get('vram_total', '')))
+            except ValueError:
+                vram_limit = None
+            profile = profile_db.best(fingerprint, vram_limit)
+            if profile:
+                logger.info(f"Using launch profile {' '.join(profile.flags) or '(no flags)'} "
+                            f"({profile.its_per_sec:.2f} it/s, {profile.source})")
+                return list(profile.flags)
+        return self._heuristic_gpu_flags(webui_type)
+    
+    def get_launch_args(self, webui_type: str = 'A1111', profile_db=None) -> List[str]:
         """Get optimized launch arguments for WebUI"""
+        gpu_flags = self.get_gpu_flags(webui_type, profile_db) if self.gpu_info['available'] else []
+        
+        # WebUI-specific arguments
+        if webui_type == 'ComfyUI':
+            # ComfyUI has different argument format
+            return ['--listen', '0.0.0.0'] + gpu_flags
+        
         args = []
         
         # Common arguments
@@ -339,20 +556,7 @@ class PlatformManager:
         
         # GPU optimizations
         if self.gpu_info['available']:
-            if self.optimizations['xformers']:
-                args.append('--xformers')
-            
-            if self.optimizations['mixed_precision'] == 'fp16':
-                args.extend(['--precision', 'full', '--no-half-vae'])
-            
-            if self.optimizations['cpu_offload']:
-                args.append('--medvram')
-            
-            if self.optimizations['sequential_cpu_offload']:
-                args.append('--lowvram')
-            
-            if self.optimizations['sdp_attention']:
-                args.append('--opt-sdp-attention')
+            args.extend(gpu_flags)
         else:
             # CPU mode
             args.extend(['--skip-torch-cuda-test', '--use-cpu', 'all'])
@@ -364,14 +568,6 @@ class PlatformManager:
         elif self.platform in ['paperspace', 'runpod']:
             args.append('--api')
         
-        # WebUI-specific arguments
-        if webui_type == 'ComfyUI':
-            # ComfyUI has different argument format
-            args = ['--listen', '0.0.0.0']
-            if self.gpu_info['available']:
-                if self.optimizations['cpu_offload']:
-                    args.append('--lowvram')
-        
         return args
     
     def get_environment_vars(self) -> Dict[str, str]:
@@ -421,4 +617,15 @@ class PlatformManager:
         else:
             lines.append("GPU: Not available")
         
-        return "\n".join(lines)
\ No newline at end of file
+        return "\n".join(lines)
+
+_manager: Optional[PlatformManager] = None
+_manager_lock = threading.Lock()
+
+def get_platform_manager() -> PlatformManager:
+    """Get the process-wide PlatformManager, probes already started"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = PlatformManager().prefetch()
+        return _manager
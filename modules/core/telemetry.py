@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Telemetry Module
+Background resource sampler with bounded history for status pages and the API
+"""
+
+import time
+import subprocess
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+import logging
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+GPU_QUERY_FIELDS = ('index', 'utilization.gpu', 'memory.used', 'memory.total',
+                    'temperature.gpu', 'power.draw')
+
+class GPUStream:
+    """One long-lived `nvidia-smi -l` process; the latest reading per GPU
+
+    nvidia-smi prints a CSV line per GPU every interval, so reading its
+    stdout costs nothing compared to spawning it per refresh. `command`
+    can be replaced, e.g. by a script that prints canned lines.
+    """
+
+    def __init__(self, interval: float = 2.0, command: List[str] = None):
+        self.command = command or [
+            'nvidia-smi', f"--query-gpu={','.join(GPU_QUERY_FIELDS)}",
+            '--format=csv,noheader,nounits', '-l', str(max(1, int(interval)))
+        ]
+        self.latest: Dict[int, Dict] = {}
+        self.available = False
+        self._process: Optional[subprocess.Popen] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def parse_line(line: str) -> Optional[Dict]:
+        """One CSV line -> {'index', 'util_percent', 'vram_used_mb', ...}; None if unparsable"""
+        parts = [p.strip() for p in line.split(',')]
+        if len(parts) < len(GPU_QUERY_FIELDS):
+            return None
+
+        def number(value: str) -> Optional[float]:
+            try:
+                return float(value)
+            except ValueError:
+                return None     # "[N/A]", "[Not Supported]"
+
+        index = number(parts[0])
+        if index is None:
+            return None
+        return {
+            'index': int(index),
+            'util_percent': number(parts[1]),
+            'vram_used_mb': number(parts[2]),
+            'vram_total_mb': number(parts[3]),
+            'temperature_c': number(parts[4]),
+            'power_w': number(parts[5])
+        }
+
+    def start(self) -> bool:
+        if self._process and self._process.poll() is None:
+            return True
+        try:
+            self._process = subprocess.Popen(self.command, stdout=subprocess.PIPE,
+                                             stderr=subprocess.DEVNULL, text=True, bufsize=1)
+        except (FileNotFoundError, PermissionError):
+            self.available = False
+            return False
+        self.available = True
+        self._thread = threading.Thread(target=self._read, daemon=True, name='gpu-telemetry')
+        self._thread.start()
+        return True
+
+    def _read(self):
+        for line in iter(self._process.stdout.readline, ''):
+            reading = self.parse_line(line)
+            if reading:
+                with self._lock:
+                    self.latest[reading['index']] = reading
+        # nvidia-smi exited: stale readings must not look live
+        with self._lock:
+            self.latest = {}
+        self.available = False
+
+    def readings(self) -> List[Dict]:
+        with self._lock:
+            return [dict(self.latest[i]) for i in sorted(self.latest)]
+
+    def stop(self):
+        if self._process:
+            try:
+                self._process.terminate()
+                self._process.wait(timeout=5)
+            except Exception:
+                self._process.kill()
+            self._process = None
+        self.available = False
+
+class TelemetrySampler:
+    """Samples host, WebUI process tree and GPUs at a fixed interval
+
+    Every metric keeps its last `history` samples in a ring buffer.
+    Readers call snapshot() or history(); neither touches psutil or spawns
+    anything, so a status page can refresh as often as it likes.
+    """
+
+    def __init__(self, interval: float = 2.0, history: int = 300, gpu_stream: GPUStream = None):
+        self.interval = interval
+        self.history_size = history
+        self.gpu_stream = gpu_stream or GPUStream(interval)
+        self.pids: List[int] = []
+
+        self._series: Dict[str, Deque[Tuple[float, float]]] = {}
+        self._latest: Dict = {}
+        self._lock = threading.Lock()
+        self._processes: Dict[int, 'psutil.Process'] = {}
+        self._last_io: Optional[Tuple[float, object, object]] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def set_processes(self, pids: List[int]):
+        """Track the RSS and CPU of these processes and their children ([] to stop)"""
+        self.pids = list(pids)
+        self._processes = {}
+
+    def _record(self, sample: Dict):
+        now = sample['timestamp']
+        with self._lock:
+            self._latest = sample
+            for key, value in sample.items():
+                if key == 'timestamp' or not isinstance(value, (int, float)):
+                    continue
+                series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = deque(maxlen=self.history_size)
+                series.append((now, value))
+
+    def _process_tree(self) -> Dict:
+        if not self.pids:
+            return {}
+        current = []
+        for pid in self.pids:
+            try:
+                root = self._processes.get(pid) or psutil.Process(pid)
+                current.extend([root] + root.children(recursive=True))
+            except psutil.Error:
+                continue
+
+        # Reuse Process objects so cpu_percent measures since the last sample
+        processes = {p.pid: self._processes.get(p.pid, p) for p in current}
+        self._processes = processes
+        rss = 0
+        cpu = 0.0
+        for process in processes.values():
+            try:
+                rss += process.memory_info().rss
+                cpu += process.cpu_percent(interval=None)
+            except psutil.Error:
+                continue
+        return {'webui_rss_mb': rss / (1024 * 1024), 'webui_cpu_percent': cpu,
+                'webui_processes': len(processes)}
+
+    def _io_rates(self, now: float) -> Dict:
+        disk = psutil.disk_io_counters()
+        net = psutil.net_io_counters()
+        rates = {}
+        if self._last_io:
+            then, last_disk, last_net = self._last_io
+            elapsed = max(now - then, 1e-6)
+            mb = 1024 * 1024
+            if disk and last_disk:
+                rates['disk_read_mbps'] = (disk.read_bytes - last_disk.read_bytes) / elapsed / mb
+                rates['disk_write_mbps'] = (disk.write_bytes - last_disk.write_bytes) / elapsed / mb
+            if net and last_net:
+                rates['net_recv_mbps'] = (net.bytes_recv - last_net.bytes_recv) / elapsed / mb
+                rates['net_sent_mbps'] = (net.bytes_sent - last_net.bytes_sent) / elapsed / mb
+        self._last_io = (now, disk, net)
+        return rates
+
+    def sample(self) -> Dict:
+        """Take one sample now and append it to the history"""
+        now = time.time()
+        sample = {'timestamp': now}
+        if psutil is not None:
+            memory = psutil.virtual_memory()
+            sample['cpu_percent'] = psutil.cpu_percent(interval=None)
+            sample['ram_percent'] = memory.percent
+            sample['ram_used_gb'] = memory.used / (1024**3)
+            sample.update(self._io_rates(now))
+            sample.update(self._process_tree())
+
+        gpus = self.gpu_stream.readings()
+        sample['gpus'] = gpus
+        for gpu in gpus:
+            for key in ('util_percent', 'vram_used_mb', 'temperature_c', 'power_w'):
+                if gpu[key] is not None:
+                    sample[f"gpu{gpu['index']}_{key}"] = gpu[key]
+
+        self._record(sample)
+        return sample
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                logger.debug(f"Telemetry sample failed: {e}")
+            self._stop_event.wait(self.interval)
+
+    def start(self) -> 'TelemetrySampler':
+        if self._thread and self._thread.is_alive():
+            return self
+        self.gpu_stream.start()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True, name='telemetry')
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.gpu_stream.stop()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def snapshot(self) -> Dict:
+        """Most recent sample (empty until the first one is taken)"""
+        with self._lock:
+            return dict(self._latest)
+
+    def history(self, metric: str, seconds: float = None) -> List[Tuple[float, float]]:
+        """(timestamp, value) pairs for one metric, oldest first"""
+        with self._lock:
+            points = list(self._series.get(metric, ()))
+        if seconds is not None:
+            cutoff = time.time() - seconds
+            points = [p for p in points if p[0] >= cutoff]
+        return points
+
+    def metrics(self) -> List[str]:
+        with self._lock:
+            return sorted(self._series)
+
+_sampler: Optional[TelemetrySampler] = None
+_sampler_lock = threading.Lock()
+
+def get_telemetry_sampler() -> TelemetrySampler:
+    """Get the process-wide TelemetrySampler (not started)"""
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = TelemetrySampler()
+        return _sampler
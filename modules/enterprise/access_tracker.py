@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Access Tracker Module
+Last-access times for storage files from WebUI logs and filesystem atime
+"""
+
+import os
+import re
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Set
+import logging
+
+logger = logging.getLogger(__name__)
+
+# WebUI log lines that name a model file being loaded
+LOAD_PATTERNS = [
+    re.compile(r"Loading weights \[[^\]]*\] from (.+)$"),
+    re.compile(r"Loading VAE weights [^:]*: (.+)$"),
+    re.compile(r"(?:Loading|Loaded) .*? from (/\S+\.(?:safetensors|ckpt|pt|pth|bin))"),
+]
+
+class AccessTracker:
+    """Records when files were last used, persisted next to the storage tree"""
+
+    SAVE_INTERVAL = 30.0
+
+    def __init__(self, log_file: Path):
+        self.log_file = Path(log_file)
+        self._last_access: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = 0.0
+        self.load()
+
+    @staticmethod
+    def parse_log_line(line: str) -> Optional[str]:
+        """Model path named in a WebUI log line, if any"""
+        line = line.strip()
+        for pattern in LOAD_PATTERNS:
+            match = pattern.search(line)
+            if match:
+                return match.group(1).strip()
+        return None
+
+    def record(self, path, timestamp: float = None):
+        """Mark a file as used now (symlinked WebUI paths are resolved)"""
+        path_str = os.path.realpath(str(path))
+        with self._lock:
+            self._last_access[path_str] = timestamp or time.time()
+            self._dirty = True
+        if time.time() - self._last_save >= self.SAVE_INTERVAL:
+            self.save()
+
+    def record_from_log(self, line: str) -> Optional[str]:
+        """Record the model a WebUI log line says it loaded; returns its path"""
+        path = self.parse_log_line(line)
+        if path:
+            self.record(path)
+        return path
+
+    def last_access(self, path, stat: os.stat_result = None) -> float:
+        """Most recent of the recorded use and the filesystem atime"""
+        path_str = os.path.realpath(str(path))
+        recorded = self._last_access.get(path_str, 0.0)
+        try:
+            stat = stat or os.stat(path_str)
+        except OSError:
+            return recorded
+        # relatime still bumps atime once a day, and on first read after a write
+        return max(recorded, stat.st_atime, stat.st_mtime)
+
+    def recorded_since(self, timestamp: float) -> Set[str]:
+        """Paths recorded as used (not just stat-ed) at or after `timestamp`"""
+        with self._lock:
+            return {path for path, when in self._last_access.items() if when >= timestamp}
+
+    def forget(self, path):
+        with self._lock:
+            if self._last_access.pop(os.path.realpath(str(path)), None) is not None:
+                self._dirty = True
+
+    def load(self):
+        if not self.log_file.exists():
+            return
+        try:
+            with open(self.log_file, 'r') as f:
+                self._last_access = json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not load access log: {e}")
+
+    def save(self):
+        """Persist access times atomically if anything changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = dict(self._last_access)
+            self._dirty = False
+            self._last_save = time.time()
+
+        try:
+            self.log_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.log_file.with_suffix('.json.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_file, self.log_file)
+        except OSError as e:
+            logger.warning(f"Could not save access log: {e}")
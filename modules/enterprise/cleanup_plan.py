@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Cleanup Plan Module
+Immutable deletion plans and a parallel, batched executor for them
+"""
+
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class CleanupItem:
+    """One file, or one whole directory tree, to remove"""
+    path: str
+    size: int
+    reason: str
+    is_tree: bool = False
+    file_count: int = 1
+
+@dataclass(frozen=True)
+class CleanupPlan:
+    """What a cleanup would remove; built once, never mutated"""
+    items: Tuple[CleanupItem, ...]
+    created: float = field(default_factory=time.time)
+
+    @classmethod
+    def from_items(cls, items: Iterable[CleanupItem]) -> 'CleanupPlan':
+        """Build a plan, keeping the first reason for paths listed twice"""
+        seen = set()
+        unique = []
+        for item in items:
+            if item.path not in seen:
+                seen.add(item.path)
+                unique.append(item)
+        return cls(tuple(unique))
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(item.size for item in self.items)
+
+    @property
+    def file_count(self) -> int:
+        return sum(item.file_count for item in self.items)
+
+    def by_reason(self) -> Dict[str, Dict]:
+        """{reason: {'files', 'bytes'}} totals"""
+        totals: Dict[str, Dict] = {}
+        for item in self.items:
+            entry = totals.setdefault(item.reason, {'files': 0, 'bytes': 0})
+            entry['files'] += item.file_count
+            entry['bytes'] += item.size
+        return totals
+
+    def only(self, *reasons: str) -> 'CleanupPlan':
+        """Sub-plan restricted to some reasons"""
+        return CleanupPlan(tuple(i for i in self.items if i.reason in reasons), self.created)
+
+class ProgressChannel:
+    """Coalesces worker progress into at most one report per interval"""
+
+    def __init__(self, total_files: int, callback: Callable[[Dict], None] = None,
+                 interval: float = 0.5):
+        self.total_files = total_files
+        self.callback = callback or self._log
+        self.interval = interval
+        self.files = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+        self._last_emit = 0.0
+
+    def add(self, files: int, size: int):
+        with self._lock:
+            self.files += files
+            self.bytes += size
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {'removed_files': self.files, 'total_files': self.total_files,
+                    'freed_bytes': self.bytes}
+
+    def emit(self, force: bool = False):
+        now = time.time()
+        if force or now - self._last_emit >= self.interval:
+            self._last_emit = now
+            self.callback(self.snapshot())
+
+    @staticmethod
+    def _log(progress: Dict):
+        logger.info(f"Cleanup: {progress['removed_files']}/{progress['total_files']} files, "
+                    f"{progress['freed_bytes'] / 1024**3:.2f} GB freed")
+
+def remove_tree_contents(path: str) -> Tuple[int, int, List[str]]:
+    """Delete a tree bottom-up with os.scandir; returns (files, bytes, errors)"""
+    files = 0
+    size = 0
+    errors = []
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError as e:
+        return 0, 0, [f"{path}: {e}"]
+
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                sub_files, sub_size, sub_errors = remove_tree_contents(entry.path)
+                files += sub_files
+                size += sub_size
+                errors.extend(sub_errors)
+                if not sub_errors:
+                    os.rmdir(entry.path)
+            else:
+                entry_size = entry.stat(follow_symlinks=False).st_size
+                os.unlink(entry.path)
+                files += 1
+                size += entry_size
+        except OSError as e:
+            errors.append(f"{entry.path}: {e}")
+    return files, size, errors
+
+class CleanupExecutor:
+    """Deletes a plan's items in batches on a thread pool
+
+    unlink() is a syscall that releases the GIL, so batches proceed in
+    parallel. Nothing is logged per file; progress goes through a
+    ProgressChannel. Execution is a dry run unless asked otherwise.
+    """
+
+    def __init__(self, max_workers: int = 8, batch_size: int = 256,
+                 progress_callback: Callable[[Dict], None] = None,
+                 progress_interval: float = 0.5):
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.progress_callback = progress_callback
+        self.progress_interval = progress_interval
+
+    def _run_batch(self, batch: List[CleanupItem],
+                   progress: ProgressChannel) -> Tuple[List[Tuple[CleanupItem, int, int]], List[str]]:
+        """Remove one batch; returns ((item, files, bytes) removed, errors)"""
+        removed = []
+        errors = []
+        for item in batch:
+            if item.is_tree:
+                files, size, tree_errors = remove_tree_contents(item.path)
+                if not tree_errors:
+                    try:
+                        os.rmdir(item.path)
+                    except OSError as e:
+                        tree_errors.append(f"{item.path}: {e}")
+                errors.extend(tree_errors)
+                progress.add(files, size)
+                removed.append((item, files, size))
+                continue
+            try:
+                os.unlink(item.path)
+                removed.append((item, 1, item.size))
+                progress.add(1, item.size)
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                errors.append(f"{item.path}: {e}")
+        return removed, errors
+
+    def execute(self, plan: CleanupPlan, dry_run: bool = True) -> Dict:
+        """Carry out a plan (or just total it); returns counts and removed paths"""
+        result = {
+            'dry_run': dry_run,
+            'removed_files': 0,
+            'freed_bytes': 0,
+            'by_reason': {},
+            'removed_paths': [],
+            'errors': []
+        }
+        if dry_run:
+            result['removed_files'] = plan.file_count
+            result['freed_bytes'] = plan.total_bytes
+            result['by_reason'] = plan.by_reason()
+            return result
+        if not plan.items:
+            return result
+
+        started = time.time()
+        progress = ProgressChannel(plan.file_count, self.progress_callback, self.progress_interval)
+        batches = [list(plan.items[i:i + self.batch_size])
+                   for i in range(0, len(plan.items), self.batch_size)]
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as executor:
+            pending = {executor.submit(self._run_batch, batch, progress) for batch in batches}
+            while pending:
+                done, pending = wait(pending, timeout=self.progress_interval,
+                                     return_when=FIRST_COMPLETED)
+                for future in done:
+                    removed, errors = future.result()
+                    for item, files, size in removed:
+                        result['removed_paths'].append(item.path)
+                        totals = result['by_reason'].setdefault(item.reason, {'files': 0, 'bytes': 0})
+                        totals['files'] += files
+                        totals['bytes'] += size
+                    result['errors'].extend(errors)
+                progress.emit()
+        progress.emit(force=True)
+
+        totals = progress.snapshot()
+        result['removed_files'] = totals['removed_files']
+        result['freed_bytes'] = totals['freed_bytes']
+        if result['errors']:
+            logger.warning(f"{len(result['errors'])} items could not be removed, first: {result['errors'][0]}")
+        logger.info(f"✅ Removed {result['removed_files']} files "
+                    f"({result['freed_bytes'] / 1024**3:.2f} GB) in {time.time() - started:.1f}s")
+        return result
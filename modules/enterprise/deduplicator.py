@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Staged Deduplicator Module
+Finds byte-identical files via size buckets, partial hashes, then full hashes
+"""
+
+import os
+import hashlib
+from pathlib import Path
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Iterable, Callable
+import logging
+
+from modules.enterprise.hashing import get_hash_engine
+
+logger = logging.getLogger(__name__)
+
+PARTIAL_BYTES = 1024 * 1024
+READ_BLOCK = 1024 * 1024
+
+@dataclass
+class DuplicateGroup:
+    """Set of byte-identical files; the first path is the one to keep"""
+    digest: str
+    size: int
+    paths: List[str] = field(default_factory=list)
+
+    @property
+    def keeper(self) -> str:
+        return self.paths[0]
+
+    @property
+    def duplicates(self) -> List[str]:
+        return self.paths[1:]
+
+    @property
+    def wasted_bytes(self) -> int:
+        return self.size * (len(self.paths) - 1)
+
+def _partial_hash(path: str, size: int) -> str:
+    """SHA-256 of the head and tail; for small files this is the full digest"""
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        if size <= 2 * PARTIAL_BYTES:
+            for block in iter(lambda: f.read(READ_BLOCK), b''):
+                sha256.update(block)
+        else:
+            sha256.update(f.read(PARTIAL_BYTES))
+            f.seek(-PARTIAL_BYTES, os.SEEK_END)
+            sha256.update(f.read(PARTIAL_BYTES))
+    return sha256.hexdigest()
+
+class StagedDeduplicator:
+    """Duplicate finder that only fully hashes files that could be duplicates"""
+
+    ACTIONS = ('hardlink', 'symlink', 'delete')
+
+    def __init__(self, max_workers: int = None, min_size: int = 1,
+                 is_protected: Callable[[str], bool] = None, hash_cache=None):
+        self.max_workers = max_workers or os.cpu_count() or 4
+        self.min_size = min_size
+        self.is_protected = is_protected or (lambda path: False)
+        self.hash_cache = hash_cache
+        self.stats = {}
+
+    def _size_buckets(self, roots: Iterable) -> Dict[int, List[Tuple[str, float]]]:
+        """Stage 1: group regular files by size, collapsing existing hardlinks"""
+        buckets: Dict[int, List[Tuple[str, float]]] = {}
+        seen_inodes = set()
+        stack = [str(root) for root in roots if os.path.isdir(root)]
+
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                                continue
+                            if not entry.is_file(follow_symlinks=False):
+                                continue
+                            stat = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+
+                        if stat.st_size < self.min_size:
+                            continue
+                        inode = (stat.st_dev, stat.st_ino)
+                        if inode in seen_inodes:
+                            continue  # Already deduplicated by a hardlink
+                        seen_inodes.add(inode)
+                        buckets.setdefault(stat.st_size, []).append((entry.path, stat.st_mtime))
+            except OSError:
+                continue
+
+        return {size: files for size, files in buckets.items() if len(files) > 1}
+
+    def find_duplicates(self, roots: Iterable) -> List[DuplicateGroup]:
+        """Run all three stages and return byte-identical groups"""
+        return self.find_duplicates_in_buckets(self._size_buckets(roots))
+
+    def find_duplicates_in_buckets(self, buckets: Dict[int, List[Tuple[str, float]]]) -> List[DuplicateGroup]:
+        """Stages 2 and 3 over size buckets gathered elsewhere (e.g. a shared scan)"""
+        candidates = [(path, size, mtime) for size, files in buckets.items() for path, mtime in files]
+        self.stats = {'size_candidates': len(candidates)}
+        if not candidates:
+            return []
+
+        # Stage 2: head/tail hashes, IO bound so threads are enough
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            partials = list(executor.map(
+                lambda c: self._safe(_partial_hash, c[0], c[1]), candidates
+            ))
+
+        partial_groups: Dict[Tuple[int, str], List[Tuple[str, float]]] = {}
+        for (path, size, mtime), digest in zip(candidates, partials):
+            if digest:
+                partial_groups.setdefault((size, digest), []).append((path, mtime))
+
+        confirmed: Dict[Tuple[int, str], List[Tuple[str, float]]] = {}
+        needs_full: List[Tuple[str, int, float]] = []
+        for (size, digest), files in partial_groups.items():
+            if len(files) < 2:
+                continue
+            if size <= 2 * PARTIAL_BYTES:
+                confirmed[(size, digest)] = files  # Partial hash covered the whole file
+            else:
+                needs_full.extend((path, size, mtime) for path, mtime in files)
+
+        self.stats['full_hash_candidates'] = len(needs_full)
+
+        # Stage 3: full hashes of the survivors on the shared hashing engine
+        if needs_full:
+            sizes = {path: (size, mtime) for path, size, mtime in needs_full}
+            for path, digest in self._hash_full([p for p, _, _ in needs_full]):
+                size, mtime = sizes[path]
+                confirmed.setdefault((size, digest), []).append((path, mtime))
+
+        groups = []
+        for (size, digest), files in confirmed.items():
+            if len(files) < 2:
+                continue
+            # Keep protected files first, then the oldest copy
+            files.sort(key=lambda f: (not self.is_protected(f[0]), f[1], f[0]))
+            groups.append(DuplicateGroup(digest=digest, size=size, paths=[p for p, _ in files]))
+
+        groups.sort(key=lambda g: g.wasted_bytes, reverse=True)
+        self.stats['groups'] = len(groups)
+        self.stats['wasted_bytes'] = sum(g.wasted_bytes for g in groups)
+        logger.info(f"Deduplication stages: {self.stats}")
+        return groups
+
+    def _hash_full(self, paths: List[str]) -> List[Tuple[str, str]]:
+        """Full digests, served from the hash cache where the file is unchanged"""
+        if self.hash_cache:
+            digests = self.hash_cache.get_or_compute_many(paths)
+        else:
+            digests = get_hash_engine().hash_files(paths)
+        return list(digests.items())
+
+    @staticmethod
+    def _safe(func, *args):
+        try:
+            return func(*args)
+        except OSError as e:
+            logger.warning(f"Could not hash {args[0]}: {e}")
+            return None
+
+    def resolve(self, groups: List[DuplicateGroup], action: str = 'hardlink',
+                dry_run: bool = False) -> Dict:
+        """Replace duplicates by hardlinks or symlinks to the keeper, or delete them"""
+        if action not in self.ACTIONS:
+            raise ValueError(f"Unknown duplicate action: {action}")
+
+        result = {'action': action, 'resolved_files': 0, 'freed_bytes': 0, 'errors': []}
+
+        for group in groups:
+            for dup_path in group.duplicates:
+                if self.is_protected(dup_path):
+                    continue
+                if dry_run:
+                    result['resolved_files'] += 1
+                    result['freed_bytes'] += group.size
+                    continue
+                try:
+                    self._replace(group.keeper, dup_path, action)
+                    result['resolved_files'] += 1
+                    result['freed_bytes'] += group.size
+                    logger.info(f"Resolved duplicate ({action}): {dup_path}")
+                except OSError as e:
+                    result['errors'].append(f"{dup_path}: {e}")
+                    logger.error(f"Failed to resolve duplicate {dup_path}: {e}")
+
+        return result
+
+    def _replace(self, keeper: str, dup_path: str, action: str):
+        """Swap a duplicate for a link atomically (or remove it)"""
+        if action == 'delete':
+            os.unlink(dup_path)
+            return
+
+        tmp_path = f"{dup_path}.dedup-tmp"
+        if os.path.lexists(tmp_path):
+            os.unlink(tmp_path)
+
+        if action == 'hardlink':
+            try:
+                os.link(keeper, tmp_path)
+            except OSError as e:
+                # Cross-device duplicates can only be symlinked
+                logger.warning(f"Hardlink failed ({e.strerror}), using symlink for {dup_path}")
+                os.symlink(os.path.abspath(keeper), tmp_path)
+        else:
+            os.symlink(os.path.abspath(keeper), tmp_path)
+
+        os.replace(tmp_path, dup_path)
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Disk Pressure Module
+Watermark watchdog that reclaims space and pauses downloads before the disk fills
+"""
+
+import os
+import time
+import shutil
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set
+import logging
+
+from modules.enterprise.event_log import EventLog
+
+logger = logging.getLogger(__name__)
+
+# A .part file untouched this long belongs to a download that died
+STALE_PARTIAL_SECONDS = 3600
+
+@dataclass
+class ReclaimStep:
+    """One way to free space; steps run cheapest first"""
+    name: str
+    reclaim: Callable[[int], int]     # bytes wanted -> bytes freed
+    paths: Callable[[], List[str]] = None   # where it frees space; None = storage root
+
+class DiskPressureMonitor:
+    """Samples every storage filesystem and keeps usage under a high watermark
+
+    When any filesystem goes above `high_watermark` (fraction used), new
+    downloads are paused and reclaim steps run one at a time, re-sampling
+    after each, until usage is back under `low_watermark`. Only steps that
+    free space on an over-watermark filesystem run. Downloads resume
+    once usage is below the high watermark again. Every decision is recorded
+    in the event log. Demotion and eviction only touch checkpoints and
+    LoRAs, never one the WebUI loaded since the monitor was created.
+    """
+
+    def __init__(self, storage_manager, event_log: EventLog = None,
+                 high_watermark: float = 0.90, low_watermark: float = 0.80,
+                 interval: float = 10.0, allow_eviction: bool = False,
+                 steps: List[ReclaimStep] = None,
+                 is_protected: Callable[[str], bool] = None):
+        if not 0 < low_watermark < high_watermark < 1:
+            raise ValueError("Watermarks must satisfy 0 < low < high < 1")
+        self.storage_manager = storage_manager
+        self.event_log = event_log or storage_manager.event_log
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.interval = interval
+        self.allow_eviction = allow_eviction
+        self.session_start = time.time()
+        self.is_protected = is_protected
+        self.steps = steps if steps is not None else self.default_steps()
+
+        # Set while downloads may start
+        self.downloads_allowed = threading.Event()
+        self.downloads_allowed.set()
+        self.last_sample: Dict[str, Dict] = {}
+        self.extra_paths: List[str] = []
+        self._reported_full = False
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Sampling
+    # ------------------------------------------------------------------
+
+    def watch(self, path: str):
+        """Also watch a filesystem outside the storage tree, e.g. a download staging dir"""
+        os.makedirs(path, exist_ok=True)
+        if str(path) not in self.extra_paths:
+            self.extra_paths.append(str(path))
+
+    def filesystems(self) -> Dict[int, str]:
+        """One existing path per distinct device under the storage tree or watched"""
+        candidates = [self.storage_manager.storage_root] + self.extra_paths
+        for paths in self.storage_manager.storage_paths.values():
+            candidates.extend(paths.values() if isinstance(paths, dict) else [paths])
+        tiers = self.storage_manager.tiers
+        if tiers and not tiers.cold_read_only:
+            candidates.append(tiers.cold_root)
+
+        devices: Dict[int, str] = {}
+        for path in candidates:
+            try:
+                # Symlinked directories are measured where their data lives
+                real = os.path.realpath(path)
+                devices.setdefault(os.stat(real).st_dev, real)
+            except OSError:
+                continue
+        return devices
+
+    @staticmethod
+    def _device(path: str) -> Optional[int]:
+        try:
+            return os.stat(os.path.realpath(path)).st_dev
+        except OSError:
+            return None
+
+    def sample(self) -> Dict[str, Dict]:
+        """{path: {'device', 'used_fraction', 'used_bytes', 'free_bytes', 'total_bytes'}} per filesystem"""
+        usage = {}
+        for device, path in self.filesystems().items():
+            try:
+                disk = shutil.disk_usage(path)
+            except OSError:
+                continue
+            usage[path] = {
+                'device': device,
+                'used_fraction': disk.used / disk.total if disk.total else 0.0,
+                'used_bytes': disk.used,
+                'free_bytes': disk.free,
+                'total_bytes': disk.total
+            }
+        self.last_sample = usage
+        return usage
+
+    def _bytes_over(self, usage: Dict[str, Dict], watermark: float) -> Dict[int, int]:
+        """{device: bytes to free} for each filesystem above the watermark"""
+        over = {}
+        for u in usage.values():
+            excess = int(u['used_bytes'] - watermark * u['total_bytes'])
+            if excess > 0:
+                over[u['device']] = excess
+        return over
+
+    def _step_devices(self, step: ReclaimStep) -> Set[int]:
+        paths = step.paths() if step.paths else [self.storage_manager.storage_root]
+        return {device for device in map(self._device, filter(None, paths)) if device is not None}
+
+    # ------------------------------------------------------------------
+    # Reclaim steps
+    # ------------------------------------------------------------------
+
+    def default_steps(self) -> List[ReclaimStep]:
+        """Cheapest first: scratch files, caches, archiving, cold tier, eviction"""
+        paths = self.storage_manager.storage_paths
+        models = lambda: [paths['models'][group] for group in ('checkpoints', 'lora') if group in paths['models']]
+        steps = [
+            ReclaimStep('stale_partials', self._reclaim_partials, lambda: list(self.extra_paths)),
+            ReclaimStep('temp_files', self._reclaim_temp, lambda: [paths['outputs'].get('temp')]),
+            ReclaimStep('cache', self._reclaim_cache, lambda: list(paths['cache'].values())),
+            ReclaimStep('archive_outputs', self._reclaim_archive, lambda: list(paths['outputs'].values())),
+            ReclaimStep('demote_models', self._reclaim_demote, models)
+        ]
+        if self.allow_eviction:
+            steps.append(ReclaimStep('evict_lru', self._reclaim_evict, models))
+        return steps
+
+    def _scan_category(self, name: str, category: str, subcategory: str = None, **kwargs):
+        from modules.enterprise.storage_scanner import StorageScanner, CategoryFilesVisitor
+
+        visitor = CategoryFilesVisitor(name, category, subcategory, **kwargs)
+        return StorageScanner(self.storage_manager).scan([visitor])[name]
+
+    def _reclaim_partials(self, wanted: int) -> int:
+        # Partial downloads in watched staging dirs nothing has written to in a while
+        cutoff = time.time() - STALE_PARTIAL_SECONDS
+        freed = 0
+        for directory in self.extra_paths:
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if not entry.name.endswith(('.part', '.part.aria2')):
+                        continue
+                    stat = entry.stat(follow_symlinks=False)
+                    if entry.is_file(follow_symlinks=False) and stat.st_mtime < cutoff:
+                        os.remove(entry.path)
+                        freed += stat.st_size
+                except OSError:
+                    continue
+        return freed
+
+    def _reclaim_temp(self, wanted: int) -> int:
+        from modules.enterprise.cleanup_plan import CleanupItem, CleanupPlan, CleanupExecutor
+
+        temp_dir = self.storage_manager.storage_paths['outputs'].get('temp')
+        files = self._scan_category('temp_files', 'outputs', 'temp', top_level_of=temp_dir)
+        plan = CleanupPlan.from_items(CleanupItem(f.path, f.size, 'temp_files') for f in files)
+        return CleanupExecutor().execute(plan, dry_run=False)['freed_bytes']
+
+    def _reclaim_cache(self, wanted: int) -> int:
+        from modules.enterprise.cleanup_plan import CleanupItem, CleanupPlan, CleanupExecutor
+        from modules.enterprise.hf_cache import HFCacheCleaner
+
+        # Idle HF revisions first, then the largest other caches, until enough is planned
+        hf_cache = HFCacheCleaner(self.storage_manager)
+        hub_roots = hf_cache.hub_roots()
+        hf_plan = hf_cache.plan(free_bytes=wanted)
+        items = list(hf_plan.items)
+        planned = hf_plan.total_bytes
+
+        tops: Dict[str, int] = {}
+        for f in self._scan_category('cache_files', 'cache'):
+            if hf_cache.is_managed(f.path, hub_roots):
+                continue
+            root = str(self.storage_manager.storage_paths['cache'][f.subcategory])
+            top = os.path.join(root, os.path.relpath(f.path, root).split(os.sep)[0])
+            tops[top] = tops.get(top, 0) + f.size
+
+        for top, size in sorted(tops.items(), key=lambda item: item[1], reverse=True):
+            if planned >= wanted:
+                break
+            items.append(CleanupItem(top, size, 'cache', is_tree=os.path.isdir(top)))
+            planned += size
+        return CleanupExecutor().execute(CleanupPlan.from_items(items), dry_run=False)['freed_bytes']
+
+    def _reclaim_archive(self, wanted: int) -> int:
+        from modules.enterprise.output_archiver import OutputArchiver
+
+        # Oldest outputs first, just enough of them
+        candidates = sorted(OutputArchiver(self.storage_manager).find_candidates(older_than_days=1),
+                            key=lambda c: c[2])
+        selected = []
+        planned = 0
+        for candidate in candidates:
+            if planned >= wanted:
+                break
+            selected.append(candidate)
+            planned += candidate[1]
+        if not selected:
+            return 0
+        return OutputArchiver(self.storage_manager).archive_files(selected)['freed_bytes']
+
+    def _model_quota_manager(self):
+        from modules.enterprise.storage_quota import StorageQuotaManager
+
+        is_protected = self.is_protected
+        if is_protected is None:
+            # Models the WebUI loaded this session stay local
+            loaded = self.storage_manager.access_tracker.recorded_since(self.session_start)
+            is_protected = lambda path: os.path.realpath(path) in loaded
+        return StorageQuotaManager(self.storage_manager, is_protected=is_protected,
+                                   groups=StorageQuotaManager.MODEL_GROUPS)
+
+    def _reclaim_demote(self, wanted: int) -> int:
+        tiers = self.storage_manager.tiers
+        if not tiers:
+            return 0
+        freed = 0
+        for candidate in self._model_quota_manager().plan_eviction(free_bytes=wanted):
+            if freed >= wanted:
+                break
+            if tiers.demote(candidate.path):
+                freed += candidate.size
+        tiers.save()
+        return freed
+
+    def _reclaim_evict(self, wanted: int) -> int:
+        return self._model_quota_manager().evict(free_bytes=wanted)['freed_bytes']
+
+    # ------------------------------------------------------------------
+    # Control loop
+    # ------------------------------------------------------------------
+
+    def _pause_downloads(self, usage: Dict[str, Dict]):
+        if self.downloads_allowed.is_set():
+            self.downloads_allowed.clear()
+            self.event_log.record('disk_pressure', 'downloads_paused',
+                                  f"Disk above {self.high_watermark:.0%}, pausing new downloads",
+                                  level='warning', usage=usage)
+
+    def _resume_downloads(self, usage: Dict[str, Dict]):
+        self._reported_full = False
+        if not self.downloads_allowed.is_set():
+            self.downloads_allowed.set()
+            self.event_log.record('disk_pressure', 'downloads_resumed',
+                                  "Disk pressure relieved, resuming downloads", usage=usage)
+
+    def check(self) -> Dict:
+        """One watchdog cycle; returns what was done"""
+        usage = self.sample()
+        result = {'over_high': False, 'freed_bytes': 0, 'steps': []}
+
+        if not self._bytes_over(usage, self.high_watermark):
+            self._resume_downloads(usage)
+            return result
+
+        result['over_high'] = True
+        self._pause_downloads(usage)
+
+        for step in self.steps:
+            over = self._bytes_over(usage, self.low_watermark)
+            if not over:
+                break
+            # Reclaiming on a healthy filesystem frees nothing where it is needed
+            wanted = max([over.get(device, 0) for device in self._step_devices(step)] + [0])
+            if wanted <= 0:
+                continue
+            try:
+                freed = step.reclaim(wanted)
+            except Exception as e:
+                self.event_log.record('disk_pressure', 'reclaim_failed', f"{step.name} failed: {e}",
+                                      level='error', step=step.name)
+                continue
+
+            result['freed_bytes'] += freed
+            result['steps'].append({'step': step.name, 'wanted_bytes': wanted, 'freed_bytes': freed})
+            self.event_log.record('disk_pressure', 'reclaimed',
+                                  f"{step.name}: freed {freed / 1024**3:.2f} of {wanted / 1024**3:.2f} GB",
+                                  step=step.name, wanted_bytes=wanted, freed_bytes=freed)
+            usage = self.sample()
+
+        if not self._bytes_over(usage, self.high_watermark):
+            self._resume_downloads(usage)
+        elif not self._reported_full:
+            self._reported_full = True
+            self.event_log.record('disk_pressure', 'still_full',
+                                  "Every reclaim step ran and the disk is still above the high watermark",
+                                  level='error', usage=usage)
+        return result
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Disk pressure check failed: {e}")
+            self._stop_event.wait(self.interval)
+
+    def start(self) -> 'DiskPressureMonitor':
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True, name='disk-pressure')
+        self._thread.start()
+        self.event_log.record('disk_pressure', 'started',
+                              f"Watching {len(self.filesystems())} filesystems "
+                              f"(high {self.high_watermark:.0%}, low {self.low_watermark:.0%})")
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        # Never leave downloads blocked behind a stopped watchdog
+        self.downloads_allowed.set()
+
+    def wait_for_space(self, timeout: float = None) -> bool:
+        """Block until downloads may start; False on timeout"""
+        return self.downloads_allowed.wait(timeout)
+
+    def get_status(self) -> Dict:
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'downloads_paused': not self.downloads_allowed.is_set(),
+            'high_watermark': self.high_watermark,
+            'low_watermark': self.low_watermark,
+            'filesystems': self.last_sample
+        }
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Download Calibration Module
+Disk and network micro-benchmarks that size download concurrency and buffers
+"""
+
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+import urllib.request
+from pathlib import Path
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CALIBRATION_FILE = Path(__file__).resolve().parent.parent.parent / 'configs' / 'download_calibration.json'
+
+# Large file on a CDN that honours Range requests; override with $SD_DARKMASTER_PROBE_URL
+DEFAULT_PROBE_URL = 'https://huggingface.co/openai/clip-vit-large-patch14/resolve/main/model.safetensors'
+
+@dataclass
+class DownloadTuning:
+    """Settings derived from one calibration run"""
+    max_concurrent: int = 3         # files in flight
+    segments: int = 16              # connections per file (aria2c -x/-s)
+    chunk_size: int = 8192          # read/write buffer in bytes
+    min_split_mb: int = 1           # aria2c -k
+    staging_dir: Optional[str] = None   # where partial files are written; None = in place
+
+def publish_staged(temp_path: Path, file_path: Path):
+    """Move a finished download into place atomically, even across filesystems"""
+    try:
+        os.replace(temp_path, file_path)
+    except OSError:
+        # Different filesystem: one sequential copy next to the target, then rename
+        part = file_path.parent / f".{file_path.name}.publish"
+        shutil.copyfile(temp_path, part)
+        os.replace(part, file_path)
+        os.unlink(temp_path)
+
+def load_cached_tuning(cache_file: Path = None) -> DownloadTuning:
+    """Last calibrated tuning without measuring anything; defaults if none"""
+    try:
+        with open(cache_file or DEFAULT_CALIBRATION_FILE, 'r') as f:
+            return DownloadTuning(**json.load(f)['tuning'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return DownloadTuning()
+
+class DownloadCalibrator:
+    """Measures the storage filesystems and the network once per platform
+
+    The write test streams `write_mb` to each candidate filesystem with an
+    fsync. The network probe fetches fixed-size byte ranges from
+    `probe_url` with 1, 2, 4, 8 and 16 connections. Results and the derived
+    DownloadTuning are cached in configs/download_calibration.json.
+    """
+
+    CONNECTION_STEPS = (1, 2, 4, 8, 16)
+
+    def __init__(self, storage_manager, platform: str = 'local', probe_url: str = None,
+                 cache_file: Path = None, max_age_days: float = 30,
+                 write_mb: int = 64, probe_seconds: float = 1.5, segment_bytes: int = 4 * 1024**2):
+        self.storage_manager = storage_manager
+        self.platform = platform
+        self.probe_url = probe_url or os.environ.get('SD_DARKMASTER_PROBE_URL', DEFAULT_PROBE_URL)
+        self.cache_file = Path(cache_file or DEFAULT_CALIBRATION_FILE)
+        self.max_age = max_age_days * 86400
+        self.write_mb = write_mb
+        self.probe_seconds = probe_seconds
+        self.segment_bytes = segment_bytes
+
+    # ------------------------------------------------------------------
+    # Disk
+    # ------------------------------------------------------------------
+
+    def candidate_dirs(self) -> List[str]:
+        """Storage root, a writable cold tier and the system temp dir, one per device"""
+        candidates = [str(self.storage_manager.storage_root)]
+        tiers = self.storage_manager.tiers
+        if tiers and not tiers.cold_read_only:
+            candidates.append(str(tiers.cold_root))
+        candidates.append(tempfile.gettempdir())
+
+        devices = {}
+        for path in candidates:
+            try:
+                os.makedirs(path, exist_ok=True)
+                devices.setdefault(os.stat(path).st_dev, path)
+            except OSError:
+                continue
+        return list(devices.values())
+
+    def measure_write(self, directory: str) -> Optional[float]:
+        """Sequential write MB/s including fsync; None if not writable"""
+        block = os.urandom(1024 * 1024)
+        fd, path = tempfile.mkstemp(prefix='.calibrate-', dir=directory)
+        try:
+            start = time.perf_counter()
+            with os.fdopen(fd, 'wb') as f:
+                for _ in range(self.write_mb):
+                    f.write(block)
+                f.flush()
+                os.fsync(f.fileno())
+            return self.write_mb / max(time.perf_counter() - start, 1e-6)
+        except OSError as e:
+            logger.debug(f"Write test failed in {directory}: {e}")
+            return None
+        finally:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    # ------------------------------------------------------------------
+    # Network
+    # ------------------------------------------------------------------
+
+    def _fetch_range(self, offset: int) -> int:
+        request = urllib.request.Request(
+            self.probe_url,
+            headers={'Range': f"bytes={offset}-{offset + self.segment_bytes - 1}",
+                     'User-Agent': 'SD-DarkMaster-Pro/1.0.0'}
+        )
+        received = 0
+        with urllib.request.urlopen(request, timeout=15) as response:
+            if response.status != 206:
+                raise ValueError("Server ignores Range requests")
+            while True:
+                data = response.read(256 * 1024)
+                if not data:
+                    break
+                received += len(data)
+        return received
+
+    def measure_network(self, connections: int) -> float:
+        """Aggregate MB/s of `connections` parallel range fetches"""
+        deadline = time.perf_counter() + self.probe_seconds
+        received = [0] * connections
+        errors: List[Exception] = []
+
+        def worker(slot: int):
+            offset = slot * self.segment_bytes
+            try:
+                while time.perf_counter() < deadline:
+                    received[slot] += self._fetch_range(offset)
+                    offset += connections * self.segment_bytes
+            except Exception as e:
+                errors.append(e)
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(connections)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(self.probe_seconds + 20)
+        if errors and not any(received):
+            raise errors[0]
+        return sum(received) / (1024 * 1024) / max(time.perf_counter() - start, 1e-6)
+
+    # ------------------------------------------------------------------
+    # Calibration
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def derive(disk_mbps: Dict[str, float], network_mbps: Dict[int, float],
+               storage_root: str) -> DownloadTuning:
+        """Turn measurements into download settings"""
+        tuning = DownloadTuning()
+
+        if network_mbps:
+            best = max(network_mbps.values())
+            # Fewest connections within 10% of the best aggregate
+            tuning.segments = min(c for c, mbps in network_mbps.items() if mbps >= 0.9 * best)
+            per_connection = best / tuning.segments
+            # ~10 ms of one connection's data per read, as a power of two
+            buffer = max(64 * 1024, min(4 * 1024**2, int(per_connection * 1024**2 / 100)))
+            tuning.chunk_size = 1 << (buffer.bit_length() - 1)
+            # Each segment should run for a second or more
+            tuning.min_split_mb = max(1, min(64, int(per_connection)))
+        else:
+            best = None
+
+        root_mbps = disk_mbps.get(storage_root)
+        # Keep roughly 16 connections in flight overall
+        tuning.max_concurrent = max(2, min(8, 16 // tuning.segments))
+        if best and root_mbps and root_mbps < best:
+            # Disk is the bottleneck: more parallel files only add seeks
+            tuning.max_concurrent = 2
+
+        # Stage partial files elsewhere only when the storage root is much slower
+        fastest = max(disk_mbps, key=disk_mbps.get) if disk_mbps else None
+        if fastest and fastest != storage_root and root_mbps and disk_mbps[fastest] >= 2 * root_mbps:
+            tuning.staging_dir = os.path.join(fastest, 'sd-darkmaster-downloads')
+        return tuning
+
+    def run(self) -> Dict:
+        """Measure everything now and cache the result"""
+        started = time.time()
+        disk = {}
+        for directory in self.candidate_dirs():
+            mbps = self.measure_write(directory)
+            if mbps is not None:
+                disk[directory] = mbps
+
+        network = {}
+        for connections in self.CONNECTION_STEPS:
+            try:
+                network[connections] = self.measure_network(connections)
+            except Exception as e:
+                logger.info(f"Network probe stopped at {connections} connections: {e}")
+                break
+            # Past saturation more connections only add load
+            if connections > 1 and network[connections] < 1.05 * network[connections // 2]:
+                break
+
+        tuning = self.derive(disk, network, str(self.storage_manager.storage_root))
+        result = {
+            'platform': self.platform,
+            'created': time.time(),
+            'disk_mbps': disk,
+            'network_mbps': {str(c): mbps for c, mbps in network.items()},
+            'tuning': asdict(tuning)
+        }
+        self.save(result)
+        logger.info(f"Download calibration ({time.time() - started:.1f}s): {asdict(tuning)}")
+        return result
+
+    def load(self) -> Optional[Dict]:
+        """Cached calibration for this platform, if fresh"""
+        try:
+            with open(self.cache_file, 'r') as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if result.get('platform') != self.platform or time.time() - result.get('created', 0) > self.max_age:
+            return None
+        return result
+
+    def save(self, result: Dict):
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = self.cache_file.with_suffix('.tmp')
+        with open(temp_file, 'w') as f:
+            json.dump(result, f, indent=2)
+        os.replace(temp_file, self.cache_file)
+
+    def tuning(self, recalibrate: bool = False) -> DownloadTuning:
+        """Cached tuning, calibrating first if there is none for this platform"""
+        result = None if recalibrate else self.load()
+        if result is None:
+            try:
+                result = self.run()
+            except Exception as e:
+                logger.warning(f"Download calibration failed, using defaults: {e}")
+                return DownloadTuning()
+        tuning = DownloadTuning(**result['tuning'])
+        if tuning.staging_dir and not os.path.isdir(os.path.dirname(tuning.staging_dir)):
+            tuning.staging_dir = None
+        return tuning
@@ -5,6 +5,7 @@ Handles all download operations with progress tracking and error recovery
 """
 
 import os
+import shutil
 import asyncio
 import aiohttp
 import aiofiles
@@ -19,6 +20,10 @@ import logging
 from tqdm.asyncio import tqdm
 from urllib.parse import urlparse, unquote
 
+from modules.enterprise.unified_storage_manager import UnifiedStorageManager
+from modules.enterprise.download_calibration import publish_staged
+from modules.enterprise.hashing import ADDNET_ALGORITHM
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -51,9 +56,17 @@ class DownloadTask:
 class DownloadManager:
     """Advanced download manager with async operations"""
     
-    def __init__(self, storage_manager=None, max_concurrent: int = 3):
+    def __init__(self, storage_manager=None, max_concurrent: int = 3,
+                 shrink_checkpoints: bool = False, chunk_size: int = 8192,
+                 staging_dir: Optional[Path] = None, disk_wait_timeout: float = 900):
         self.storage_manager = storage_manager
         self.max_concurrent = max_concurrent
+        self.chunk_size = chunk_size
+        # Faster local disk for partial files when storage sits on a slow mount
+        self.staging_dir = Path(staging_dir) if staging_dir else None
+        self.shrink_checkpoints = shrink_checkpoints
+        # Seconds a download waits for the disk watchdog before it fails
+        self.disk_wait_timeout = disk_wait_timeout
         self.download_queue: List[DownloadTask] = []
         self.active_downloads: Dict[str, DownloadTask] = {}
         self.completed_downloads: List[DownloadTask] = []
@@ -62,6 +75,8 @@ class DownloadManager:
         self.progress_callbacks: List[Callable] = []
         self.total_downloaded = 0
         self.total_failed = 0
+        # The storage tree's digest cache, even for a manager built without one
+        self.hash_cache = (storage_manager or UnifiedStorageManager()).hash_cache
         
     async def __aenter__(self):
         """Async context manager entry"""
@@ -80,7 +95,10 @@ class DownloadManager:
                     asset_type: str = "model", **kwargs) -> DownloadTask:
         """Add a download task to the queue"""
         if destination is None:
-            destination = Path("/workspace/SD-DarkMaster-Pro/storage/downloads")
+            if self.storage_manager:
+                destination = self.storage_manager.get_download_destination(asset_type)
+            else:
+                destination = Path("/workspace/SD-DarkMaster-Pro/storage/downloads")
         
         task = DownloadTask(
             url=url,
@@ -107,6 +125,11 @@ class DownloadManager:
         task.start_time = time.time()
         
         try:
+            # Resolve the final location up front so the file is written
+            # exactly once, instead of being moved (or copied) afterwards
+            if self.storage_manager:
+                task.destination = self.storage_manager.get_download_destination(task.asset_type)
+            
             # Ensure destination directory exists
             task.destination.mkdir(parents=True, exist_ok=True)
             file_path = task.destination / task.filename
@@ -119,11 +142,13 @@ class DownloadManager:
                 return True
             
             # Download with progress tracking
+            sha256 = hashlib.sha256()
             async with self.session.get(task.url) as response:
                 response.raise_for_status()
                 
                 total_size = int(response.headers.get('content-length', 0))
                 task.expected_size = total_size
+                temp_path = self._temp_path(task, total_size)
                 
                 # Create progress bar
                 progress_bar = tqdm(
@@ -133,33 +158,44 @@ class DownloadManager:
                     desc=task.filename[:30]
                 )
                 
-                # Download in chunks
-                async with aiofiles.open(file_path, 'wb') as file:
-                    downloaded = 0
-                    async for chunk in response.content.iter_chunked(8192):
-                        await file.write(chunk)
-                        downloaded += len(chunk)
-                        progress_bar.update(len(chunk))
-                        
-                        # Update task progress
-                        if total_size > 0:
-                            task.progress = (downloaded / total_size) * 100
-                        
-                        # Call progress callbacks
-                        for callback in self.progress_callbacks:
-                            callback(task)
-                
-                progress_bar.close()
+                # Download in chunks to a hidden temp file next to the target
+                try:
+                    async with aiofiles.open(temp_path, 'wb') as file:
+                        downloaded = 0
+                        async for chunk in response.content.iter_chunked(self.chunk_size):
+                            await file.write(chunk)
+                            sha256.update(chunk)
+                            downloaded += len(chunk)
+                            progress_bar.update(len(chunk))
+                            
+                            # Update task progress
+                            if total_size > 0:
+                                task.progress = (downloaded / total_size) * 100
+                            
+                            # Call progress callbacks
+                            for callback in self.progress_callbacks:
+                                callback(task)
+                except BaseException:
+                    temp_path.unlink(missing_ok=True)
+                    raise
+                finally:
+                    progress_bar.close()
             
-            # Verify download
-            if task.expected_hash:
-                if not self._verify_hash(file_path, task.expected_hash):
-                    raise ValueError("Hash verification failed")
+            # Verify download against the digest computed while streaming
+            digest = sha256.hexdigest()
+            if task.expected_hash and digest != task.expected_hash.strip().lower():
+                temp_path.unlink(missing_ok=True)
+                raise ValueError("Hash verification failed")
             
-            # Organize file if storage manager is available
-            if self.storage_manager:
-                final_path = self.storage_manager.organize_downloads(file_path, task.asset_type)
-                task.metadata['final_path'] = str(final_path)
+            # Publish atomically; WebUIs never see a half-written model
+            await asyncio.get_event_loop().run_in_executor(None, publish_staged, temp_path, file_path)
+            self.hash_cache.store(file_path, digest)
+            await self.cache_webui_hashes(file_path, task.asset_type)
+            task.metadata['final_path'] = str(file_path)
+            
+            # Optional post-download stage: pruned fp16 checkpoints
+            if self.shrink_checkpoints and task.asset_type == 'checkpoint':
+                await self._shrink(file_path, task)
             
             task.status = "completed"
             task.progress = 100.0
@@ -186,6 +222,17 @@ class DownloadManager:
                 logger.error(f"❌ Download failed: {task.filename} - {e}")
                 return False
     
+    def _temp_path(self, task: DownloadTask, size: int) -> Path:
+        """Partial-file path: the staging dir if it has room, else next to the target"""
+        if self.staging_dir and size:
+            try:
+                self.staging_dir.mkdir(parents=True, exist_ok=True)
+                if shutil.disk_usage(self.staging_dir).free > size * 1.1:
+                    return self.staging_dir / f".{task.filename}.part"
+            except OSError:
+                pass
+        return task.destination / f".{task.filename}.part"
+    
     async def process_queue(self) -> Dict[str, int]:
         """Process all downloads in the queue"""
         if not self.session:
@@ -204,6 +251,8 @@ class DownloadManager:
         
         async def download_with_semaphore(task):
             async with semaphore:
+                if not await self._wait_for_disk(task):
+                    return False
                 self.active_downloads[task.filename] = task
                 result = await self.download_file(task)
                 del self.active_downloads[task.filename]
@@ -233,6 +282,50 @@ class DownloadManager:
         logger.info(f"Download summary: {summary}")
         return summary
     
+    async def _wait_for_disk(self, task: DownloadTask) -> bool:
+        """Hold a download back while the disk-pressure watchdog reclaims space; False fails it"""
+        monitor = getattr(self.storage_manager, 'disk_monitor', None)
+        if monitor is None or monitor.downloads_allowed.is_set():
+            return True
+        
+        logger.info(f"Disk nearly full, {task.filename} waits for space")
+        task.status = "paused"
+        loop = asyncio.get_running_loop()
+        if await loop.run_in_executor(None, monitor.wait_for_space, self.disk_wait_timeout):
+            task.status = "pending"
+            return True
+        
+        task.status = "failed"
+        task.error = f"Disk still above the high watermark after {self.disk_wait_timeout}s of reclaiming"
+        task.end_time = time.time()
+        self.failed_downloads.append(task)
+        self.total_failed += 1
+        logger.error(f"❌ Download not started: {task.filename} - {task.error}")
+        return False
+    
+    async def cache_webui_hashes(self, file_path: Path, asset_type: str):
+        """Cache the addnet digest WebUIs look LoRAs up by, so seeding at launch needs no hashing"""
+        if asset_type != 'lora' or file_path.suffix.lower() != '.safetensors':
+            return
+        try:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.hash_cache.get_or_compute, file_path, ADDNET_ALGORITHM)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not hash {file_path.name} for the WebUI: {e}")
+    
+    async def _shrink(self, file_path: Path, task: DownloadTask):
+        """Convert a downloaded checkpoint to pruned fp16 off the event loop"""
+        from modules.enterprise.model_converter import shrink_checkpoint
+        
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(None, shrink_checkpoint, file_path)
+            if result:
+                task.metadata['shrunk_bytes'] = result['saved_bytes']
+        except Exception as e:
+            # The original download is still intact
+            logger.warning(f"Could not shrink {task.filename}: {e}")
+    
     def _should_redownload(self, file_path: Path, task: DownloadTask) -> bool:
         """Check if file should be redownloaded"""
         if not file_path.exists():
@@ -255,13 +348,7 @@ class DownloadManager:
     
     def _verify_hash(self, file_path: Path, expected_hash: str) -> bool:
         """Verify file hash"""
-        sha256_hash = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        
-        calculated_hash = sha256_hash.hexdigest()
-        return calculated_hash == expected_hash
+        return self.hash_cache.verify(file_path, expected_hash)
     
     def add_progress_callback(self, callback: Callable):
         """Add a progress callback function"""
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Event Log Module
+Structured, append-only log of storage actions with live subscribers
+"""
+
+import json
+import time
+import threading
+from collections import deque
+from pathlib import Path
+from dataclasses import dataclass, field, asdict
+from typing import Callable, Deque, Dict, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Event:
+    """One thing the system did, and why"""
+    source: str
+    kind: str
+    message: str
+    level: str = 'info'
+    data: Dict = field(default_factory=dict)
+    timestamp: float = field(default_factory=time.time)
+
+class EventLog:
+    """Events kept in a bounded ring in memory and appended to a JSON-lines file"""
+
+    def __init__(self, log_file: Path = None, max_events: int = 1000):
+        self.log_file = Path(log_file) if log_file else None
+        self._events: Deque[Event] = deque(maxlen=max_events)
+        self._subscribers: List[Callable[[Event], None]] = []
+        self._lock = threading.Lock()
+
+    def record(self, source: str, kind: str, message: str, level: str = 'info', **data) -> Event:
+        """Store an event, mirror it to the logger and notify subscribers"""
+        event = Event(source, kind, message, level, data)
+        with self._lock:
+            self._events.append(event)
+            subscribers = list(self._subscribers)
+            if self.log_file:
+                try:
+                    self.log_file.parent.mkdir(parents=True, exist_ok=True)
+                    with open(self.log_file, 'a') as f:
+                        f.write(json.dumps(asdict(event)) + '\n')
+                except OSError as e:
+                    # A full disk must not break the code reporting it
+                    logger.debug(f"Could not append to event log: {e}")
+
+        getattr(logger, level if level in ('debug', 'info', 'warning', 'error') else 'info')(
+            f"[{source}] {message}")
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"Event subscriber failed: {e}")
+        return event
+
+    def subscribe(self, callback: Callable[[Event], None]):
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Event], None]):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def recent(self, limit: int = 50, source: str = None) -> List[Event]:
+        """Newest events last, optionally from one source"""
+        with self._lock:
+            events = [e for e in self._events if source is None or e.source == source]
+        return events[-limit:]
+
+_logs: Dict[str, EventLog] = {}
+_logs_lock = threading.Lock()
+
+def get_event_log(log_file: Path = None) -> EventLog:
+    """Get the shared EventLog for a log file (one instance per process)"""
+    key = str(Path(log_file).resolve()) if log_file else ''
+    with _logs_lock:
+        if key not in _logs:
+            _logs[key] = EventLog(Path(key) if key else None)
+        return _logs[key]
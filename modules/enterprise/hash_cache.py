@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Hash Cache Module
+Persistent file digest cache keyed by (device, inode, size, mtime_ns)
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Iterable
+import logging
+
+from modules.enterprise.hashing import get_hash_engine
+
+logger = logging.getLogger(__name__)
+
+class HashCache:
+    """Digest cache shared by the downloader, storage manager and cleaner"""
+
+    CACHE_VERSION = 1
+    SAVE_INTERVAL = 5.0
+
+    def __init__(self, cache_file: Path):
+        self.cache_file = Path(cache_file)
+        self._entries: Dict[str, Dict] = {}
+        self._keys_by_path: Dict[str, str] = {}
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._last_save = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.load()
+
+    @staticmethod
+    def key_for(stat: os.stat_result) -> str:
+        """Identity of one physical version of a file"""
+        return f"{stat.st_dev}:{stat.st_ino}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def lookup(self, file_path, algorithm: str = 'sha256', stat: os.stat_result = None) -> Optional[str]:
+        """Return a cached digest if the file is unchanged since it was hashed"""
+        try:
+            stat = stat or os.stat(file_path)
+        except OSError:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(self.key_for(stat))
+            digest = entry.get(algorithm) if entry else None
+
+        if digest:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return digest
+
+    def store(self, file_path, digest: str, algorithm: str = 'sha256', stat: os.stat_result = None):
+        """Record a digest for the current version of a file"""
+        path_str = os.path.abspath(str(file_path))
+        try:
+            stat = stat or os.stat(path_str)
+        except OSError:
+            return
+
+        key = self.key_for(stat)
+        with self._lock:
+            # Any older version of this path is stale now
+            old_key = self._keys_by_path.get(path_str)
+            if old_key and old_key != key:
+                self._entries.pop(old_key, None)
+
+            entry = self._entries.setdefault(key, {})
+            entry['path'] = path_str
+            entry[algorithm] = digest.lower()
+            self._keys_by_path[path_str] = key
+            self._dirty = True
+
+        self._maybe_save()
+
+    def get_or_compute(self, file_path, algorithm: str = 'sha256') -> str:
+        """Return the cached digest, hashing the file only if it changed"""
+        stat = os.stat(file_path)
+        digest = self.lookup(file_path, algorithm, stat)
+        if digest:
+            return digest
+
+        digest = self._compute(file_path, algorithm)
+
+        # Only trust the digest if the file did not change while hashing
+        if self.key_for(os.stat(file_path)) == self.key_for(stat):
+            self.store(file_path, digest, algorithm, stat)
+        return digest
+
+    def get_or_compute_many(self, paths: Iterable, algorithm: str = 'sha256') -> Dict[str, str]:
+        """Digests for many files; cache misses are hashed in parallel"""
+        results = {}
+        stats = {}
+        for path in paths:
+            path_str = str(path)
+            try:
+                stats[path_str] = os.stat(path_str)
+            except OSError:
+                continue
+            digest = self.lookup(path_str, algorithm, stats[path_str])
+            if digest:
+                results[path_str] = digest
+
+        missing = [p for p in stats if p not in results]
+        for path_str, digest in get_hash_engine().hash_files(missing, algorithm).items():
+            results[path_str] = digest
+            try:
+                unchanged = self.key_for(os.stat(path_str)) == self.key_for(stats[path_str])
+            except OSError:
+                unchanged = False
+            if unchanged:
+                self.store(path_str, digest, algorithm, stats[path_str])
+
+        return results
+
+    def verify(self, file_path, expected_hash: str, algorithm: str = 'sha256') -> bool:
+        """Compare a file against an expected digest (case-insensitive)"""
+        return self.get_or_compute(file_path, algorithm) == expected_hash.strip().lower()
+
+    def _compute(self, file_path, algorithm: str) -> str:
+        return get_hash_engine().hash_file(file_path, algorithm)
+
+    def invalidate(self, file_path):
+        """Forget every digest recorded for a path"""
+        path_str = os.path.abspath(str(file_path))
+        with self._lock:
+            key = self._keys_by_path.pop(path_str, None)
+            if key:
+                self._entries.pop(key, None)
+                self._dirty = True
+
+    def prune(self) -> int:
+        """Drop entries whose file is gone or has changed"""
+        removed = 0
+        with self._lock:
+            for path_str, key in list(self._keys_by_path.items()):
+                try:
+                    current = self.key_for(os.stat(path_str))
+                except OSError:
+                    current = None
+                if current != key:
+                    self._keys_by_path.pop(path_str, None)
+                    self._entries.pop(key, None)
+                    removed += 1
+            if removed:
+                self._dirty = True
+
+        if removed:
+            logger.info(f"Pruned {removed} stale hash cache entries")
+            self.save()
+        return removed
+
+    def load(self):
+        """Load persisted digests"""
+        if not self.cache_file.exists():
+            return
+
+        try:
+            with open(self.cache_file, 'r') as f:
+                data = json.load(f)
+            if data.get('version') != self.CACHE_VERSION:
+                return
+
+            with self._lock:
+                self._entries = data.get('entries', {})
+                self._keys_by_path = {
+                    entry['path']: key for key, entry in self._entries.items() if 'path' in entry
+                }
+        except Exception as e:
+            logger.warning(f"Could not load hash cache: {e}")
+
+    def _maybe_save(self):
+        if time.time() - self._last_save >= self.SAVE_INTERVAL:
+            self.save()
+
+    def save(self):
+        """Persist digests atomically if anything changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            # store() adds algorithm keys to entries in place; copy them under the lock
+            entries = {key: dict(entry) for key, entry in self._entries.items()}
+            data = {'version': self.CACHE_VERSION, 'entries': entries}
+            self._dirty = False
+            self._last_save = time.time()
+
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_suffix('.json.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            logger.warning(f"Could not save hash cache: {e}")
+
+_caches: Dict[str, HashCache] = {}
+_caches_lock = threading.Lock()
+
+def get_hash_cache(cache_file: Path) -> HashCache:
+    """Get the shared HashCache for a cache file (one instance per process)
+
+    Unified storage keeps its cache at storage_root/hash_cache.json; use
+    UnifiedStorageManager.hash_cache rather than naming the file here.
+    """
+    key = str(Path(cache_file).resolve())
+    with _caches_lock:
+        if key not in _caches:
+            cache = HashCache(Path(key))
+            atexit.register(cache.save)
+            _caches[key] = cache
+        return _caches[key]
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Hashing Engine Module
+High-throughput file hashing with reusable buffers, mmap and a thread pool
+"""
+
+import os
+import mmap
+import hashlib
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Iterable
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUFFER_SIZE = 8 * 1024 * 1024
+
+# sd-scripts "addnet" hash: SHA-256 of a safetensors file minus its header
+ADDNET_ALGORITHM = 'sha256-addnet'
+
+def safetensors_data_offset(file_path) -> int:
+    """Byte offset where tensor data starts (8-byte length + JSON header)"""
+    with open(file_path, 'rb') as f:
+        header = f.read(8)
+    if len(header) < 8:
+        raise ValueError(f"Not a safetensors file: {file_path}")
+    return 8 + int.from_bytes(header, 'little')
+
+class HashEngine:
+    """Single hashing implementation shared by downloader, storage manager and cleaner
+
+    hashlib releases the GIL while digesting buffers larger than 2 KiB, so
+    hashing several files from a thread pool runs truly in parallel.
+    """
+
+    def __init__(self, max_workers: int = None, buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 use_mmap: bool = False):
+        self.max_workers = max_workers or os.cpu_count() or 4
+        self.buffer_size = buffer_size
+        self.use_mmap = use_mmap
+        self._local = threading.local()
+
+    @classmethod
+    def from_platform(cls, platform_manager, **kwargs) -> 'HashEngine':
+        """Size the worker pool from PlatformManager.system_info['cpu_count']"""
+        cpu_count = platform_manager.system_info.get('cpu_count') or os.cpu_count()
+        return cls(max_workers=cpu_count, **kwargs)
+
+    def _buffer(self) -> memoryview:
+        """Per-thread reusable read buffer"""
+        view = getattr(self._local, 'view', None)
+        if view is None or len(view) != self.buffer_size:
+            self._local.view = view = memoryview(bytearray(self.buffer_size))
+        return view
+
+    def hash_file(self, file_path, algorithm: str = 'sha256',
+                  offset: int = 0, length: Optional[int] = None) -> str:
+        """Hash a file, or the byte range [offset, offset + length)"""
+        if algorithm == ADDNET_ALGORITHM:
+            algorithm = 'sha256'
+            offset = safetensors_data_offset(file_path)
+        hasher = hashlib.new(algorithm)
+
+        with open(file_path, 'rb', buffering=0) as f:
+            size = os.fstat(f.fileno()).st_size
+            end = size if length is None else min(size, offset + length)
+            if end <= offset:
+                return hasher.hexdigest()
+
+            if hasattr(os, 'posix_fadvise'):
+                try:
+                    os.posix_fadvise(f.fileno(), offset, end - offset, os.POSIX_FADV_SEQUENTIAL)
+                except OSError:
+                    pass
+
+            if self.use_mmap:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    view = memoryview(mapped)
+                    try:
+                        for start in range(offset, end, self.buffer_size):
+                            hasher.update(view[start:min(start + self.buffer_size, end)])
+                    finally:
+                        view.release()
+            else:
+                buffer = self._buffer()
+                f.seek(offset)
+                remaining = end - offset
+                while remaining > 0:
+                    read = f.readinto(buffer[:min(self.buffer_size, remaining)])
+                    if not read:
+                        break
+                    hasher.update(buffer[:read])
+                    remaining -= read
+
+        return hasher.hexdigest()
+
+    def hash_files(self, paths: Iterable, algorithm: str = 'sha256') -> Dict[str, str]:
+        """Hash many files concurrently; unreadable files are logged and skipped"""
+        paths = [str(p) for p in paths]
+        if not paths:
+            return {}
+
+        def worker(path: str):
+            try:
+                return path, self.hash_file(path, algorithm)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not hash {path}: {e}")
+                return path, None
+
+        # Largest first so one big checkpoint does not finish last on its own
+        paths.sort(key=lambda p: self._size(p), reverse=True)
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(paths))) as executor:
+            results = dict(executor.map(worker, paths))
+
+        return {path: digest for path, digest in results.items() if digest}
+
+    @staticmethod
+    def _size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+_engine: Optional[HashEngine] = None
+_engine_lock = threading.Lock()
+
+def get_hash_engine() -> HashEngine:
+    """Get the process-wide default HashEngine"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = HashEngine()
+        return _engine
+
+def set_hash_engine(engine: HashEngine):
+    """Replace the process-wide engine, e.g. with one sized by PlatformManager"""
+    global _engine
+    with _engine_lock:
+        _engine = engine
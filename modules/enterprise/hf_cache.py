@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+HF Cache Module
+HuggingFace hub cache cleanup that evicts whole revisions, never single blobs
+"""
+
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+import logging
+
+from modules.enterprise.cleanup_plan import CleanupItem, CleanupPlan
+
+logger = logging.getLogger(__name__)
+
+REPO_PREFIXES = ('models--', 'datasets--', 'spaces--')
+
+# Files outside the hub layout that must survive any cache cleanup
+HF_KEEP_NAMES = {'token', 'stored_tokens'}
+
+# Tokenizers and text encoders the WebUI fetches on every start
+WEBUI_REQUIRED_REPOS = (
+    'openai/clip-vit-large-patch14',
+    'laion/CLIP-ViT-bigG-14-laion2B-39B-b160k',
+)
+
+@dataclass
+class HFRevision:
+    """One snapshot of a repo: the commit, the refs naming it and its blobs"""
+    commit: str
+    refs: List[str]
+    blobs: Set[str]
+    last_access: float
+
+@dataclass
+class HFRepo:
+    """One models--org--name directory"""
+    repo_id: str
+    repo_type: str
+    path: str
+    revisions: List[HFRevision]
+    blob_sizes: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return sum(self.blob_sizes.values())
+
+class HFCacheCleaner:
+    """Plans cache evictions that keep the hub layout consistent
+
+    A revision is the unit of eviction: its snapshot directory, the refs
+    pointing at it and every blob no surviving revision still links to go
+    together, so no snapshot symlink is ever left dangling. A repo whose
+    last revision goes is removed as one tree. Revisions named by a ref
+    are kept while they were used within `min_idle_days`, and always for
+    repos the WebUI needs; superseded (ref-less) revisions are always
+    candidates. Candidates are taken least recently used first.
+    """
+
+    def __init__(self, storage_manager, keep_repos=WEBUI_REQUIRED_REPOS,
+                 min_idle_days: float = 7, access_tracker=None):
+        self.storage_manager = storage_manager
+        self.keep_repos = set(keep_repos)
+        self.min_idle_days = min_idle_days
+        self.access_tracker = access_tracker or storage_manager.access_tracker
+
+    def hub_roots(self) -> List[str]:
+        """Directories holding models--* repos under the HF and transformers caches"""
+        roots = []
+        cache_paths = self.storage_manager.storage_paths['cache']
+        for name in ('huggingface', 'transformers'):
+            base = str(cache_paths[name])
+            for candidate in (os.path.join(base, 'hub'), base):
+                try:
+                    with os.scandir(candidate) as it:
+                        if any(e.name.startswith(REPO_PREFIXES) and e.is_dir(follow_symlinks=False)
+                               for e in it):
+                            roots.append(candidate)
+                except OSError:
+                    continue
+        return roots
+
+    def _last_access(self, paths) -> float:
+        return max((self.access_tracker.last_access(p) for p in paths), default=0.0)
+
+    def _read_repo(self, path: str) -> HFRepo:
+        repo_type, _, name = os.path.basename(path).partition('--')
+        repo = HFRepo(name.replace('--', '/'), repo_type.rstrip('s'), path, [])
+
+        blobs_dir = os.path.join(path, 'blobs')
+        try:
+            with os.scandir(blobs_dir) as it:
+                for entry in it:
+                    if entry.is_file(follow_symlinks=False):
+                        repo.blob_sizes[entry.name] = entry.stat(follow_symlinks=False).st_size
+        except OSError:
+            pass
+
+        refs: Dict[str, List[str]] = {}
+        refs_dir = os.path.join(path, 'refs')
+        for dirpath, _, filenames in os.walk(refs_dir):
+            for filename in filenames:
+                ref_path = os.path.join(dirpath, filename)
+                try:
+                    with open(ref_path, 'r') as f:
+                        refs.setdefault(f.read().strip(), []).append(ref_path)
+                except OSError:
+                    continue
+
+        snapshots_dir = os.path.join(path, 'snapshots')
+        try:
+            commits = [e.name for e in os.scandir(snapshots_dir) if e.is_dir(follow_symlinks=False)]
+        except OSError:
+            commits = []
+
+        for commit in commits:
+            blobs = set()
+            for dirpath, _, filenames in os.walk(os.path.join(snapshots_dir, commit)):
+                for filename in filenames:
+                    target = os.path.realpath(os.path.join(dirpath, filename))
+                    if os.path.dirname(target) == os.path.realpath(blobs_dir):
+                        blobs.add(os.path.basename(target))
+            accessed = self._last_access(os.path.join(blobs_dir, b) for b in blobs)
+            repo.revisions.append(HFRevision(commit, refs.get(commit, []), blobs, accessed))
+        return repo
+
+    def scan(self) -> List[HFRepo]:
+        """Every cached repo with its revisions and blob sizes"""
+        repos = []
+        for root in self.hub_roots():
+            with os.scandir(root) as it:
+                for entry in it:
+                    if entry.name.startswith(REPO_PREFIXES) and entry.is_dir(follow_symlinks=False):
+                        repos.append(self._read_repo(entry.path))
+        return repos
+
+    def _is_kept(self, repo: HFRepo, revision: HFRevision, cutoff: float) -> bool:
+        if not revision.refs:
+            return False
+        return repo.repo_id in self.keep_repos or revision.last_access >= cutoff
+
+    def plan(self, free_bytes: Optional[int] = None, reason: str = 'cache') -> CleanupPlan:
+        """Revisions to evict, oldest first, stopping once `free_bytes` is reached"""
+        cutoff = time.time() - self.min_idle_days * 86400
+        repos = self.scan()
+
+        candidates = sorted(
+            ((revision.last_access, repo, revision)
+             for repo in repos for revision in repo.revisions
+             if not self._is_kept(repo, revision, cutoff)),
+            key=lambda c: c[0]
+        )
+
+        live = {repo.path: list(repo.revisions) for repo in repos}
+        items: List[CleanupItem] = []
+        planned = 0
+
+        for _, repo, revision in candidates:
+            if free_bytes is not None and planned >= free_bytes:
+                break
+            live[repo.path].remove(revision)
+
+            if not live[repo.path]:
+                # Last revision: drop the repo (blobs, refs, .no_exist) in one go
+                items = [i for i in items if not i.path.startswith(repo.path + os.sep)]
+                items.append(CleanupItem(repo.path, repo.size, reason, is_tree=True,
+                                         file_count=len(repo.blob_sizes)))
+                planned = sum(i.size for i in items)
+                continue
+
+            still_used = set().union(*(r.blobs for r in live[repo.path]))
+            freed = [b for b in revision.blobs if b not in still_used]
+            items.append(CleanupItem(os.path.join(repo.path, 'snapshots', revision.commit), 0,
+                                     reason, is_tree=True, file_count=len(revision.blobs)))
+            no_exist = os.path.join(repo.path, '.no_exist', revision.commit)
+            if os.path.isdir(no_exist):
+                items.append(CleanupItem(no_exist, 0, reason, is_tree=True))
+            items.extend(CleanupItem(ref, 0, reason) for ref in revision.refs)
+            for blob in freed:
+                size = repo.blob_sizes.get(blob, 0)
+                items.append(CleanupItem(os.path.join(repo.path, 'blobs', blob), size, reason))
+                planned += size
+
+        # Interrupted downloads are never linked from a snapshot
+        day_ago = time.time() - 86400
+        for repo in repos:
+            if not live[repo.path]:
+                continue
+            for blob, size in repo.blob_sizes.items():
+                path = os.path.join(repo.path, 'blobs', blob)
+                if blob.endswith('.incomplete') and self._last_access([path]) < day_ago:
+                    items.append(CleanupItem(path, size, reason))
+
+        plan = CleanupPlan.from_items(items)
+        logger.info(f"HF cache: {len(candidates)} of {sum(len(r.revisions) for r in repos)} revisions "
+                    f"evictable, {plan.total_bytes / 1024**3:.2f} GB planned")
+        return plan
+
+    def is_managed(self, path: str, roots: List[str] = None) -> bool:
+        """True for paths this cleaner owns (hub repos and HF credentials)"""
+        if os.path.basename(path) in HF_KEEP_NAMES:
+            return True
+        roots = self.hub_roots() if roots is None else roots
+        return any(path == root or path.startswith(root + os.sep) for root in roots)
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Link Planner Module
+Declarative, idempotent symlink plans between WebUIs and unified storage
+"""
+
+import os
+import shutil
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# WebUI-relative directory -> (storage category, storage name); name None = storage/<category>
+A1111_LAYOUT: Dict[str, Tuple[str, Optional[str]]] = {
+    'models/Stable-diffusion': ('models', 'checkpoints'),
+    'models/VAE': ('models', 'vae'),
+    'models/Lora': ('models', 'lora'),
+    'models/LyCORIS': ('models', 'lycoris'),
+    'models/hypernetworks': ('models', 'hypernetworks'),
+    'models/ControlNet': ('models', 'controlnet'),
+    'models/ESRGAN': ('models', 'upscalers'),
+    'embeddings': ('models', 'embeddings'),
+    'outputs': ('outputs', None),
+    'extensions': ('extensions', None)
+}
+
+WEBUI_LAYOUTS: Dict[str, Dict[str, Tuple[str, Optional[str]]]] = {
+    'A1111': A1111_LAYOUT,
+    'Forge': A1111_LAYOUT,
+    'ReForge': A1111_LAYOUT,
+    'SD-Next': A1111_LAYOUT,
+    'SD-UX': A1111_LAYOUT,
+    'ComfyUI': {
+        'models/checkpoints': ('models', 'checkpoints'),
+        'models/vae': ('models', 'vae'),
+        'models/loras': ('models', 'lora'),
+        'models/embeddings': ('models', 'embeddings'),
+        'models/hypernetworks': ('models', 'hypernetworks'),
+        'models/controlnet': ('models', 'controlnet'),
+        'models/upscale_models': ('models', 'upscalers'),
+        'models/clip': ('models', 'clip'),
+        'models/clip_vision': ('models', 'clip_vision'),
+        'models/diffusers': ('models', 'diffusers'),
+        'output': ('outputs', None),
+        'input': ('input', None),
+        'custom_nodes': ('custom_nodes', None)
+    },
+    'Fooocus': {
+        'models/checkpoints': ('models', 'checkpoints'),
+        'models/loras': ('models', 'lora'),
+        'models/vae': ('models', 'vae'),
+        'models/embeddings': ('models', 'embeddings'),
+        'models/controlnet': ('models', 'controlnet'),
+        'models/upscale_models': ('models', 'upscalers'),
+        'outputs': ('outputs', None)
+    }
+}
+
+# Old launch_anxiety_method layout below storage/: dir -> (storage name, top-level files only)
+LEGACY_LAYOUT: Dict[str, Tuple[str, bool]] = {
+    'models': ('checkpoints', True),
+    'loras': ('lora', False),
+    'vae': ('vae', False),
+    'hypernetworks': ('hypernetworks', False),
+    'controlnet': ('controlnet', False)
+}
+
+@dataclass
+class LinkAction:
+    """One change needed to make the filesystem match the plan"""
+    kind: str                 # link, relink, migrate, conflict
+    path: Path
+    target: Path
+    files_only: bool = False
+    reason: str = ""
+
+class LinkPlanner:
+    """Computes the desired symlink graph for a WebUI and applies the diff
+
+    Planning only inspects the filesystem. Applying never deletes or copies
+    user content: real directories found where a link belongs are moved
+    into unified storage entry by entry (a rename on the same filesystem),
+    and name clashes are parked in a _migrated/ folder instead of replaced.
+    Running it again on a linked WebUI is a no-op.
+    """
+
+    def __init__(self, storage_manager):
+        self.storage_manager = storage_manager
+
+    def _storage_target(self, category: str, name: Optional[str]) -> Path:
+        if name is None:
+            return self.storage_manager.storage_root / category
+        return self.storage_manager.storage_paths[category][name]
+
+    def desired_links(self, webui_path: Path, webui_type: str) -> Dict[Path, Path]:
+        """{link path: storage target} for a WebUI type"""
+        layout = WEBUI_LAYOUTS.get(webui_type)
+        if layout is None:
+            logger.warning(f"No link layout for {webui_type}, using the A1111 layout")
+            layout = A1111_LAYOUT
+
+        return {
+            Path(webui_path) / relative: self._storage_target(category, name)
+            for relative, (category, name) in layout.items()
+        }
+
+    def plan(self, webui_path: Path, webui_type: str) -> List[LinkAction]:
+        """Diff the desired links against the filesystem"""
+        actions = []
+        for link_path, target in self.desired_links(webui_path, webui_type).items():
+            # Satisfied by any route, e.g. an older whole-"models" link
+            if os.path.realpath(link_path) == os.path.realpath(target):
+                continue
+
+            if link_path.is_symlink():
+                actions.append(LinkAction('relink', link_path, target,
+                                          reason=f"points to {os.readlink(link_path)}"))
+            elif link_path.is_dir():
+                actions.append(LinkAction('migrate', link_path, target, reason="real directory"))
+                actions.append(LinkAction('link', link_path, target))
+            elif link_path.exists():
+                actions.append(LinkAction('conflict', link_path, target, reason="file in the way"))
+            else:
+                actions.append(LinkAction('link', link_path, target))
+        return actions
+
+    def plan_legacy_migration(self) -> List[LinkAction]:
+        """Moves from the old storage/{models,loras,vae,...} layout"""
+        storage_root = self.storage_manager.storage_root
+        actions = []
+        for legacy_dir, (name, files_only) in LEGACY_LAYOUT.items():
+            source = storage_root / legacy_dir
+            target = self.storage_manager.storage_paths['models'][name]
+            if not source.is_dir() or source.is_symlink():
+                continue
+            if os.path.realpath(source) == os.path.realpath(target):
+                continue
+
+            has_content = any(
+                entry.is_file(follow_symlinks=False) or not files_only
+                for entry in os.scandir(source)
+            )
+            if has_content:
+                actions.append(LinkAction('migrate', source, target, files_only=files_only,
+                                          reason="legacy storage layout"))
+        return actions
+
+    def apply(self, actions: List[LinkAction], dry_run: bool = False) -> Dict:
+        """Apply a plan in one pass; returns counts per action kind"""
+        summary = {'link': 0, 'relink': 0, 'migrate': 0, 'moved_entries': 0,
+                   'conflict': 0, 'errors': []}
+
+        for action in actions:
+            if action.kind == 'conflict':
+                logger.warning(f"Not linking {action.path}: {action.reason}")
+                summary['conflict'] += 1
+                continue
+
+            if dry_run:
+                summary[action.kind] += 1
+                continue
+
+            try:
+                action.target.mkdir(parents=True, exist_ok=True)
+                if action.kind == 'migrate':
+                    summary['moved_entries'] += self._migrate(action)
+                elif action.kind == 'relink':
+                    self._replace_symlink(action.path, action.target)
+                elif action.kind == 'link':
+                    action.path.parent.mkdir(parents=True, exist_ok=True)
+                    if action.path.is_dir() and not action.path.is_symlink():
+                        # Emptied by the preceding migrate; removes no content
+                        action.path.rmdir()
+                    os.symlink(action.target, action.path)
+                summary[action.kind] += 1
+                logger.info(f"  {action.kind}: {action.path} -> {action.target}")
+            except OSError as e:
+                summary['errors'].append(f"{action.kind} {action.path}: {e}")
+                logger.error(f"Failed to {action.kind} {action.path}: {e}")
+
+        return summary
+
+    def link_webui(self, webui_path: Path, webui_type: str, dry_run: bool = False) -> Dict:
+        """Plan and apply links for one WebUI, including legacy migration"""
+        actions = self.plan_legacy_migration() + self.plan(webui_path, webui_type)
+        if not actions:
+            logger.info(f"{webui_type} storage links already up to date")
+            return {'link': 0, 'relink': 0, 'migrate': 0, 'moved_entries': 0,
+                    'conflict': 0, 'errors': []}
+        return self.apply(actions, dry_run=dry_run)
+
+    @staticmethod
+    def _replace_symlink(link_path: Path, target: Path):
+        """Swap a symlink's target atomically"""
+        tmp_link = link_path.with_name(f".{link_path.name}.link")
+        if tmp_link.is_symlink():
+            tmp_link.unlink()
+        os.symlink(target, tmp_link)
+        os.replace(tmp_link, link_path)
+
+    def _migrate(self, action: LinkAction) -> int:
+        """Move a directory's entries into storage without overwriting anything"""
+        moved = 0
+        for entry in list(os.scandir(action.path)):
+            if action.files_only and not entry.is_file(follow_symlinks=False):
+                continue
+
+            destination = action.target / entry.name
+            if os.path.lexists(destination):
+                clash_dir = action.target / '_migrated' / action.path.name
+                clash_dir.mkdir(parents=True, exist_ok=True)
+                destination = clash_dir / entry.name
+                if os.path.lexists(destination):
+                    logger.warning(f"Leaving {entry.path} in place, {destination} exists")
+                    continue
+
+            try:
+                os.rename(entry.path, destination)
+            except OSError:
+                # Different filesystem: shutil.move degrades to copy + remove
+                shutil.move(entry.path, str(destination))
+            moved += 1
+
+        logger.info(f"Migrated {moved} entries from {action.path} into {action.target}")
+        return moved
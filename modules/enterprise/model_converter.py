@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Model Converter Module
+Streaming fp32 -> fp16 conversion and EMA pruning for .safetensors checkpoints
+"""
+
+import os
+import json
+import mmap
+from pathlib import Path
+from typing import Dict, Optional
+import logging
+
+from modules.enterprise.model_inspector import read_safetensors_header
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Elements converted per step; bounds memory to ~64 MB per tensor chunk
+CONVERT_CHUNK_ELEMENTS = 16 * 1024 * 1024
+
+# Tensor dtypes converted to F16; everything else is copied byte for byte
+FLOAT_DTYPES = {'F64': '<f8', 'F32': '<f4', 'BF16': None}
+
+DTYPE_SIZES = {
+    'F64': 8, 'F32': 4, 'F16': 2, 'BF16': 2, 'F8_E4M3': 1, 'F8_E5M2': 1,
+    'I64': 8, 'I32': 4, 'I16': 2, 'I8': 1, 'U8': 1, 'BOOL': 1
+}
+
+EMA_PREFIXES = ('model_ema.',)
+
+FP16_MAX = 65504.0
+
+class ModelConverter:
+    """Shrinks checkpoints to pruned fp16 without loading them into memory
+
+    The input is mmapped and each tensor is converted in bounded chunks
+    straight into the output file, so peak memory stays far below the model
+    size. The result is written to a temp file and published atomically.
+    """
+
+    def __init__(self, chunk_elements: int = CONVERT_CHUNK_ELEMENTS):
+        if np is None:
+            raise RuntimeError("numpy is required for model conversion (pip install numpy)")
+        self.chunk_elements = chunk_elements
+
+    @staticmethod
+    def needs_conversion(header: Dict, prune_ema: bool = True) -> bool:
+        """True if a header has float tensors wider than fp16, or EMA weights"""
+        for name, tensor in header.items():
+            if name == '__metadata__':
+                continue
+            if tensor.get('dtype') in FLOAT_DTYPES:
+                return True
+            if prune_ema and name.startswith(EMA_PREFIXES):
+                return True
+        return False
+
+    def convert(self, src, dst=None, prune_ema: bool = True) -> Dict:
+        """Write a pruned fp16 copy of src; dst defaults to replacing src"""
+        src = Path(src)
+        dst = Path(dst) if dst else src
+        header = read_safetensors_header(src)
+        metadata = header.pop('__metadata__', None)
+
+        # Plan the output layout
+        names = sorted(
+            (n for n in header if not (prune_ema and n.startswith(EMA_PREFIXES))),
+            key=lambda n: header[n]['data_offsets'][0]
+        )
+        out_header = {}
+        offset = 0
+        for name in names:
+            tensor = header[name]
+            dtype = 'F16' if tensor['dtype'] in FLOAT_DTYPES else tensor['dtype']
+            count = 1
+            for dim in tensor['shape']:
+                count *= dim
+            nbytes = count * DTYPE_SIZES[dtype]
+            out_header[name] = {'dtype': dtype, 'shape': tensor['shape'],
+                                'data_offsets': [offset, offset + nbytes]}
+            offset += nbytes
+
+        if metadata is not None:
+            out_header['__metadata__'] = metadata
+
+        header_bytes = json.dumps(out_header, separators=(',', ':')).encode('utf-8')
+        # Pad so tensor data starts 8-byte aligned, as the reference writer does
+        header_bytes += b' ' * (-len(header_bytes) % 8)
+
+        src_size = src.stat().st_size
+        tmp_path = dst.with_name(f".{dst.name}.part")
+
+        try:
+            with open(src, 'rb') as f_in, open(tmp_path, 'wb') as f_out:
+                data_start = 8 + int.from_bytes(f_in.read(8), 'little')
+                f_out.write(len(header_bytes).to_bytes(8, 'little'))
+                f_out.write(header_bytes)
+
+                with mmap.mmap(f_in.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    for name in names:
+                        begin, end = header[name]['data_offsets']
+                        self._write_tensor(mapped, data_start + begin, data_start + end,
+                                           header[name]['dtype'], f_out)
+            os.replace(tmp_path, dst)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        dst_size = dst.stat().st_size
+        result = {
+            'source': str(src),
+            'destination': str(dst),
+            'tensors': len(names),
+            'pruned_tensors': len(header) - len(names),
+            'original_bytes': src_size,
+            'converted_bytes': dst_size,
+            'saved_bytes': src_size - dst_size
+        }
+        logger.info(f"✅ Converted {src.name}: {src_size / 1024**3:.2f} GB -> "
+                    f"{dst_size / 1024**3:.2f} GB")
+        return result
+
+    def _write_tensor(self, mapped, start: int, end: int, dtype: str, f_out):
+        """Stream one tensor from the mapping into f_out, converting floats"""
+        if dtype not in FLOAT_DTYPES:
+            for pos in range(start, end, self.chunk_elements):
+                f_out.write(mapped[pos:min(pos + self.chunk_elements, end)])
+            return
+
+        item_size = DTYPE_SIZES[dtype]
+        count = (end - start) // item_size
+        for first in range(0, count, self.chunk_elements):
+            n = min(self.chunk_elements, count - first)
+            offset = start + first * item_size
+
+            if dtype == 'BF16':
+                # bf16 is the top half of an fp32
+                raw = np.frombuffer(mapped, dtype='<u2', count=n, offset=offset)
+                values = (raw.astype('<u4') << 16).view('<f4')
+            else:
+                values = np.frombuffer(mapped, dtype=FLOAT_DTYPES[dtype], count=n, offset=offset)
+
+            # Out-of-range values would become inf in fp16
+            f_out.write(np.clip(values, -FP16_MAX, FP16_MAX).astype('<f2').tobytes())
+
+def shrink_checkpoint(file_path, prune_ema: bool = True) -> Optional[Dict]:
+    """Convert a checkpoint in place if it is fp32/bf16 or carries EMA weights"""
+    file_path = Path(file_path)
+    if file_path.suffix.lower() != '.safetensors':
+        return None
+
+    header = read_safetensors_header(file_path)
+    if not ModelConverter.needs_conversion(header, prune_ema):
+        return None
+
+    return ModelConverter().convert(file_path, prune_ema=prune_ema)
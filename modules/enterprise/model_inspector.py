@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Model Inspector Module
+Classifies .safetensors models from their header alone, cached in the storage index
+"""
+
+import os
+import json
+import mmap
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Guard against corrupt files claiming a gigantic header
+MAX_HEADER_SIZE = 100 * 1024 * 1024
+
+DTYPE_NAMES = {
+    'F64': 'fp64', 'F32': 'fp32', 'F16': 'fp16', 'BF16': 'bf16',
+    'F8_E4M3': 'fp8', 'F8_E5M2': 'fp8', 'I64': 'int64', 'I32': 'int32',
+    'I16': 'int16', 'I8': 'int8', 'U8': 'uint8', 'BOOL': 'bool'
+}
+
+# Cross-attention context dim -> base model, for LoRAs without metadata
+CONTEXT_DIMS = {768: 'SD1.5', 1024: 'SD2', 2048: 'SDXL'}
+
+def read_safetensors_header(file_path) -> Dict:
+    """Parse the JSON header via mmap; tensor data is never paged in"""
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < 8:
+            raise ValueError(f"Not a safetensors file: {file_path}")
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            header_size = int.from_bytes(mapped[:8], 'little')
+            if header_size > min(MAX_HEADER_SIZE, size - 8):
+                raise ValueError(f"Invalid safetensors header length in {file_path}")
+            return json.loads(mapped[8:8 + header_size])
+
+@dataclass
+class ModelInfo:
+    """What a model file actually contains"""
+    architecture: str
+    base_model: Optional[str] = None
+    model_type: str = 'checkpoint'
+    dtype: Optional[str] = None
+    parameter_count: int = 0
+    tensor_count: int = 0
+    inpainting: bool = False
+    has_ema: bool = False
+    pruned: bool = True
+    metadata: Dict = field(default_factory=dict)
+
+class ModelInspector:
+    """Header-only model classification over the storage index"""
+
+    METADATA_KEY = 'model_info'
+
+    # Training/model-spec metadata worth keeping in the catalog
+    KEPT_METADATA = (
+        'modelspec.architecture', 'modelspec.title', 'ss_base_model_version',
+        'ss_sd_model_name', 'ss_network_module', 'ss_network_dim', 'ss_network_alpha'
+    )
+
+    def __init__(self, storage_manager=None, max_workers: int = 8):
+        self.storage_manager = storage_manager
+        self.max_workers = max_workers
+
+    def inspect(self, file_path) -> ModelInfo:
+        """Classify one .safetensors file"""
+        header = read_safetensors_header(file_path)
+        raw_metadata = header.pop('__metadata__', None) or {}
+        metadata = {k: v for k, v in raw_metadata.items() if k in self.KEPT_METADATA}
+
+        shapes: Dict[str, List[int]] = {}
+        params_by_dtype: Dict[str, int] = {}
+        for name, tensor in header.items():
+            shape = tensor.get('shape', [])
+            shapes[name] = shape
+            count = 1
+            for dim in shape:
+                count *= dim
+            dtype = DTYPE_NAMES.get(tensor.get('dtype'), tensor.get('dtype'))
+            params_by_dtype[dtype] = params_by_dtype.get(dtype, 0) + count
+
+        info = self._classify(shapes, raw_metadata)
+        info.tensor_count = len(shapes)
+        info.parameter_count = sum(params_by_dtype.values())
+        info.dtype = max(params_by_dtype, key=params_by_dtype.get) if params_by_dtype else None
+        info.metadata = metadata
+
+        name = Path(file_path).name.lower()
+        title = str(raw_metadata.get('modelspec.title', '')).lower()
+        if info.base_model == 'SDXL' and ('pony' in name or 'pony' in title):
+            info.base_model = 'Pony'
+
+        return info
+
+    def _classify(self, shapes: Dict[str, List[int]], metadata: Dict) -> ModelInfo:
+        keys = shapes.keys()
+
+        def has_prefix(*prefixes) -> bool:
+            return any(k.startswith(prefixes) for k in keys)
+
+        def has_part(*parts) -> bool:
+            return any(part in k for k in keys for part in parts)
+
+        # LoRA / LyCORIS
+        if has_part('lora_down', 'lora_up', 'lora_A', 'hada_w1', 'lokr_w1'):
+            module = 'LyCORIS' if has_part('hada_w1', 'lokr_w1') else 'LoRA'
+            return ModelInfo(module, self._lora_base(shapes, metadata), model_type='lora')
+
+        # Textual inversion embeddings
+        if has_prefix('emb_params', 'string_to_param', 'clip_l', 'clip_g') and len(shapes) <= 4:
+            base = 'SDXL' if 'clip_g' in keys else None
+            if base is None:
+                dims = [shape[-1] for shape in shapes.values() if shape]
+                base = CONTEXT_DIMS.get(dims[0]) if dims else None
+            return ModelInfo('Embedding', base, model_type='embedding')
+
+        # ControlNet
+        if has_prefix('control_model.') or has_part('input_hint_block', 'controlnet_cond_embedding'):
+            return ModelInfo('ControlNet', self._context_base(shapes), model_type='controlnet')
+
+        # Standalone VAE
+        if has_prefix('encoder.', 'decoder.') and 'quant_conv.weight' in keys and not has_prefix('model.'):
+            return ModelInfo('VAE', model_type='vae')
+
+        # Full checkpoints
+        if has_prefix('double_blocks.', 'model.diffusion_model.double_blocks.'):
+            architecture = 'Flux'
+        elif has_prefix('model.diffusion_model.joint_blocks.'):
+            architecture = 'SD3'
+        elif has_prefix('conditioner.embedders.1.'):
+            architecture = 'SDXL'
+        elif has_prefix('conditioner.embedders.0.model.'):
+            architecture = 'SDXL-Refiner'
+        elif has_prefix('cond_stage_model.model.'):
+            architecture = 'SD2'
+        elif has_prefix('cond_stage_model.transformer.', 'model.diffusion_model.'):
+            architecture = 'SD1.5'
+        else:
+            return ModelInfo('Unknown', model_type='unknown')
+
+        info = ModelInfo(architecture, architecture)
+        first_conv = shapes.get('model.diffusion_model.input_blocks.0.0.weight')
+        info.inpainting = bool(first_conv and len(first_conv) > 1 and first_conv[1] == 9)
+        info.has_ema = has_prefix('model_ema.')
+        info.pruned = not info.has_ema
+        return info
+
+    @staticmethod
+    def _context_base(shapes: Dict[str, List[int]]) -> Optional[str]:
+        """Base model from the cross-attention key projection input width"""
+        for name, shape in shapes.items():
+            if 'attn2.to_k' in name and len(shape) == 2:
+                return CONTEXT_DIMS.get(shape[1])
+        return None
+
+    def _lora_base(self, shapes: Dict[str, List[int]], metadata: Dict) -> Optional[str]:
+        version = str(metadata.get('ss_base_model_version', '')).lower()
+        architecture = str(metadata.get('modelspec.architecture', '')).lower()
+        if 'xl' in version or 'xl' in architecture:
+            return 'SDXL'
+        if version.startswith('sd_v2') or 'v2' in architecture:
+            return 'SD2'
+        if version.startswith('sd_v1') or 'v1' in architecture:
+            return 'SD1.5'
+
+        if any(k.startswith(('lora_te1_', 'lora_te2_')) for k in shapes):
+            return 'SDXL'
+
+        # lora_down of the cross-attention key: [rank, context_dim]
+        for name, shape in shapes.items():
+            if 'attn2_to_k' in name and 'lora_down' in name and len(shape) >= 2:
+                return CONTEXT_DIMS.get(shape[1])
+        return None
+
+    # ------------------------------------------------------------------
+    # Catalog over the storage index
+    # ------------------------------------------------------------------
+
+    def catalog(self, rescan: bool = False) -> List[Tuple[str, Dict]]:
+        """(path, model info) for every indexed .safetensors model
+
+        Results live in each index entry's metadata, which the index drops
+        as soon as the file's size or mtime changes, so only new or changed
+        files are ever read.
+        """
+        index = self.storage_manager.get_index(rescan=rescan)
+        models = [e for e in index.entries('models') if e.path.lower().endswith('.safetensors')]
+        pending = [e for e in models if self.METADATA_KEY not in e.metadata]
+
+        def worker(entry):
+            try:
+                return entry, asdict(self.inspect(entry.path))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not inspect {entry.path}: {e}")
+                return entry, None
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as executor:
+                for entry, info in executor.map(worker, pending):
+                    if info:
+                        index.set_metadata(entry.path, self.METADATA_KEY, info)
+            index.save()
+            logger.info(f"Inspected {len(pending)} models ({len(models) - len(pending)} cached)")
+
+        return [(e.path, e.metadata[self.METADATA_KEY]) for e in models if self.METADATA_KEY in e.metadata]
+
+    def filter(self, base_model: str = None, model_type: str = None,
+               inpainting: bool = None) -> List[Tuple[str, Dict]]:
+        """Catalog entries matching a base model / type / inpainting flag"""
+        results = []
+        for path, info in self.catalog():
+            if base_model and info.get('base_model') != base_model:
+                continue
+            if model_type and info.get('model_type') != model_type:
+                continue
+            if inpainting is not None and info.get('inpainting') != inpainting:
+                continue
+            results.append((path, info))
+        return results
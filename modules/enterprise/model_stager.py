@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Model Stager Module
+Background parallel staging of selected models from read-only sources to local disk
+"""
+
+import os
+import time
+import errno
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Iterable, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024 * 1024
+
+# Errors meaning "copy_file_range can't do this pair of files", not "I/O failed"
+_COPY_RANGE_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EOPNOTSUPP, errno.EINVAL, errno.EBADF}
+
+@dataclass
+class StageItem:
+    """One file to copy from a source root into local storage"""
+    asset_type: str
+    source: Path
+    destination: Path
+    size: int
+    status: str = "pending"
+    error: Optional[str] = None
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+class ModelStager:
+    """Copies a session's selected models from datasets/Drive to local storage
+
+    Files are split into chunks copied concurrently with os.copy_file_range
+    (falling back to pread/pwrite when the source filesystem does not support
+    it), written to a hidden temp file and published with os.replace. Staging
+    runs on a background thread so it overlaps WebUI cloning and boot.
+    """
+
+    # Session selection keys and the asset types they stage into
+    SELECTION_KEYS = {
+        'selected_models': 'checkpoint',
+        'selected_loras': 'lora'
+    }
+
+    def __init__(self, storage_manager, source_roots: Iterable[Path] = None,
+                 max_workers: int = 8, chunk_size: int = CHUNK_SIZE):
+        self.storage_manager = storage_manager
+        self.source_roots = [Path(p) for p in (source_roots or self.default_source_roots())]
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.items: List[StageItem] = []
+        self._planned = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def default_source_roots(platform_manager=None) -> List[Path]:
+        """Read-only roots that commonly hold users' models"""
+        configured = os.environ.get('SD_DARKMASTER_MODEL_SOURCES')
+        if configured:
+            return [Path(p) for p in configured.split(os.pathsep) if p]
+
+        roots = [Path(p) for p in ('/kaggle/input', '/content/drive/MyDrive') if os.path.isdir(p)]
+        if platform_manager is not None:
+            persistent = platform_manager.get_persistent_storage()
+            if persistent and persistent[0] not in roots:
+                roots.append(persistent[0])
+        return roots
+
+    @staticmethod
+    def resolve_selection(session_config: Dict) -> Dict[str, List[str]]:
+        """Map widget selection ids (e.g. "sdxl_<name>") to model filenames"""
+        try:
+            from scripts._models_data import model_list as sd15_models, lora_list as sd15_loras
+            from scripts._xl_models_data import model_list as sdxl_models, lora_list as sdxl_loras
+        except ImportError:
+            sd15_models = sd15_loras = sdxl_models = sdxl_loras = {}
+
+        catalogs = [
+            ('sd15_lora_', sd15_loras), ('sdxl_lora_', sdxl_loras),
+            ('sd15_', sd15_models), ('sdxl_', sdxl_models)
+        ]
+
+        wanted: Dict[str, List[str]] = {}
+        for key, asset_type in ModelStager.SELECTION_KEYS.items():
+            for selection_id in session_config.get(key) or []:
+                filenames = [selection_id]
+                for prefix, catalog in catalogs:
+                    if selection_id.startswith(prefix) and selection_id[len(prefix):] in catalog:
+                        info = catalog[selection_id[len(prefix):]]
+                        entries = info if isinstance(info, list) else [info]
+                        filenames = [e['name'] for e in entries if e.get('name')]
+                        break
+                wanted.setdefault(asset_type, []).extend(filenames)
+        return wanted
+
+    def find_sources(self, filenames: Iterable[str]) -> Dict[str, Path]:
+        """Locate wanted filenames with a single walk over the source roots"""
+        remaining = set(filenames)
+        found: Dict[str, Path] = {}
+
+        for root in self.source_roots:
+            if not remaining:
+                break
+            for dirpath, _, names in os.walk(root):
+                for name in remaining.intersection(names):
+                    found[name] = Path(dirpath) / name
+                remaining.difference_update(found)
+                if not remaining:
+                    break
+
+        return found
+
+    def plan(self, session_config: Dict) -> List[StageItem]:
+        """Work out which selected files exist on a source and not locally"""
+        wanted = self.resolve_selection(session_config)
+        sources = self.find_sources(name for names in wanted.values() for name in names)
+        tiers = getattr(self.storage_manager, 'tiers', None)
+
+        items = []
+        for asset_type, filenames in wanted.items():
+            dest_dir = self.storage_manager.get_download_destination(asset_type)
+            for filename in filenames:
+                source = sources.get(filename)
+                if source is None:
+                    continue
+
+                destination = dest_dir / filename
+                if destination.is_symlink() and tiers:
+                    # A cold-tier placeholder; the tier copies it in itself
+                    tiers.touch(destination)
+                    continue
+                size = source.stat().st_size
+                if destination.exists() and destination.stat().st_size == size:
+                    continue
+
+                items.append(StageItem(asset_type, source, destination, size))
+
+        # Largest first so the long copies start immediately
+        items.sort(key=lambda item: item.size, reverse=True)
+        return items
+
+    def start(self, session_config: Dict) -> 'ModelStager':
+        """Plan and stage in the background; returns immediately"""
+        self._thread = threading.Thread(target=self._run, args=(session_config,),
+                                        name='model-stager', daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self, asset_types: Tuple[str, ...] = None, timeout: float = None) -> bool:
+        """Block until staged files (optionally only some asset types) are in place
+
+        `timeout` bounds the whole wait, not each file.
+        """
+        if self._thread is None:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        def remaining() -> Optional[float]:
+            return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+        if not self._planned.wait(remaining()):
+            return False
+        for item in self.items:
+            if asset_types is None or item.asset_type in asset_types:
+                if not item.done.wait(remaining()):
+                    return False
+        return True
+
+    def get_status(self) -> Dict:
+        counts: Dict[str, int] = {}
+        for item in self.items:
+            counts[item.status] = counts.get(item.status, 0) + 1
+        return {
+            'total': len(self.items),
+            'total_bytes': sum(item.size for item in self.items),
+            **counts
+        }
+
+    # ------------------------------------------------------------------
+    # Copying
+    # ------------------------------------------------------------------
+
+    def _run(self, session_config: Dict):
+        try:
+            self.items = self.plan(session_config)
+        except Exception as e:
+            logger.error(f"Model staging failed: {e}")
+        finally:
+            self._planned.set()
+
+        if not self.items:
+            logger.info("Model staging: nothing to copy")
+            return
+
+        total_gb = sum(item.size for item in self.items) / (1024**3)
+        logger.info(f"Staging {len(self.items)} models ({total_gb:.2f} GB) to local storage...")
+        self._stage_all()
+
+    def _stage_all(self):
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='stage-copy') as pool:
+            # Submit every chunk of every file up front so all workers stay busy
+            jobs = []
+            for item in self.items:
+                try:
+                    jobs.append((item, *self._submit(pool, item)))
+                except OSError as e:
+                    self._fail(item, e)
+
+            for item, src_fd, dst_fd, tmp_path, futures in jobs:
+                wait_futures(futures)
+                try:
+                    for future in futures:
+                        future.result()
+                    os.close(src_fd)
+                    src_fd = None
+                    os.close(dst_fd)
+                    dst_fd = None
+                    os.replace(tmp_path, item.destination)
+                    self._verify(item)
+                    item.status = "completed"
+                    logger.info(f"✅ Staged {item.destination.name}")
+                except Exception as e:
+                    for fd in (src_fd, dst_fd):
+                        if fd is not None:
+                            os.close(fd)
+                    tmp_path.unlink(missing_ok=True)
+                    self._fail(item, e)
+                finally:
+                    item.done.set()
+
+    def _submit(self, pool, item: StageItem):
+        item.status = "copying"
+        item.destination.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = item.destination.with_name(f".{item.destination.name}.part")
+
+        src_fd = os.open(item.source, os.O_RDONLY)
+        try:
+            dst_fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        except OSError:
+            os.close(src_fd)
+            raise
+        os.ftruncate(dst_fd, item.size)
+
+        futures = [
+            pool.submit(self._copy_chunk, src_fd, dst_fd, offset, min(self.chunk_size, item.size - offset))
+            for offset in range(0, item.size, self.chunk_size)
+        ]
+        return src_fd, dst_fd, tmp_path, futures
+
+    @staticmethod
+    def _copy_chunk(src_fd: int, dst_fd: int, offset: int, length: int):
+        """Copy [offset, offset + length) in-kernel, or via pread/pwrite"""
+        position = offset
+        end = offset + length
+
+        if hasattr(os, 'copy_file_range'):
+            try:
+                while position < end:
+                    copied = os.copy_file_range(src_fd, dst_fd, end - position, position, position)
+                    if copied == 0:
+                        raise OSError(errno.EIO, "Unexpected end of source file")
+                    position += copied
+                return
+            except OSError as e:
+                if e.errno not in _COPY_RANGE_UNSUPPORTED:
+                    raise
+
+        while position < end:
+            data = os.pread(src_fd, min(8 * 1024 * 1024, end - position), position)
+            if not data:
+                raise OSError(errno.EIO, "Unexpected end of source file")
+            written = os.pwrite(dst_fd, data, position)
+            position += written
+
+    def _verify(self, item: StageItem):
+        """Check the copy against the hash cache and record its digest"""
+        if item.destination.stat().st_size != item.size:
+            raise OSError(errno.EIO, f"Size mismatch after staging {item.destination.name}")
+
+        # Only rehash when there is a known digest to check against
+        hash_cache = self.storage_manager.hash_cache
+        expected = hash_cache.lookup(item.source)
+        if expected and hash_cache.get_or_compute(item.destination) != expected:
+            item.destination.unlink(missing_ok=True)
+            raise ValueError(f"Hash mismatch after staging {item.destination.name}")
+
+    def _fail(self, item: StageItem, error: Exception):
+        item.status = "failed"
+        item.error = str(error)
+        item.done.set()
+        logger.error(f"❌ Failed to stage {item.source}: {error}")
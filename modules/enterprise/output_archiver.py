@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Output Archiver Module
+Moves old generations into deduplicated zip bundles with a lookup index
+"""
+
+import os
+import json
+import time
+import zipfile
+import fnmatch
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+import logging
+
+from modules.enterprise.hashing import get_hash_engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUNDLE_SIZE = 512 * 1024 * 1024
+
+# Already-compressed formats are stored as-is; deflating them again only burns CPU
+STORED_SUFFIXES = {'.jpg', '.jpeg', '.webp', '.mp4', '.webm', '.gif'}
+
+@dataclass
+class ArchivedFile:
+    """Where one original output now lives"""
+    digest: str
+    size: int
+    mtime: float
+
+@dataclass
+class Blob:
+    """One unique file content inside a bundle"""
+    bundle: str
+    member: str
+    size: int
+
+def _write_bundle(bundle_path: str, members: List[Tuple[str, str]], compresslevel: int) -> str:
+    """Write (source path, member name) pairs to a zip; runs in a worker process"""
+    tmp_path = os.path.join(os.path.dirname(bundle_path), f".{os.path.basename(bundle_path)}.part")
+    try:
+        with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED,
+                             compresslevel=compresslevel, strict_timestamps=False) as bundle:
+            for source, member in members:
+                stored = os.path.splitext(source)[1].lower() in STORED_SUFFIXES
+                bundle.write(source, member,
+                             compress_type=zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED)
+        os.replace(tmp_path, bundle_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return bundle_path
+
+class OutputArchiver:
+    """Archives generated images without losing any of them
+
+    Files are hashed in parallel and identical images are stored once.
+    Unique contents are packed into bundles of roughly bundle_size bytes,
+    one bundle per worker process. Zip members are individually addressable,
+    so the index (original path -> digest -> bundle member) lets a single
+    image be extracted without unpacking its bundle. Originals are removed
+    only after their bundle is published and the index saved.
+    """
+
+    INDEX_VERSION = 1
+
+    def __init__(self, storage_manager, archive_dir: Path = None,
+                 bundle_size: int = DEFAULT_BUNDLE_SIZE, max_workers: int = None,
+                 compresslevel: int = 6):
+        self.storage_manager = storage_manager
+        self.outputs_root = storage_manager.storage_root / 'outputs'
+        self.archive_dir = Path(archive_dir or storage_manager.storage_root / 'archives' / 'outputs')
+        self.index_file = self.archive_dir / 'archive_index.json'
+        self.bundle_size = bundle_size
+        self.max_workers = max_workers or os.cpu_count() or 2
+        self.compresslevel = compresslevel
+
+        self.files: Dict[str, ArchivedFile] = {}
+        self.blobs: Dict[str, Blob] = {}
+        self.load()
+
+    def _rel(self, path) -> str:
+        return os.path.relpath(str(path), str(self.outputs_root))
+
+    def find_candidates(self, older_than_days: float = 30) -> List[Tuple[str, int, float]]:
+        """(path, size, mtime) of outputs last modified before the cutoff"""
+        cutoff = time.time() - older_than_days * 86400
+        index = self.storage_manager.get_index()
+        return [
+            (e.path, e.size, e.mtime) for e in index.entries('outputs')
+            if e.mtime < cutoff and not os.path.basename(e.path).startswith('.')
+        ]
+
+    def _plan_bundles(self, unique: Dict[str, Tuple[str, int]]) -> List[List[Tuple[str, str, str, int]]]:
+        """Group (digest, path, member, size) into bundles of ~bundle_size"""
+        bundles, current, current_size = [], [], 0
+        for digest, (path, size) in sorted(unique.items(), key=lambda item: item[1][0]):
+            if current and current_size + size > self.bundle_size:
+                bundles.append(current)
+                current, current_size = [], 0
+            current.append((digest, path, self._rel(path), size))
+            current_size += size
+        if current:
+            bundles.append(current)
+        return bundles
+
+    def archive(self, older_than_days: float = 30, dry_run: bool = False) -> Dict:
+        """Bundle outputs older than the cutoff and remove the originals"""
+        return self.archive_files(self.find_candidates(older_than_days), dry_run=dry_run)
+
+    def archive_files(self, candidates: List[Tuple[str, int, float]], dry_run: bool = False) -> Dict:
+        """Bundle the given (path, size, mtime) outputs and remove the originals"""
+        result = {'archived_files': 0, 'deduplicated_files': 0, 'bundles': 0,
+                  'freed_bytes': 0, 'errors': []}
+        if not candidates:
+            return result
+
+        digests = get_hash_engine().hash_files([path for path, _, _ in candidates])
+
+        # First path per new content goes into a bundle; the rest are references
+        unique: Dict[str, Tuple[str, int]] = {}
+        for path, size, _ in candidates:
+            digest = digests.get(path)
+            if digest and digest not in self.blobs and digest not in unique:
+                unique[digest] = (path, size)
+
+        bundles = self._plan_bundles(unique)
+        archived = [(p, s, m) for p, s, m in candidates if p in digests]
+        result['deduplicated_files'] = len(archived) - len(unique)
+
+        if dry_run:
+            result['archived_files'] = len(archived)
+            result['bundles'] = len(bundles)
+            result['freed_bytes'] = sum(s for _, s, _ in archived)
+            return result
+
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        failed_digests = set()
+
+        if bundles:
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(bundles))) as executor:
+                futures = []
+                for number, bundle in enumerate(bundles):
+                    bundle_path = self.archive_dir / f"outputs-{stamp}-{number:03d}.zip"
+                    members = [(path, member) for _, path, member, _ in bundle]
+                    futures.append((bundle_path, bundle, executor.submit(
+                        _write_bundle, str(bundle_path), members, self.compresslevel)))
+
+                for bundle_path, bundle, future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        result['errors'].append(f"{bundle_path.name}: {e}")
+                        logger.error(f"Failed to write {bundle_path.name}: {e}")
+                        failed_digests.update(digest for digest, _, _, _ in bundle)
+                        continue
+                    for digest, _, member, size in bundle:
+                        self.blobs[digest] = Blob(bundle_path.name, member, size)
+                    result['bundles'] += 1
+
+        # Record everything first, so a crash can never lose an unindexed original
+        removable = []
+        for path, size, mtime in archived:
+            digest = digests[path]
+            if digest in failed_digests or digest not in self.blobs:
+                continue
+            self.files[self._rel(path)] = ArchivedFile(digest, size, mtime)
+            removable.append((path, size))
+        self.save()
+
+        index = self.storage_manager.get_index()
+        for path, size in removable:
+            try:
+                os.unlink(path)
+                index.remove_path(path)
+                result['archived_files'] += 1
+                result['freed_bytes'] += size
+            except OSError as e:
+                result['errors'].append(f"{path}: {e}")
+        index.save()
+
+        logger.info(f"📦 Archived {result['archived_files']} outputs into {result['bundles']} bundles "
+                    f"({result['deduplicated_files']} duplicates), freed "
+                    f"{result['freed_bytes'] / 1024**3:.2f} GB")
+        return result
+
+    def find(self, pattern: str = '*') -> List[str]:
+        """Archived output paths (relative to outputs/) matching a glob"""
+        return sorted(p for p in self.files if fnmatch.fnmatch(p, pattern))
+
+    def extract(self, relative_path: str, destination: Path = None) -> Path:
+        """Restore one archived output, by default to its original location"""
+        archived = self.files.get(relative_path)
+        if archived is None:
+            raise KeyError(f"Not archived: {relative_path}")
+        blob = self.blobs[archived.digest]
+
+        destination = Path(destination or self.outputs_root / relative_path)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = destination.with_name(f".{destination.name}.part")
+
+        with zipfile.ZipFile(self.archive_dir / blob.bundle) as bundle:
+            with bundle.open(blob.member) as src, open(tmp_path, 'wb') as dst:
+                while True:
+                    chunk = src.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+        os.utime(tmp_path, (archived.mtime, archived.mtime))
+        os.replace(tmp_path, destination)
+        return destination
+
+    def get_status(self) -> Dict:
+        bundle_bytes = 0
+        bundle_count = 0
+        if self.archive_dir.exists():
+            for bundle in self.archive_dir.glob('*.zip'):
+                bundle_bytes += bundle.stat().st_size
+                bundle_count += 1
+        return {
+            'archived_files': len(self.files),
+            'unique_files': len(self.blobs),
+            'original_gb': sum(f.size for f in self.files.values()) / 1024**3,
+            'bundle_gb': bundle_bytes / 1024**3,
+            'bundles': bundle_count
+        }
+
+    def load(self):
+        if not self.index_file.exists():
+            return
+        try:
+            with open(self.index_file, 'r') as f:
+                data = json.load(f)
+            if data.get('version') != self.INDEX_VERSION:
+                return
+            self.files = {p: ArchivedFile(**f) for p, f in data.get('files', {}).items()}
+            self.blobs = {d: Blob(**b) for d, b in data.get('blobs', {}).items()}
+        except Exception as e:
+            logger.warning(f"Could not load archive index: {e}")
+
+    def save(self):
+        """Persist the lookup index atomically"""
+        data = {
+            'version': self.INDEX_VERSION,
+            'files': {p: vars(f) for p, f in self.files.items()},
+            'blobs': {d: vars(b) for d, b in self.blobs.items()}
+        }
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.index_file.with_suffix('.json.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_file, self.index_file)
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Retention Policy Module
+Declarative retention rules evaluated column-wise over the storage index
+"""
+
+import os
+import json
+import time
+import fnmatch
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+import logging
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+ACTIONS = ('delete', 'archive', 'demote', 'compress')
+
+DEFAULT_RULES_FILE = Path(__file__).resolve().parent.parent.parent / 'configs' / 'retention_rules.json'
+
+@dataclass
+class RetentionRule:
+    """A match clause plus the action taken on matching files
+
+    Supported conditions: category, subcategory (str or list), patterns
+    (file name globs), min_age_days / max_age_days (mtime), min_size_mb /
+    max_size_mb, min_idle_days (last access), tags (model catalog fields
+    -> allowed values) and duplicate (true = redundant copies only).
+    """
+    name: str
+    action: str
+    match: Dict = field(default_factory=dict)
+    enabled: bool = True
+
+    def __post_init__(self):
+        if self.action not in ACTIONS:
+            raise ValueError(f"Rule {self.name}: unknown action {self.action}")
+
+@dataclass
+class RetentionMatch:
+    """One file a rule selected"""
+    path: str
+    size: int
+    category: Optional[str]
+    rule: str
+    action: str
+
+class RetentionPolicy:
+    """Ordered rules (first match wins) and extra protected names"""
+
+    def __init__(self, rules: List[RetentionRule], protected_names: List[str] = None):
+        self.rules = rules
+        self.protected_names = set(protected_names or [])
+
+    @classmethod
+    def load(cls, config_file: Path = None) -> 'RetentionPolicy':
+        """Rules from configs/retention_rules.json (no rules if missing)"""
+        config_file = Path(config_file or DEFAULT_RULES_FILE)
+        if not config_file.exists():
+            return cls([])
+        with open(config_file, 'r') as f:
+            data = json.load(f)
+        rules = [RetentionRule(**rule) for rule in data.get('rules', [])]
+        return cls(rules, data.get('protected_names', []))
+
+class _Columns:
+    """Index entries as columns; expensive columns are built on first use"""
+
+    def __init__(self, entries, access_tracker=None, deduplicator=None):
+        self.entries = entries
+        self.access_tracker = access_tracker
+        self.deduplicator = deduplicator
+        self._cache: Dict[str, object] = {}
+
+        self.paths = [e.path for e in entries]
+        self.names = [os.path.basename(e.path) for e in entries]
+        self.categories = [e.category for e in entries]
+        self.subcategories = [e.subcategory for e in entries]
+        self.sizes = self._array([e.size for e in entries], 'int64')
+        self.mtimes = self._array([e.mtime for e in entries], 'float64')
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @staticmethod
+    def _array(values, dtype):
+        return np.array(values, dtype=dtype) if np is not None else values
+
+    def full(self, value: bool):
+        if np is not None:
+            return np.full(len(self), value, dtype=bool)
+        return [value] * len(self)
+
+    def from_bools(self, values):
+        return np.fromiter(values, dtype=bool, count=len(self)) if np is not None else list(values)
+
+    def cached(self, key: str, build: Callable):
+        if key not in self._cache:
+            self._cache[key] = build()
+        return self._cache[key]
+
+    def last_access(self):
+        def build():
+            return self._array(
+                [self.access_tracker.last_access(path) for path in self.paths], 'float64')
+        return self.cached('last_access', build)
+
+    def duplicates(self):
+        """True for every copy except the one deduplication would keep"""
+        def build():
+            buckets: Dict[int, list] = {}
+            for entry in self.entries:
+                buckets.setdefault(entry.size, []).append((entry.path, entry.mtime))
+            groups = self.deduplicator.find_duplicates_in_buckets(
+                {size: files for size, files in buckets.items() if len(files) > 1 and size > 0})
+            redundant = {path for group in groups for path in group.duplicates}
+            return self.from_bools(path in redundant for path in self.paths)
+        return self.cached('duplicates', build)
+
+def _and(a, b):
+    if np is not None:
+        return a & b
+    return [x and y for x, y in zip(a, b)]
+
+def _not(a):
+    if np is not None:
+        return ~a
+    return [not x for x in a]
+
+def _compare(column, op: str, value):
+    if np is not None:
+        return column >= value if op == 'ge' else column <= value
+    if op == 'ge':
+        return [x >= value for x in column]
+    return [x <= value for x in column]
+
+class RetentionEngine:
+    """Evaluates a policy against the storage index in one columnar pass
+
+    Each condition is computed once for all files (numpy comparisons when
+    available), rules are combined with boolean masks, and each file gets
+    the first rule it matches. Nothing on disk is walked: sizes and mtimes
+    come from the index, access times from the access tracker, and model
+    tags from the catalog metadata stored in index entries.
+    """
+
+    def __init__(self, storage_manager, policy: RetentionPolicy = None,
+                 access_tracker=None, is_protected: Callable[[str], bool] = None):
+        self.storage_manager = storage_manager
+        self.policy = policy or RetentionPolicy.load()
+        self.access_tracker = access_tracker or storage_manager.access_tracker
+        self.is_protected = is_protected or (lambda path: False)
+
+    def _rule_mask(self, rule: RetentionRule, columns: _Columns, now: float):
+        match = rule.match
+        mask = columns.full(True)
+
+        for key, column in (('category', columns.categories), ('subcategory', columns.subcategories)):
+            if key in match:
+                allowed = match[key] if isinstance(match[key], list) else [match[key]]
+                mask = _and(mask, columns.cached(
+                    f"{key}:{allowed}", lambda: columns.from_bools(v in allowed for v in column)))
+
+        if 'patterns' in match:
+            patterns = tuple(match['patterns'])
+            mask = _and(mask, columns.cached(f"patterns:{patterns}", lambda: columns.from_bools(
+                any(fnmatch.fnmatch(name, p) for p in patterns) for name in columns.names)))
+
+        day = 86400
+        if 'min_age_days' in match:
+            mask = _and(mask, _compare(columns.mtimes, 'le', now - match['min_age_days'] * day))
+        if 'max_age_days' in match:
+            mask = _and(mask, _compare(columns.mtimes, 'ge', now - match['max_age_days'] * day))
+        if 'min_size_mb' in match:
+            mask = _and(mask, _compare(columns.sizes, 'ge', match['min_size_mb'] * 1024**2))
+        if 'max_size_mb' in match:
+            mask = _and(mask, _compare(columns.sizes, 'le', match['max_size_mb'] * 1024**2))
+        if 'min_idle_days' in match:
+            mask = _and(mask, _compare(columns.last_access(), 'le', now - match['min_idle_days'] * day))
+
+        for tag, allowed in match.get('tags', {}).items():
+            allowed = allowed if isinstance(allowed, list) else [allowed]
+            mask = _and(mask, columns.cached(f"tag:{tag}:{allowed}", lambda: columns.from_bools(
+                e.metadata.get('model_info', {}).get(tag) in allowed for e in columns.entries)))
+
+        if 'duplicate' in match:
+            duplicates = columns.duplicates()
+            mask = _and(mask, duplicates if match['duplicate'] else _not(duplicates))
+
+        return mask
+
+    def evaluate(self, rescan: bool = True) -> List[RetentionMatch]:
+        """Files selected by the policy, each tagged with its first matching rule"""
+        from modules.enterprise.deduplicator import StagedDeduplicator
+
+        rules = [r for r in self.policy.rules if r.enabled]
+        if not rules:
+            return []
+
+        index = self.storage_manager.get_index(rescan=rescan)
+        tiers = self.storage_manager.tiers
+        entries = [
+            e for e in index.entries()
+            if not (tiers and os.path.islink(e.path))
+            and not os.path.basename(e.path).startswith('.')
+        ]
+        columns = _Columns(
+            entries, self.access_tracker,
+            StagedDeduplicator(is_protected=self._protected, hash_cache=self.storage_manager.hash_cache)
+        )
+        now = time.time()
+
+        # Protected files never match any rule
+        unassigned = columns.from_bools(not self._protected(path) for path in columns.paths)
+        assigned: Dict[int, RetentionRule] = {}
+
+        for rule in rules:
+            selected = _and(self._rule_mask(rule, columns, now), unassigned)
+            hits = np.flatnonzero(selected) if np is not None else [i for i, s in enumerate(selected) if s]
+            for i in hits:
+                assigned[int(i)] = rule
+            unassigned = _and(unassigned, _not(selected))
+
+        matches = [
+            RetentionMatch(entries[i].path, entries[i].size, entries[i].category, rule.name, rule.action)
+            for i, rule in sorted(assigned.items())
+        ]
+        logger.info(f"Retention: {len(matches)} of {len(entries)} files matched {len(rules)} rules")
+        return matches
+
+    def _protected(self, path: str) -> bool:
+        return os.path.basename(path) in self.policy.protected_names or self.is_protected(path)
+
+    @staticmethod
+    def summarize(matches: List[RetentionMatch]) -> Dict[str, Dict]:
+        """{rule: {'action', 'files', 'bytes'}}"""
+        summary: Dict[str, Dict] = {}
+        for match in matches:
+            entry = summary.setdefault(match.rule, {'action': match.action, 'files': 0, 'bytes': 0})
+            entry['files'] += 1
+            entry['bytes'] += match.size
+        return summary
+
+    def apply(self, matches: List[RetentionMatch], dry_run: bool = True) -> Dict:
+        """Carry out matched actions; a dry run only summarizes them"""
+        result = {'dry_run': dry_run, 'rules': self.summarize(matches),
+                  'processed_files': 0, 'freed_bytes': 0, 'errors': []}
+        if dry_run:
+            result['processed_files'] = len(matches)
+            result['freed_bytes'] = sum(m.size for m in matches)
+            return result
+
+        by_action: Dict[str, List[RetentionMatch]] = {}
+        for match in matches:
+            by_action.setdefault(match.action, []).append(match)
+
+        for action, selected in by_action.items():
+            handler = getattr(self, f"_apply_{action}")
+            processed, freed, errors = handler(selected)
+            result['processed_files'] += processed
+            result['freed_bytes'] += freed
+            result['errors'].extend(errors)
+
+        index = self.storage_manager.get_index()
+        for match in matches:
+            index.update_path(match.path)
+        index.save()
+        return result
+
+    def _apply_delete(self, selected: List[RetentionMatch]):
+        from modules.enterprise.cleanup_plan import CleanupItem, CleanupPlan, CleanupExecutor
+
+        plan = CleanupPlan.from_items(CleanupItem(m.path, m.size, m.rule) for m in selected)
+        executed = CleanupExecutor().execute(plan, dry_run=False)
+        for path in executed['removed_paths']:
+            self.storage_manager.hash_cache.invalidate(path)
+            self.access_tracker.forget(path)
+        return executed['removed_files'], executed['freed_bytes'], executed['errors']
+
+    def _apply_archive(self, selected: List[RetentionMatch]):
+        from modules.enterprise.output_archiver import OutputArchiver
+
+        outputs = [m for m in selected if m.category == 'outputs']
+        errors = [f"{m.path}: only outputs can be archived" for m in selected if m.category != 'outputs']
+        candidates = []
+        for m in outputs:
+            try:
+                candidates.append((m.path, m.size, os.path.getmtime(m.path)))
+            except OSError:
+                continue
+        archived = OutputArchiver(self.storage_manager).archive_files(candidates)
+        return archived['archived_files'], archived['freed_bytes'], errors + archived['errors']
+
+    def _apply_demote(self, selected: List[RetentionMatch]):
+        tiers = self.storage_manager.tiers
+        if not tiers:
+            return 0, 0, [f"{len(selected)} files not demoted: tiered storage is not enabled"]
+        processed = freed = 0
+        for m in selected:
+            if tiers.demote(m.path):
+                processed += 1
+                freed += m.size
+        tiers.save()
+        return processed, freed, []
+
+    def _apply_compress(self, selected: List[RetentionMatch]):
+        from modules.enterprise.model_converter import shrink_checkpoint
+
+        processed = freed = 0
+        errors = []
+        for m in selected:
+            try:
+                converted = shrink_checkpoint(m.path)
+            except Exception as e:
+                errors.append(f"{m.path}: {e}")
+                continue
+            if converted:
+                processed += 1
+                freed += converted['saved_bytes']
+        return processed, freed, errors
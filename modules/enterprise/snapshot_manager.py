@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+"""
+Snapshot Manager Module
+Incremental storage snapshots with content-defined chunking and parallel restore
+"""
+
+import os
+import json
+import mmap
+import time
+import hashlib
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+from typing import Dict, List, Optional, Set, Tuple
+import logging
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+MIN_CHUNK_SIZE = 256 * 1024
+AVG_CHUNK_BITS = 20                     # ~1 MiB average chunk
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Bytes scanned per numpy pass; bounds the uint32 working set to ~8x this
+SCAN_SEGMENT = 4 * 1024 * 1024
+
+# A 32-bit gear hash covers a 32-byte window (older bytes are shifted out)
+GEAR_WINDOW = 32
+
+# Fixed table so chunk boundaries never change between versions or machines
+GEAR_TABLE = [int.from_bytes(hashlib.sha256(bytes([i])).digest()[:4], 'little') for i in range(256)]
+
+# Categories captured by default; caches and outputs are cheap to lose or archived elsewhere
+DEFAULT_CATEGORIES = ('models', 'configs')
+
+class ContentChunker:
+    """Splits files into content-defined chunks with a gear rolling hash
+
+    Boundaries depend only on nearby bytes, so inserting or changing data
+    in a file moves at most a couple of chunk boundaries and every other
+    chunk keeps its digest. The hash is computed for a whole segment at
+    once with numpy (five shift-and-add passes build the 32-byte window
+    sums). Without numpy, files are split into fixed-size chunks, which
+    still deduplicates unchanged and appended files.
+    """
+
+    def __init__(self, min_size: int = MIN_CHUNK_SIZE, avg_bits: int = AVG_CHUNK_BITS,
+                 max_size: int = MAX_CHUNK_SIZE):
+        self.min_size = min_size
+        self.avg_size = 1 << avg_bits
+        self.max_size = max_size
+        # Only the high bits of the gear hash depend on the whole window
+        self.shift = 32 - avg_bits
+        self.gear = np.array(GEAR_TABLE, dtype=np.uint32) if np is not None else None
+
+    def _candidates(self, mapped, size: int):
+        """Positions whose rolling hash marks a possible chunk end"""
+        pos = 0
+        while pos < size:
+            seg_end = min(pos + SCAN_SEGMENT, size)
+            lo = max(0, pos - (GEAR_WINDOW - 1))
+            data = np.frombuffer(mapped, dtype=np.uint8, count=seg_end - lo, offset=lo)
+
+            hashes = self.gear[data]
+            step = 1
+            while step < GEAR_WINDOW:
+                hashes[step:] += hashes[:-step] << np.uint32(step)
+                step *= 2
+
+            hits = np.flatnonzero(hashes < np.uint32(1 << self.shift))
+            for hit in hits[hits >= pos - lo]:
+                yield lo + int(hit)
+            pos = seg_end
+
+    def boundaries(self, mapped, size: int) -> List[int]:
+        """Chunk end offsets for a mapped file"""
+        if np is None:
+            return list(range(self.avg_size, size, self.avg_size)) + [size]
+
+        cuts = []
+        start = 0
+        for position in self._candidates(mapped, size):
+            end = position + 1
+            while end - start > self.max_size:
+                start += self.max_size
+                cuts.append(start)
+            if end - start >= self.min_size:
+                cuts.append(end)
+                start = end
+
+        while size - start > self.max_size:
+            start += self.max_size
+            cuts.append(start)
+        if start < size:
+            cuts.append(size)
+        return cuts
+
+    def chunk_file(self, file_path) -> List[Tuple[int, int, str]]:
+        """(offset, length, sha256) for every chunk of a file"""
+        with open(file_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                chunks = []
+                start = 0
+                view = memoryview(mapped)
+                try:
+                    for end in self.boundaries(mapped, size):
+                        digest = hashlib.sha256(view[start:end]).hexdigest()
+                        chunks.append((start, end - start, digest))
+                        start = end
+                finally:
+                    view.release()
+                return chunks
+
+class SnapshotManager:
+    """Snapshots storage/ to a persistent target and restores it in parallel
+
+    The target holds a content-addressed chunk store (chunks/ab/<sha256>)
+    and one JSON manifest per snapshot listing each file's chunks. A new
+    snapshot only chunks files whose size or mtime changed since the last
+    manifest and only uploads chunks the store does not have yet. Restores
+    skip files that are already current, reuse chunks found in local files,
+    and fetch the rest concurrently into preallocated temp files.
+    """
+
+    MANIFEST_VERSION = 1
+
+    def __init__(self, storage_manager, target: Path, max_workers: int = 8,
+                 chunker: ContentChunker = None):
+        self.storage_manager = storage_manager
+        self.target = Path(target)
+        self.chunks_dir = self.target / 'chunks'
+        self.manifests_dir = self.target / 'manifests'
+        self.max_workers = max_workers
+        self.chunker = chunker or ContentChunker()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def default_target() -> Optional[Path]:
+        """SD_DARKMASTER_SNAPSHOT_DIR, if snapshots are enabled for this session"""
+        override = os.environ.get('SD_DARKMASTER_SNAPSHOT_DIR')
+        return Path(override) if override else None
+
+    def _chunk_path(self, digest: str) -> Path:
+        return self.chunks_dir / digest[:2] / digest
+
+    def _rel(self, path) -> str:
+        return os.path.relpath(str(path), str(self.storage_manager.storage_root))
+
+    # ------------------------------------------------------------------
+    # Manifests
+    # ------------------------------------------------------------------
+
+    def list_snapshots(self) -> List[str]:
+        if not self.manifests_dir.exists():
+            return []
+        return sorted(p.stem for p in self.manifests_dir.glob('*.json'))
+
+    def load_manifest(self, snapshot_id: str = None) -> Optional[Dict]:
+        """A snapshot's manifest; the latest one by default"""
+        snapshots = self.list_snapshots()
+        if not snapshots:
+            return None
+        snapshot_id = snapshot_id or snapshots[-1]
+        with open(self.manifests_dir / f"{snapshot_id}.json", 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != self.MANIFEST_VERSION:
+            logger.warning(f"Ignoring snapshot {snapshot_id} with unknown manifest version")
+            return None
+        return manifest
+
+    def _save_manifest(self, manifest: Dict):
+        self.manifests_dir.mkdir(parents=True, exist_ok=True)
+        manifest_file = self.manifests_dir / f"{manifest['id']}.json"
+        tmp_file = manifest_file.with_suffix('.json.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_file, manifest_file)
+
+    def _stored_chunks(self) -> Set[str]:
+        """Digests already in the chunk store (one listing, no stat per chunk)"""
+        stored = set()
+        if not self.chunks_dir.exists():
+            return stored
+        for prefix in os.scandir(self.chunks_dir):
+            if prefix.is_dir():
+                stored.update(e.name for e in os.scandir(prefix.path) if not e.name.startswith('.'))
+        return stored
+
+    # ------------------------------------------------------------------
+    # Snapshot
+    # ------------------------------------------------------------------
+
+    def _snapshot_files(self, categories) -> List[Tuple[str, os.stat_result]]:
+        index = self.storage_manager.get_index(rescan=True)
+        files = []
+        for category in categories:
+            for entry in index.entries(category):
+                # Skip cold-tier placeholders and in-flight temp files
+                if os.path.islink(entry.path) or os.path.basename(entry.path).startswith('.'):
+                    continue
+                try:
+                    files.append((entry.path, os.stat(entry.path)))
+                except OSError:
+                    continue
+        return files
+
+    def _upload_chunks(self, path: str, chunks: List[Tuple[int, int, str]],
+                       stored: Set[str], stats: Dict):
+        """Copy the chunks the store lacks straight from the source file"""
+        with open(path, 'rb') as f:
+            for offset, length, digest in chunks:
+                with self._lock:
+                    if digest in stored:
+                        stats['reused_bytes'] += length
+                        continue
+                    stored.add(digest)
+
+                chunk_path = self._chunk_path(digest)
+                chunk_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = chunk_path.with_name(f".{digest}.part")
+                try:
+                    with open(tmp_path, 'wb') as out:
+                        out.write(os.pread(f.fileno(), length, offset))
+                    os.replace(tmp_path, chunk_path)
+                except BaseException:
+                    with self._lock:
+                        stored.discard(digest)
+                    tmp_path.unlink(missing_ok=True)
+                    raise
+
+                with self._lock:
+                    stats['new_chunks'] += 1
+                    stats['uploaded_bytes'] += length
+
+    def snapshot(self, categories=DEFAULT_CATEGORIES) -> Dict:
+        """Capture storage/ incrementally; returns transfer statistics"""
+        started = time.time()
+        previous = self.load_manifest()
+        previous_files = previous['files'] if previous else {}
+        stored = self._stored_chunks()
+
+        stats = {'files': 0, 'changed_files': 0, 'new_chunks': 0,
+                 'uploaded_bytes': 0, 'reused_bytes': 0, 'errors': []}
+        manifest_files = {}
+
+        def worker(item):
+            path, stat = item
+            rel = self._rel(path)
+            old = previous_files.get(rel)
+            if (old and old['size'] == stat.st_size and old['mtime'] == stat.st_mtime
+                    and all(digest in stored for digest, _ in old['chunks'])):
+                with self._lock:
+                    stats['reused_bytes'] += stat.st_size
+                return rel, old
+
+            chunks = self.chunker.chunk_file(path)
+            self._upload_chunks(path, chunks, stored, stats)
+            with self._lock:
+                stats['changed_files'] += 1
+            return rel, {'size': stat.st_size, 'mtime': stat.st_mtime,
+                         'chunks': [[digest, length] for _, length, digest in chunks]}
+
+        files = self._snapshot_files(categories)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [(item[0], executor.submit(worker, item)) for item in files]
+            for path, future in futures:
+                try:
+                    rel, entry = future.result()
+                    manifest_files[rel] = entry
+                except (OSError, ValueError) as e:
+                    stats['errors'].append(f"{path}: {e}")
+                    logger.error(f"Failed to snapshot {path}: {e}")
+
+        # Manifest goes last: a snapshot only exists once all its chunks do
+        manifest = {
+            'version': self.MANIFEST_VERSION,
+            'id': time.strftime('%Y%m%d-%H%M%S'),
+            'created': time.time(),
+            'categories': list(categories),
+            'files': manifest_files
+        }
+        self._save_manifest(manifest)
+
+        stats['files'] = len(manifest_files)
+        stats['snapshot_id'] = manifest['id']
+        logger.info(f"📸 Snapshot {manifest['id']}: {stats['changed_files']}/{stats['files']} files changed, "
+                    f"uploaded {stats['uploaded_bytes'] / 1024**3:.2f} GB in "
+                    f"{time.time() - started:.0f}s")
+        return stats
+
+    # ------------------------------------------------------------------
+    # Restore
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _is_current(path: Path, entry: Dict) -> bool:
+        try:
+            stat = os.stat(path, follow_symlinks=False)
+        except OSError:
+            return False
+        if os.path.islink(path):
+            # Tiered placeholder: the file lives in the cold store
+            return True
+        return stat.st_size == entry['size'] and stat.st_mtime == entry['mtime']
+
+    def _local_sources(self, manifest: Dict, current: List[str],
+                       stale: List[str]) -> Dict[str, Tuple[str, int]]:
+        """digest -> (local path, offset) for chunks already on this disk"""
+        storage_root = self.storage_manager.storage_root
+        sources = {}
+
+        # Current files match their manifest entry, so offsets come for free
+        for rel in current:
+            path = storage_root / rel
+            if os.path.islink(path):
+                continue
+            offset = 0
+            for digest, length in manifest['files'][rel]['chunks']:
+                sources.setdefault(digest, (str(path), offset))
+                offset += length
+
+        # Outdated local copies still share most chunks with the snapshot
+        def chunk_local(rel):
+            try:
+                return str(storage_root / rel), self.chunker.chunk_file(storage_root / rel)
+            except (OSError, ValueError):
+                return None, []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for path, chunks in executor.map(chunk_local, stale):
+                for offset, _, digest in chunks:
+                    sources.setdefault(digest, (path, offset))
+        return sources
+
+    def _read_chunk(self, digest: str, length: int,
+                    sources: Dict[str, Tuple[str, int]]) -> Tuple[bytes, bool]:
+        """Chunk bytes from a local file if possible, else the store; verified"""
+        local = sources.get(digest)
+        if local:
+            try:
+                with open(local[0], 'rb') as f:
+                    data = os.pread(f.fileno(), length, local[1])
+                if hashlib.sha256(data).hexdigest() == digest:
+                    return data, True
+            except OSError:
+                pass
+
+        with open(self._chunk_path(digest), 'rb') as f:
+            data = f.read()
+        if len(data) != length or hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Corrupt chunk {digest}")
+        return data, False
+
+    def restore(self, snapshot_id: str = None, batch_files: int = 64) -> Dict:
+        """Bring storage/ back to a snapshot, fetching only what is missing"""
+        started = time.time()
+        manifest = self.load_manifest(snapshot_id)
+        stats = {'restored_files': 0, 'skipped_files': 0, 'fetched_bytes': 0,
+                 'reused_bytes': 0, 'errors': []}
+        if manifest is None:
+            logger.info("No snapshot to restore")
+            return stats
+
+        storage_root = self.storage_manager.storage_root
+        current, pending, stale = [], [], []
+        for rel, entry in manifest['files'].items():
+            path = storage_root / rel
+            if self._is_current(path, entry):
+                current.append(rel)
+            else:
+                pending.append(rel)
+                if path.is_file():
+                    stale.append(rel)
+        stats['skipped_files'] = len(current)
+
+        sources = self._local_sources(manifest, current, stale)
+        index = self.storage_manager.get_index()
+
+        def write_chunk(fd: int, offset: int, digest: str, length: int):
+            data, local = self._read_chunk(digest, length, sources)
+            os.pwrite(fd, data, offset)
+            with self._lock:
+                stats['reused_bytes' if local else 'fetched_bytes'] += length
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # Batches bound the number of open temp files
+            for first in range(0, len(pending), batch_files):
+                batch = []
+                for rel in pending[first:first + batch_files]:
+                    entry = manifest['files'][rel]
+                    path = storage_root / rel
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    tmp_path = path.with_name(f".{path.name}.snap")
+                    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+                    os.ftruncate(fd, entry['size'])
+
+                    futures = []
+                    offset = 0
+                    for digest, length in entry['chunks']:
+                        futures.append(executor.submit(write_chunk, fd, offset, digest, length))
+                        offset += length
+                    batch.append((rel, path, tmp_path, fd, futures))
+
+                for rel, path, tmp_path, fd, futures in batch:
+                    try:
+                        for future in futures:
+                            future.result()
+                        os.close(fd)
+                        mtime = manifest['files'][rel]['mtime']
+                        os.utime(tmp_path, (mtime, mtime))
+                        os.replace(tmp_path, path)
+                        index.update_path(path)
+                        stats['restored_files'] += 1
+                    except (OSError, ValueError) as e:
+                        for future in futures:
+                            future.cancel()
+                        # Running writes cannot be cancelled; the fd must outlive them
+                        wait_futures(futures)
+                        try:
+                            os.close(fd)
+                        except OSError:
+                            pass
+                        tmp_path.unlink(missing_ok=True)
+                        stats['errors'].append(f"{rel}: {e}")
+                        logger.error(f"Failed to restore {rel}: {e}")
+
+        index.save()
+        logger.info(f"♻️ Restored {stats['restored_files']} files ({stats['skipped_files']} current), "
+                    f"fetched {stats['fetched_bytes'] / 1024**3:.2f} GB in {time.time() - started:.0f}s")
+        return stats
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def prune(self, keep: int = 3) -> Dict:
+        """Drop all but the newest `keep` snapshots and their orphaned chunks"""
+        snapshots = self.list_snapshots()
+        removed = snapshots[:-keep] if keep > 0 else snapshots
+        for snapshot_id in removed:
+            (self.manifests_dir / f"{snapshot_id}.json").unlink()
+
+        referenced = set()
+        for snapshot_id in self.list_snapshots():
+            manifest = self.load_manifest(snapshot_id)
+            if manifest:
+                for entry in manifest['files'].values():
+                    referenced.update(digest for digest, _ in entry['chunks'])
+
+        freed = 0
+        orphaned = self._stored_chunks() - referenced
+        for digest in orphaned:
+            chunk_path = self._chunk_path(digest)
+            freed += chunk_path.stat().st_size
+            chunk_path.unlink()
+
+        logger.info(f"Pruned {len(removed)} snapshots and {len(orphaned)} chunks")
+        return {'removed_snapshots': len(removed), 'removed_chunks': len(orphaned), 'freed_bytes': freed}
+
+    def get_status(self) -> Dict:
+        manifest = self.load_manifest()
+        return {
+            'target': str(self.target),
+            'snapshots': self.list_snapshots(),
+            'latest_files': len(manifest['files']) if manifest else 0,
+            'latest_bytes': sum(e['size'] for e in manifest['files'].values()) if manifest else 0,
+            'content_defined': np is not None
+        }
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Storage Index Module
+In-memory file index over unified storage with JSON persistence
+"""
+
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Tuple, Iterator
+import logging
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class IndexEntry:
+    """Single indexed file"""
+    path: str
+    category: Optional[str]
+    subcategory: Optional[str]
+    size: int
+    mtime: float
+    metadata: Dict = field(default_factory=dict)
+
+class StorageIndex:
+    """File index for unified storage, kept current by rescans or a watcher"""
+
+    INDEX_VERSION = 1
+
+    def __init__(self, storage_manager, index_file: Path = None):
+        self.storage_manager = storage_manager
+        self.index_file = index_file or storage_manager.storage_root / 'storage_index.json'
+        self._entries: Dict[str, IndexEntry] = {}
+        self._lock = threading.RLock()
+        self.last_scan: Optional[float] = None
+
+        # Flatten storage paths, longest first so nested roots win
+        self._roots: List[Tuple[str, str, Optional[str]]] = []
+        for category, paths in storage_manager.storage_paths.items():
+            if isinstance(paths, dict):
+                for name, path in paths.items():
+                    self._roots.append((str(path), category, name))
+            else:
+                self._roots.append((str(paths), category, None))
+        self._roots.sort(key=lambda root: len(root[0]), reverse=True)
+
+    def classify(self, path) -> Tuple[Optional[str], Optional[str]]:
+        """Resolve the storage category and subcategory of a path"""
+        path_str = str(path)
+        for root, category, name in self._roots:
+            if path_str == root or path_str.startswith(root + os.sep):
+                return category, name
+        return None, None
+
+    def _walk(self, root: str) -> Iterator[os.DirEntry]:
+        """Yield regular file entries below root using os.scandir"""
+        stack = [root]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                            elif entry.is_file():
+                                yield entry
+                        except OSError:
+                            continue
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                continue
+
+    def scan(self) -> int:
+        """Rebuild the index from disk, keeping metadata of unchanged files"""
+        start = time.time()
+        entries: Dict[str, IndexEntry] = {}
+        seen_roots = set()
+
+        for root in sorted(r[0] for r in self._roots):
+            # Nested roots are covered by their parent walk
+            if any(root.startswith(seen + os.sep) for seen in seen_roots):
+                continue
+            seen_roots.add(root)
+
+            for dir_entry in self._walk(root):
+                try:
+                    stat = dir_entry.stat()
+                except OSError:
+                    continue
+                entries[dir_entry.path] = self._make_entry(dir_entry.path, stat)
+
+        with self._lock:
+            self._entries = entries
+            self.last_scan = time.time()
+
+        logger.info(f"Indexed {len(entries)} files in {time.time() - start:.2f}s")
+        return len(entries)
+
+    def _make_entry(self, path: str, stat: os.stat_result) -> IndexEntry:
+        """Build an entry, carrying over metadata if the file is unchanged"""
+        category, subcategory = self.classify(path)
+        entry = IndexEntry(
+            path=path,
+            category=category,
+            subcategory=subcategory,
+            size=stat.st_size,
+            mtime=stat.st_mtime
+        )
+
+        previous = self._entries.get(path)
+        if previous and previous.size == entry.size and previous.mtime == entry.mtime:
+            entry.metadata = previous.metadata
+
+        return entry
+
+    def update_path(self, path) -> Optional[IndexEntry]:
+        """Add or refresh a single file; returns None if it is not indexable"""
+        path_str = str(path)
+        if self.classify(path_str)[0] is None:
+            return None
+
+        try:
+            stat = os.stat(path_str)
+        except OSError:
+            self.remove_path(path_str)
+            return None
+
+        if not os.path.isfile(path_str):
+            return None
+
+        with self._lock:
+            entry = self._make_entry(path_str, stat)
+            self._entries[path_str] = entry
+        return entry
+
+    def update_tree(self, path) -> int:
+        """Index every file below a directory"""
+        count = 0
+        for dir_entry in self._walk(str(path)):
+            if self.update_path(dir_entry.path):
+                count += 1
+        return count
+
+    def remove_path(self, path) -> int:
+        """Drop a file, or every file below a directory, from the index"""
+        path_str = str(path)
+        prefix = path_str + os.sep
+        with self._lock:
+            doomed = [p for p in self._entries if p == path_str or p.startswith(prefix)]
+            for p in doomed:
+                del self._entries[p]
+        return len(doomed)
+
+    def move_path(self, src, dest) -> int:
+        """Re-key entries after a rename, preserving their metadata"""
+        src_str, dest_str = str(src), str(dest)
+        prefix = src_str + os.sep
+        moved = 0
+        with self._lock:
+            for old_path in [p for p in self._entries if p == src_str or p.startswith(prefix)]:
+                entry = self._entries.pop(old_path)
+                entry.path = dest_str + old_path[len(src_str):]
+                entry.category, entry.subcategory = self.classify(entry.path)
+                self._entries[entry.path] = entry
+                moved += 1
+
+        # Files moved in from outside the index (or a rename of an unknown dir)
+        if not moved:
+            if os.path.isdir(dest_str):
+                moved = self.update_tree(dest_str)
+            elif self.update_path(dest_str):
+                moved = 1
+        return moved
+
+    def set_metadata(self, path, key: str, value) -> bool:
+        """Attach derived data to an entry; dropped when the file changes"""
+        with self._lock:
+            entry = self._entries.get(str(path))
+            if entry is None:
+                return False
+            entry.metadata[key] = value
+        return True
+
+    def get(self, path) -> Optional[IndexEntry]:
+        """Look up a single entry"""
+        return self._entries.get(str(path))
+
+    def entries(self, category: str = None, subcategory: str = None) -> List[IndexEntry]:
+        """List entries, optionally filtered by category"""
+        with self._lock:
+            values = list(self._entries.values())
+        if category:
+            values = [e for e in values if e.category == category]
+        if subcategory:
+            values = [e for e in values if e.subcategory == subcategory]
+        return values
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_usage(self) -> Dict[str, Dict]:
+        """Storage usage in the same shape as UnifiedStorageManager.get_storage_usage"""
+        totals: Dict[Tuple[str, Optional[str]], List[int]] = {}
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.category is None:
+                    continue
+                bucket = totals.setdefault((entry.category, entry.subcategory), [0, 0])
+                bucket[0] += entry.size
+                bucket[1] += 1
+
+        usage = {}
+        for category, paths in self.storage_manager.storage_paths.items():
+            names = paths.keys() if isinstance(paths, dict) else [None]
+            for name in names:
+                size, count = totals.get((category, name), [0, 0])
+                stats = {
+                    'size_bytes': size,
+                    'size_mb': size / (1024 * 1024),
+                    'size_gb': size / (1024 * 1024 * 1024),
+                    'file_count': count
+                }
+                if name is None:
+                    usage[category] = stats
+                else:
+                    usage.setdefault(category, {})[name] = stats
+
+        return usage
+
+    def load(self) -> bool:
+        """Load a persisted index; returns False if none is usable"""
+        if not self.index_file.exists():
+            return False
+
+        try:
+            with open(self.index_file, 'r') as f:
+                data = json.load(f)
+
+            if data.get('version') != self.INDEX_VERSION:
+                return False
+
+            with self._lock:
+                self._entries = {
+                    item['path']: IndexEntry(**item) for item in data.get('entries', [])
+                }
+                self.last_scan = data.get('last_scan')
+            return True
+
+        except Exception as e:
+            logger.warning(f"Could not load storage index: {e}")
+            return False
+
+    def save(self):
+        """Persist the index atomically"""
+        with self._lock:
+            data = {
+                'version': self.INDEX_VERSION,
+                'last_scan': self.last_scan,
+                'entries': [asdict(e) for e in self._entries.values()]
+            }
+
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.index_file.with_suffix('.json.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_file, self.index_file)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Storage Quota Module
+Per-category byte quotas with least-recently-used eviction
+"""
+
+import os
+import json
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import logging
+
+from modules.enterprise.access_tracker import AccessTracker
+from modules.enterprise.cleanup_plan import CleanupExecutor, CleanupPlan
+from modules.enterprise.hf_cache import HFCacheCleaner
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class EvictionCandidate:
+    """A file the policy would free, with the reason it was chosen"""
+    path: str
+    group: str
+    size: int
+    last_access: float
+
+class StorageQuotaManager:
+    """Keeps checkpoints, LoRAs, outputs and caches within their quotas
+
+    HuggingFace hub files count towards the cache quota but are never
+    file candidates: unlinking single blobs leaves snapshots dangling.
+    The cache group reclaims them first through HFCacheCleaner, one
+    revision at a time, and only then falls back to other cache files.
+    """
+
+    # Quota group -> (storage category, subcategory or None for the whole category)
+    QUOTA_GROUPS: Dict[str, List[Tuple[str, Optional[str]]]] = {
+        'checkpoints': [('models', 'checkpoints')],
+        'lora': [('models', 'lora'), ('models', 'lycoris')],
+        'outputs': [('outputs', None)],
+        'cache': [('cache', None)]
+    }
+
+    # Groups whose files can be demoted to the cold tier
+    MODEL_GROUPS = ('checkpoints', 'lora')
+
+    def __init__(self, storage_manager, access_tracker: AccessTracker = None,
+                 quotas_gb: Dict[str, Optional[float]] = None,
+                 is_protected: Callable[[str], bool] = None,
+                 groups: Iterable[str] = None):
+        self.storage_manager = storage_manager
+        self.groups = list(groups) if groups is not None else list(self.QUOTA_GROUPS)
+        self.access_tracker = access_tracker or storage_manager.access_tracker
+        self.quotas_gb = quotas_gb if quotas_gb is not None else self.load_quotas()
+        self.is_protected = is_protected or (lambda path: False)
+
+    @staticmethod
+    def load_quotas(config_file: Path = None) -> Dict[str, Optional[float]]:
+        """Quotas in GB from configs/storage_quotas.json (null = unlimited)"""
+        config_file = config_file or Path(__file__).resolve().parent.parent.parent / 'configs' / 'storage_quotas.json'
+        if not config_file.exists():
+            return {}
+        try:
+            with open(config_file, 'r') as f:
+                return json.load(f).get('quotas_gb', {})
+        except Exception as e:
+            logger.warning(f"Could not load storage quotas: {e}")
+            return {}
+
+    def _hf_cleaner(self) -> HFCacheCleaner:
+        return HFCacheCleaner(self.storage_manager, access_tracker=self.access_tracker)
+
+    def _group_entries(self) -> Dict[str, List]:
+        index = self.storage_manager.get_index()
+        grouped = {}
+        for group in self.groups:
+            members = self.QUOTA_GROUPS[group]
+            entries = []
+            for category, subcategory in members:
+                entries.extend(index.entries(category, subcategory))
+            # Cold-tier placeholders take no local space
+            grouped[group] = [e for e in entries if not os.path.islink(e.path)]
+        return grouped
+
+    def get_usage(self) -> Dict[str, Dict]:
+        """Used bytes against the quota for every group"""
+        usage = {}
+        for group, entries in self._group_entries().items():
+            used = sum(e.size for e in entries)
+            quota_gb = self.quotas_gb.get(group)
+            quota = int(quota_gb * 1024**3) if quota_gb is not None else None
+            usage[group] = {
+                'used_gb': used / 1024**3,
+                'quota_gb': quota_gb,
+                'over_gb': max(0, used - quota) / 1024**3 if quota is not None else 0.0,
+                'file_count': len(entries)
+            }
+        return usage
+
+    def plan_eviction(self, free_bytes: int = 0) -> List[EvictionCandidate]:
+        """Least recently used files to free, per over-quota group, plus
+        free_bytes more across all groups if requested"""
+        return self._plan(free_bytes)[0]
+
+    def _plan(self, free_bytes: int = 0) -> Tuple[List[EvictionCandidate], Optional[CleanupPlan]]:
+        """File candidates, plus the HF revision plan for an over-quota cache"""
+        selected: Dict[str, EvictionCandidate] = {}
+        pool: List[EvictionCandidate] = []
+        hf_plan = None
+
+        for group, entries in self._group_entries().items():
+            hf_bytes = 0
+            if group == 'cache':
+                hf_cleaner = self._hf_cleaner()
+                roots = hf_cleaner.hub_roots()
+                files = []
+                for e in entries:
+                    if hf_cleaner.is_managed(e.path, roots):
+                        hf_bytes += e.size
+                    else:
+                        files.append(e)
+                entries = files
+
+            candidates = sorted(
+                (
+                    EvictionCandidate(e.path, group, e.size, self.access_tracker.last_access(e.path))
+                    for e in entries if not self.is_protected(e.path)
+                ),
+                key=lambda c: c.last_access
+            )
+
+            quota_gb = self.quotas_gb.get(group)
+            if quota_gb is not None:
+                over = sum(e.size for e in entries) + hf_bytes - int(quota_gb * 1024**3)
+                if over > 0 and hf_bytes:
+                    hf_plan = hf_cleaner.plan(free_bytes=over, reason='quota')
+                    over -= hf_plan.total_bytes
+                for candidate in candidates:
+                    if over <= 0:
+                        break
+                    selected[candidate.path] = candidate
+                    over -= candidate.size
+            pool.extend(candidates)
+
+        # Extra space requested (e.g. disk nearly full): global LRU order
+        if free_bytes > 0:
+            needed = free_bytes
+            for candidate in sorted(pool, key=lambda c: c.last_access):
+                if needed <= 0:
+                    break
+                if candidate.path not in selected:
+                    selected[candidate.path] = candidate
+                    needed -= candidate.size
+
+        return sorted(selected.values(), key=lambda c: c.last_access), hf_plan
+
+    def evict(self, free_bytes: int = 0, dry_run: bool = False) -> Dict:
+        """Free the planned files; files with a cold-tier copy are demoted, not deleted"""
+        plan, hf_plan = self._plan(free_bytes)
+        tiers = getattr(self.storage_manager, 'tiers', None)
+        index = self.storage_manager.get_index()
+
+        result = {'evicted_files': 0, 'demoted_files': 0, 'freed_bytes': 0,
+                  'errors': [], 'plan': [c.path for c in plan],
+                  'hf_revisions': [i.path for i in hf_plan.items] if hf_plan else []}
+        if dry_run:
+            result['freed_bytes'] = sum(c.size for c in plan) + (hf_plan.total_bytes if hf_plan else 0)
+            return result
+
+        if hf_plan and hf_plan.items:
+            hf_result = CleanupExecutor().execute(hf_plan, dry_run=False)
+            for path in hf_result['removed_paths']:
+                index.remove_path(path)
+            result['freed_bytes'] += hf_result['freed_bytes']
+            result['errors'].extend(hf_result['errors'])
+
+        for candidate in plan:
+            try:
+                if tiers and tiers.demote(candidate.path):
+                    result['demoted_files'] += 1
+                else:
+                    os.unlink(candidate.path)
+                    result['evicted_files'] += 1
+                    self.access_tracker.forget(candidate.path)
+                    self.storage_manager.hash_cache.invalidate(candidate.path)
+                index.update_path(candidate.path)
+                result['freed_bytes'] += candidate.size
+                logger.info(f"Evicted {Path(candidate.path).name} ({candidate.group})")
+            except OSError as e:
+                result['errors'].append(f"{candidate.path}: {e}")
+                logger.error(f"Failed to evict {candidate.path}: {e}")
+
+        index.save()
+        self.access_tracker.save()
+        return result
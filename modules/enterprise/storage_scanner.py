@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Storage Scanner Module
+One os.scandir pass over unified storage feeding any number of visitors
+"""
+
+import os
+import time
+import fnmatch
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ScannedFile(NamedTuple):
+    """A regular file as seen by the scan; stat is taken exactly once"""
+    path: str
+    category: str
+    subcategory: Optional[str]
+    size: int
+    mtime: float
+    dev: int
+    ino: int
+
+class StorageVisitor(ABC):
+    """Receives every scanned file; `name` keys its result"""
+
+    name = 'visitor'
+
+    @abstractmethod
+    def visit(self, file: ScannedFile):
+        """Called once per regular file"""
+
+    @abstractmethod
+    def result(self):
+        """What the scan returns under `name`"""
+
+class UsageVisitor(StorageVisitor):
+    """Size and file count per category/subcategory (get_storage_usage shape)"""
+
+    name = 'usage'
+
+    def __init__(self, storage_paths: Dict):
+        self.usage: Dict[str, Dict] = {
+            category: {sub: [0, 0] for sub in paths} for category, paths in storage_paths.items()
+            if isinstance(paths, dict)
+        }
+
+    def visit(self, file: ScannedFile):
+        totals = self.usage.get(file.category, {}).get(file.subcategory)
+        if totals is not None:
+            totals[0] += file.size
+            totals[1] += 1
+
+    def result(self) -> Dict[str, Dict]:
+        return {
+            category: {
+                sub: {
+                    'size_bytes': size,
+                    'size_mb': size / (1024 * 1024),
+                    'size_gb': size / (1024 * 1024 * 1024),
+                    'file_count': count
+                }
+                for sub, (size, count) in subs.items()
+            }
+            for category, subs in self.usage.items()
+        }
+
+class SizeBucketVisitor(StorageVisitor):
+    """Deduplication stage 1: same-size files, existing hardlinks collapsed"""
+
+    name = 'size_buckets'
+
+    def __init__(self, min_size: int = 1):
+        self.min_size = min_size
+        self.buckets: Dict[int, List[Tuple[str, float]]] = {}
+        self.seen_inodes = set()
+
+    def visit(self, file: ScannedFile):
+        if file.size < self.min_size:
+            return
+        inode = (file.dev, file.ino)
+        if inode in self.seen_inodes:
+            return
+        self.seen_inodes.add(inode)
+        self.buckets.setdefault(file.size, []).append((file.path, file.mtime))
+
+    def result(self) -> Dict[int, List[Tuple[str, float]]]:
+        return {size: files for size, files in self.buckets.items() if len(files) > 1}
+
+class CategoryFilesVisitor(StorageVisitor):
+    """All files of one category, optionally filtered by subcategory and pattern"""
+
+    def __init__(self, name: str, category: str, subcategory: str = None,
+                 patterns: Iterable[str] = None, top_level_of: Path = None):
+        self.name = name
+        self.category = category
+        self.subcategory = subcategory
+        self.patterns = tuple(patterns) if patterns else None
+        self.top_level_of = str(top_level_of) if top_level_of else None
+        self.files: List[ScannedFile] = []
+
+    def visit(self, file: ScannedFile):
+        if file.category != self.category:
+            return
+        if self.subcategory and file.subcategory != self.subcategory:
+            return
+        if self.top_level_of and os.path.dirname(file.path) != self.top_level_of:
+            return
+        if self.patterns:
+            name = os.path.basename(file.path)
+            if not any(fnmatch.fnmatch(name, pattern) for pattern in self.patterns):
+                return
+        self.files.append(file)
+
+    def result(self) -> List[ScannedFile]:
+        return self.files
+
+class LargeFileVisitor(StorageVisitor):
+    """Files at or above a size floor, across every category"""
+
+    name = 'large_files'
+
+    def __init__(self, min_bytes: int):
+        self.min_bytes = min_bytes
+        self.files: List[ScannedFile] = []
+
+    def visit(self, file: ScannedFile):
+        if file.size >= self.min_bytes:
+            self.files.append(file)
+
+    def result(self) -> List[ScannedFile]:
+        return self.files
+
+class StorageScanner:
+    """Walks every storage root once and hands each file to all visitors
+
+    Nested storage roots are not walked twice: a directory that is itself
+    a root is skipped by its parent's walk and labelled by its own. Symlinks
+    (cold-tier placeholders, dedup links) are skipped, so sizes reflect the
+    bytes actually stored.
+    """
+
+    def __init__(self, storage_manager):
+        self.storage_manager = storage_manager
+        self.roots: List[Tuple[str, str, Optional[str]]] = []
+        for category, paths in storage_manager.storage_paths.items():
+            if isinstance(paths, dict):
+                for name, path in paths.items():
+                    self.roots.append((str(path), category, name))
+            else:
+                self.roots.append((str(paths), category, None))
+        self.root_set = {root for root, _, _ in self.roots}
+
+    def _walk(self, root: str, category: str, subcategory: Optional[str]) -> Iterable[ScannedFile]:
+        stack = [root]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if entry.path not in self.root_set:
+                                    stack.append(entry.path)
+                                continue
+                            if not entry.is_file(follow_symlinks=False):
+                                continue
+                            stat = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        yield ScannedFile(entry.path, category, subcategory, stat.st_size,
+                                          stat.st_mtime, stat.st_dev, stat.st_ino)
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                continue
+
+    def scan(self, visitors: List[StorageVisitor]) -> Dict:
+        """Run one pass; returns {visitor name: result} plus scan statistics"""
+        start = time.time()
+        file_count = 0
+        for root, category, subcategory in self.roots:
+            for file in self._walk(root, category, subcategory):
+                file_count += 1
+                for visitor in visitors:
+                    visitor.visit(file)
+
+        results = {visitor.name: visitor.result() for visitor in visitors}
+        results['scanned_files'] = file_count
+        results['scan_time'] = time.time()
+        logger.info(f"Scanned {file_count} files in {time.time() - start:.2f}s")
+        return results
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Storage Watcher Module
+Live filesystem events for unified storage via inotify with a polling fallback
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Callable
+import logging
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class StorageEvent:
+    """Filesystem change inside unified storage"""
+    event_type: str  # created, modified, deleted, moved, overflow
+    path: str
+    dest_path: Optional[str] = None
+    is_dir: bool = False
+    timestamp: float = field(default_factory=time.time)
+
+# ============================================================================
+# INOTIFY BACKEND
+# ============================================================================
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+              IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR)
+
+EVENT_HEADER = struct.Struct('iIII')
+
+class _InotifyBackend:
+    """Recursive inotify watches through libc"""
+
+    def __init__(self, roots: List[str]):
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.watches: Dict[int, str] = {}
+        for root in roots:
+            self.add_tree(root)
+
+    @classmethod
+    def available(cls) -> bool:
+        if not sys.platform.startswith('linux'):
+            return False
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6')
+            return hasattr(libc, 'inotify_init1')
+        except OSError:
+            return False
+
+    def add_watch(self, path: str):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                logger.warning("inotify watch limit reached (fs.inotify.max_user_watches)")
+            elif err not in (errno.ENOENT, errno.ENOTDIR):
+                logger.debug(f"inotify_add_watch failed for {path}: {os.strerror(err)}")
+            return
+        self.watches[wd] = path
+
+    def add_tree(self, root: str):
+        if not os.path.isdir(root):
+            return
+        self.add_watch(root)
+        for dirpath, dirnames, _ in os.walk(root):
+            for dirname in dirnames:
+                self.add_watch(os.path.join(dirpath, dirname))
+
+    def read_events(self, timeout: float) -> List[StorageEvent]:
+        """Block up to timeout and translate pending inotify records"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        moved_from: Dict[int, Tuple[str, bool]] = {}
+        offset = 0
+
+        while offset < len(buffer):
+            wd, mask, cookie, name_len = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = buffer[offset:offset + name_len].rstrip(b'\0')
+            offset += name_len
+
+            if mask & IN_Q_OVERFLOW:
+                events.append(StorageEvent('overflow', ''))
+                continue
+
+            parent = self.watches.get(wd)
+            if parent is None:
+                continue
+
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+
+            path = os.path.join(parent, os.fsdecode(name)) if name else parent
+            is_dir = bool(mask & IN_ISDIR)
+
+            if mask & IN_CREATE:
+                if is_dir:
+                    # Catch files written before the watch was in place
+                    self.add_tree(path)
+                events.append(StorageEvent('created', path, is_dir=is_dir))
+            elif mask & IN_CLOSE_WRITE:
+                events.append(StorageEvent('modified', path))
+            elif mask & IN_DELETE:
+                events.append(StorageEvent('deleted', path, is_dir=is_dir))
+            elif mask & IN_MOVED_FROM:
+                moved_from[cookie] = (path, is_dir)
+            elif mask & IN_MOVED_TO:
+                if cookie in moved_from:
+                    src, _ = moved_from.pop(cookie)
+                    if is_dir:
+                        self._rekey_watches(src, path)
+                    events.append(StorageEvent('moved', src, dest_path=path, is_dir=is_dir))
+                else:
+                    if is_dir:
+                        self.add_tree(path)
+                    events.append(StorageEvent('created', path, is_dir=is_dir))
+            elif mask & IN_DELETE_SELF and not name:
+                self.watches.pop(wd, None)
+
+        # Moved out of the watched tree
+        for src, is_dir in moved_from.values():
+            events.append(StorageEvent('deleted', src, is_dir=is_dir))
+
+        return events
+
+    def _rekey_watches(self, src: str, dest: str):
+        prefix = src + os.sep
+        for wd, path in list(self.watches.items()):
+            if path == src or path.startswith(prefix):
+                self.watches[wd] = dest + path[len(src):]
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+# ============================================================================
+# POLLING BACKEND
+# ============================================================================
+
+class _PollingBackend:
+    """Snapshot diffing for platforms without inotify (or FUSE mounts)"""
+
+    def __init__(self, roots: List[str], interval: float = 2.0):
+        self.roots = roots
+        self.interval = interval
+        self.snapshot = self._take_snapshot()
+
+    def _take_snapshot(self) -> Dict[str, Tuple[int, int, int]]:
+        snapshot = {}
+        stack = [root for root in self.roots if os.path.isdir(root)]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                            elif entry.is_file():
+                                stat = entry.stat()
+                                snapshot[entry.path] = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+        return snapshot
+
+    def read_events(self, timeout: float) -> List[StorageEvent]:
+        time.sleep(self.interval)
+        current = self._take_snapshot()
+        previous = self.snapshot
+        self.snapshot = current
+
+        created = [p for p in current if p not in previous]
+        deleted = [p for p in previous if p not in current]
+        events = []
+
+        # Pair deletes and creates sharing an inode into moves
+        deleted_by_inode = {previous[p][2]: p for p in deleted}
+        for path in created:
+            src = deleted_by_inode.pop(current[path][2], None)
+            if src:
+                events.append(StorageEvent('moved', src, dest_path=path))
+            else:
+                events.append(StorageEvent('created', path))
+
+        for src in deleted_by_inode.values():
+            events.append(StorageEvent('deleted', src))
+
+        for path, state in current.items():
+            if path in previous and previous[path] != state:
+                events.append(StorageEvent('modified', path))
+
+        return events
+
+    def close(self):
+        self.snapshot = {}
+
+# ============================================================================
+# WATCHER
+# ============================================================================
+
+class StorageWatcher:
+    """Streams storage changes into the storage index and to subscribers"""
+
+    def __init__(self, storage_manager, index=None, use_inotify: bool = True,
+                 poll_interval: float = 2.0):
+        self.storage_manager = storage_manager
+        self.index = index
+        self.use_inotify = use_inotify
+        self.poll_interval = poll_interval
+        self.subscribers: List[Callable[[StorageEvent], None]] = []
+        self.backend = None
+        self.backend_name = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def subscribe(self, callback: Callable[[StorageEvent], None]):
+        """Register a callback receiving every StorageEvent"""
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[StorageEvent], None]):
+        """Remove a previously registered callback"""
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def start(self) -> bool:
+        """Start watching in a daemon thread"""
+        if self.is_running:
+            return True
+
+        roots = [str(self.storage_manager.storage_root)]
+
+        if self.use_inotify and _InotifyBackend.available():
+            try:
+                self.backend = _InotifyBackend(roots)
+                self.backend_name = 'inotify'
+            except OSError as e:
+                logger.warning(f"inotify unavailable, falling back to polling: {e}")
+
+        if self.backend is None:
+            self.backend = _PollingBackend(roots, self.poll_interval)
+            self.backend_name = 'polling'
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='storage-watcher', daemon=True)
+        self._thread.start()
+
+        logger.info(f"Storage watcher started ({self.backend_name})")
+        return True
+
+    def stop(self):
+        """Stop watching and release the backend"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self.backend:
+            self.backend.close()
+            self.backend = None
+        logger.info("Storage watcher stopped")
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                events = self.backend.read_events(timeout=0.5)
+            except Exception as e:
+                logger.error(f"Storage watcher error: {e}")
+                time.sleep(self.poll_interval)
+                continue
+
+            for event in events:
+                self._dispatch(event)
+
+    def _dispatch(self, event: StorageEvent):
+        """Apply an event to the index, then notify subscribers"""
+        if self.index is not None:
+            try:
+                if event.event_type == 'overflow':
+                    self.index.scan()
+                elif event.event_type in ('created', 'modified'):
+                    if event.is_dir:
+                        self.index.update_tree(event.path)
+                    else:
+                        self.index.update_path(event.path)
+                elif event.event_type == 'deleted':
+                    self.index.remove_path(event.path)
+                elif event.event_type == 'moved':
+                    self.index.move_path(event.path, event.dest_path)
+            except Exception as e:
+                logger.error(f"Failed to apply {event.event_type} for {event.path}: {e}")
+
+        for callback in list(self.subscribers):
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"Storage event subscriber failed: {e}")
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Tiered Storage Module
+Byte-quota hot tier on fast local disk in front of a persistent cold tier
+"""
+
+import os
+import json
+import time
+import shutil
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Iterable
+import logging
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class TierEntry:
+    """A file resident in the hot tier"""
+    relpath: str
+    size: int
+    last_used: float
+    pinned: bool = False
+
+class TieredStorage:
+    """Keeps recently used files on local disk and the rest on the cold tier
+
+    The hot tier is the regular storage tree the WebUIs are linked to. Files
+    that only exist on the cold tier are represented there by a symlink, so
+    every model stays visible. Promotion copies the cold file in and swaps it
+    over the symlink with os.replace; demotion swaps the symlink back in.
+    Either way a WebUI never sees a missing or half-copied file.
+    """
+
+    STATE_VERSION = 1
+
+    def __init__(self, hot_root: Path, cold_root: Path, hot_quota_bytes: int,
+                 cold_read_only: bool = False, directories: Iterable[Path] = None,
+                 state_file: Path = None, max_workers: int = 2):
+        self.hot_root = Path(os.path.realpath(hot_root))
+        self.cold_root = Path(os.path.realpath(cold_root))
+        self.hot_quota_bytes = hot_quota_bytes
+        self.cold_read_only = cold_read_only
+        self.directories = [Path(d) for d in directories] if directories else [self.hot_root]
+        self.state_file = Path(state_file or self.hot_root / 'tier_state.json')
+
+        # Resident hot files, least recently used first
+        self._lru: 'OrderedDict[str, TierEntry]' = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tier-copy')
+
+        self.stats = {'promotions': 0, 'demotions': 0, 'write_backs': 0, 'bytes_copied': 0}
+        self.load()
+
+    # ------------------------------------------------------------------
+    # Paths
+    # ------------------------------------------------------------------
+
+    def relpath(self, path) -> Optional[str]:
+        """Tier-relative path for a hot or cold path"""
+        path = Path(os.path.abspath(str(path)))
+        # WebUIs reach storage through symlinked dirs; resolve the parent
+        # only, since the file itself may be a cold placeholder symlink
+        for candidate in (path, Path(os.path.realpath(path.parent)) / path.name):
+            for root in (self.hot_root, self.cold_root):
+                try:
+                    return candidate.relative_to(root).as_posix()
+                except ValueError:
+                    continue
+        return None
+
+    def _rel(self, path) -> Optional[str]:
+        """Accept either an absolute path or an already tier-relative one"""
+        return self.relpath(path) if os.path.isabs(str(path)) else Path(path).as_posix()
+
+    def hot_path(self, relpath: str) -> Path:
+        return self.hot_root / relpath
+
+    def cold_path(self, relpath: str) -> Path:
+        return self.cold_root / relpath
+
+    def is_resident(self, relpath: str) -> bool:
+        """True if the file's bytes live on the hot tier"""
+        hot = self.hot_path(relpath)
+        return hot.exists() and not hot.is_symlink()
+
+    def hot_usage(self) -> int:
+        with self._lock:
+            return sum(entry.size for entry in self._lru.values())
+
+    # ------------------------------------------------------------------
+    # Discovery
+    # ------------------------------------------------------------------
+
+    def _walk(self, root: Path):
+        """Yield regular files below root (symlinks are placeholders, not data)"""
+        stack = [root]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        if entry.name.startswith('.') and entry.name.endswith('.tier'):
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            yield entry
+            except OSError:
+                continue
+
+    def scan(self) -> Dict[str, int]:
+        """Register hot files and create placeholders for cold-only files"""
+        registered = placeholders = 0
+
+        with self._lock:
+            seen = set()
+            for directory in self.directories:
+                for entry in self._walk(directory):
+                    relpath = self.relpath(entry.path)
+                    if relpath is None:
+                        continue
+                    seen.add(relpath)
+                    stat = entry.stat(follow_symlinks=False)
+                    if relpath not in self._lru:
+                        self._lru[relpath] = TierEntry(relpath, stat.st_size, stat.st_atime)
+                        registered += 1
+                    else:
+                        self._lru[relpath].size = stat.st_size
+
+            for relpath in [r for r in self._lru if r not in seen]:
+                del self._lru[relpath]
+
+            # Keep LRU order consistent with last use after loading/scanning
+            self._lru = OrderedDict(sorted(self._lru.items(), key=lambda item: item[1].last_used))
+
+        for directory in self.directories:
+            relative_dir = self.relpath(directory)
+            cold_dir = self.cold_path(relative_dir) if relative_dir is not None else None
+            if not cold_dir or not cold_dir.is_dir():
+                continue
+            for entry in self._walk(cold_dir):
+                relpath = Path(entry.path).relative_to(self.cold_root).as_posix()
+                hot = self.hot_path(relpath)
+                if hot.exists() or hot.is_symlink():
+                    continue
+                hot.parent.mkdir(parents=True, exist_ok=True)
+                os.symlink(entry.path, hot)
+                placeholders += 1
+
+        logger.info(f"Tiered storage: {registered} hot files registered, {placeholders} cold placeholders")
+        self.save()
+        return {'registered': registered, 'placeholders': placeholders}
+
+    # ------------------------------------------------------------------
+    # Promotion / demotion
+    # ------------------------------------------------------------------
+
+    def touch(self, path, promote: bool = True) -> Optional[Future]:
+        """Record a use; cold files are copied in on a background thread"""
+        relpath = self._rel(path)
+        if relpath is None:
+            return None
+
+        with self._lock:
+            entry = self._lru.get(relpath)
+            if entry:
+                entry.last_used = time.time()
+                self._lru.move_to_end(relpath)
+                return None
+
+        if promote and self.cold_path(relpath).is_file():
+            return self.promote(relpath)
+        return None
+
+    def promote(self, path, wait: bool = False) -> Optional[Future]:
+        """Schedule copying a cold file into the hot tier"""
+        relpath = self._rel(path)
+        if relpath is None or self.is_resident(relpath):
+            return None
+
+        with self._lock:
+            future = self._pending.get(relpath)
+            if future is None:
+                future = self._executor.submit(self._promote, relpath)
+                self._pending[relpath] = future
+                future.add_done_callback(lambda _, r=relpath: self._pending.pop(r, None))
+
+        if wait:
+            future.result()
+        return future
+
+    def prefetch(self, paths: Iterable) -> List[Future]:
+        """Background copy-in for files that are about to be used"""
+        futures = []
+        for path in paths:
+            future = self.touch(path)
+            if future:
+                futures.append(future)
+        return futures
+
+    def _promote(self, relpath: str) -> bool:
+        cold = self.cold_path(relpath)
+        hot = self.hot_path(relpath)
+        try:
+            size = cold.stat().st_size
+        except OSError:
+            return False
+
+        if not self._make_room(size, exclude=relpath):
+            logger.warning(f"Hot tier full, serving {relpath} from cold storage")
+            return False
+
+        hot.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = hot.with_name(f".{hot.name}.tier")
+        try:
+            shutil.copy2(cold, tmp_path)
+            os.replace(tmp_path, hot)
+        except OSError as e:
+            logger.error(f"Failed to promote {relpath}: {e}")
+            Path(tmp_path).unlink(missing_ok=True)
+            return False
+
+        with self._lock:
+            self._lru[relpath] = TierEntry(relpath, size, time.time())
+            self.stats['promotions'] += 1
+            self.stats['bytes_copied'] += size
+
+        logger.info(f"Promoted {relpath} to hot tier ({size / (1024**3):.2f} GB)")
+        self.save()
+        return True
+
+    def _has_cold_copy(self, relpath: str) -> bool:
+        """Cold copy exists and matches the hot file"""
+        try:
+            hot = self.hot_path(relpath).stat()
+            cold = self.cold_path(relpath).stat()
+        except OSError:
+            return False
+        return hot.st_size == cold.st_size and int(hot.st_mtime) <= int(cold.st_mtime)
+
+    def write_back(self, relpath: str) -> bool:
+        """Copy a hot file to the cold tier so it survives the session"""
+        if self.cold_read_only:
+            return False
+        if self._has_cold_copy(relpath):
+            return True
+
+        hot = self.hot_path(relpath)
+        cold = self.cold_path(relpath)
+        tmp_path = cold.with_name(f".{cold.name}.tier")
+        try:
+            cold.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(hot, tmp_path)
+            os.replace(tmp_path, cold)
+        except OSError as e:
+            logger.error(f"Failed to write back {relpath}: {e}")
+            Path(tmp_path).unlink(missing_ok=True)
+            return False
+
+        with self._lock:
+            self.stats['write_backs'] += 1
+            self.stats['bytes_copied'] += hot.stat().st_size
+        return True
+
+    def demote(self, path) -> bool:
+        """Move a hot file's bytes to the cold tier, leaving a placeholder"""
+        relpath = self._rel(path)
+        if relpath is None or not self.is_resident(relpath):
+            return False
+
+        # Never drop the only copy of a file
+        if not self._has_cold_copy(relpath) and not self.write_back(relpath):
+            return False
+
+        hot = self.hot_path(relpath)
+        tmp_link = hot.with_name(f".{hot.name}.tier")
+        try:
+            Path(tmp_link).unlink(missing_ok=True)
+            os.symlink(self.cold_path(relpath), tmp_link)
+            os.replace(tmp_link, hot)
+        except OSError as e:
+            logger.error(f"Failed to demote {relpath}: {e}")
+            return False
+
+        with self._lock:
+            self._lru.pop(relpath, None)
+            self.stats['demotions'] += 1
+
+        logger.info(f"Demoted {relpath} to cold tier")
+        return True
+
+    def _make_room(self, size: int, exclude: str = None) -> bool:
+        """Demote least recently used files until size bytes fit the quota"""
+        if size > self.hot_quota_bytes:
+            return False
+
+        while self.hot_usage() + size > self.hot_quota_bytes:
+            with self._lock:
+                candidates = [
+                    relpath for relpath, entry in self._lru.items()
+                    if not entry.pinned and relpath != exclude and relpath not in self._pending
+                ]
+            # Oldest first; files that cannot be demoted are skipped
+            if not any(self.demote(relpath) for relpath in candidates):
+                return False
+        return True
+
+    def enforce_quota(self) -> bool:
+        """Demote files until the hot tier is back within its quota"""
+        return self._make_room(0)
+
+    def pin(self, path, pinned: bool = True):
+        """Keep a file on the hot tier regardless of LRU order"""
+        relpath = self._rel(path)
+        with self._lock:
+            if relpath in self._lru:
+                self._lru[relpath].pinned = pinned
+
+    def unpin(self, path):
+        self.pin(path, pinned=False)
+
+    def flush(self) -> int:
+        """Write back every hot-only file (e.g. fresh downloads) to the cold tier"""
+        with self._lock:
+            relpaths = list(self._lru)
+        return sum(1 for relpath in relpaths if self.write_back(relpath))
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+        self.save()
+
+    # ------------------------------------------------------------------
+    # Persistence / status
+    # ------------------------------------------------------------------
+
+    def load(self):
+        """Restore LRU order from the state file"""
+        if not self.state_file.exists():
+            return
+        try:
+            with open(self.state_file, 'r') as f:
+                data = json.load(f)
+            if data.get('version') != self.STATE_VERSION:
+                return
+            with self._lock:
+                self._lru = OrderedDict(
+                    (entry['relpath'], TierEntry(**entry)) for entry in data.get('entries', [])
+                )
+        except Exception as e:
+            logger.warning(f"Could not load tier state: {e}")
+
+    def save(self):
+        """Persist LRU order atomically"""
+        with self._lock:
+            data = {
+                'version': self.STATE_VERSION,
+                'cold_root': str(self.cold_root),
+                'entries': [asdict(entry) for entry in self._lru.values()]
+            }
+        try:
+            tmp_file = self.state_file.with_suffix('.json.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_file, self.state_file)
+        except OSError as e:
+            logger.warning(f"Could not save tier state: {e}")
+
+    def get_status(self) -> Dict:
+        usage = self.hot_usage()
+        return {
+            'hot_root': str(self.hot_root),
+            'cold_root': str(self.cold_root),
+            'cold_read_only': self.cold_read_only,
+            'hot_quota_gb': self.hot_quota_bytes / (1024**3),
+            'hot_used_gb': usage / (1024**3),
+            'hot_files': len(self._lru),
+            'pending_promotions': len(self._pending),
+            **self.stats
+        }
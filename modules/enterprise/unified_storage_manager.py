@@ -7,11 +7,15 @@ Handles all storage operations and path management across WebUIs
 import os
 import json
 import shutil
-import hashlib
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Callable
 import logging
 
+from modules.enterprise.storage_index import StorageIndex
+from modules.enterprise.hash_cache import HashCache, get_hash_cache
+from modules.enterprise.access_tracker import AccessTracker
+from modules.enterprise.event_log import EventLog, get_event_log
+
 logger = logging.getLogger(__name__)
 
 class UnifiedStorageManager:
@@ -57,27 +61,49 @@ class UnifiedStorageManager:
             }
         }
         
-        self.webui_mappings = {
-            'A1111': {
-                'models': 'models',
-                'outputs': 'outputs',
-                'embeddings': 'embeddings',
-                'extensions': 'extensions'
-            },
-            'ComfyUI': {
-                'models': 'models',
-                'output': 'output',
-                'input': 'input',
-                'custom_nodes': 'custom_nodes'
-            },
-            'Forge': {
-                'models': 'models',
-                'outputs': 'outputs',
-                'embeddings': 'embeddings',
-                'extensions': 'extensions'
-            }
-        }
+        # Optional live index, kept current by the storage watcher
+        self.index: Optional[StorageIndex] = None
+        self.watcher = None
+        self._hash_cache: Optional[HashCache] = None
+        self._access_tracker: Optional[AccessTracker] = None
+        
+        # Optional hot/cold tiering for model files
+        self.tiers = None
+        
+        # Optional disk-pressure watchdog; downloads wait on it
+        self.disk_monitor = None
         
+    @property
+    def hash_cache(self) -> HashCache:
+        """Shared digest cache persisted alongside the storage tree"""
+        if self._hash_cache is None:
+            self._hash_cache = get_hash_cache(self.storage_root / 'hash_cache.json')
+        return self._hash_cache
+    
+    @property
+    def access_tracker(self) -> AccessTracker:
+        """Last-access times used by quota eviction"""
+        if self._access_tracker is None:
+            self._access_tracker = AccessTracker(self.storage_root / 'access_log.json')
+        return self._access_tracker
+    
+    @property
+    def event_log(self) -> EventLog:
+        """Structured log of automatic storage actions"""
+        return get_event_log(self.storage_root / 'events.jsonl')
+    
+    def start_disk_monitor(self, **kwargs):
+        """Start the disk-pressure watchdog (see DiskPressureMonitor for options)"""
+        from modules.enterprise.disk_pressure import DiskPressureMonitor
+        
+        if self.disk_monitor is None:
+            self.disk_monitor = DiskPressureMonitor(self, **kwargs)
+        return self.disk_monitor.start()
+    
+    def stop_disk_monitor(self):
+        if self.disk_monitor:
+            self.disk_monitor.stop()
+    
     def initialize_storage(self) -> bool:
         """Initialize unified storage structure"""
         try:
@@ -127,48 +153,28 @@ class UnifiedStorageManager:
     
     def link_webui_storage(self, webui_path: Path, webui_type: str = 'A1111') -> bool:
         """Create symbolic links for WebUI compatibility"""
+        from modules.enterprise.link_planner import LinkPlanner
+        
         try:
             logger.info(f"Linking storage for {webui_type} at {webui_path}")
-            
-            if webui_type not in self.webui_mappings:
-                logger.warning(f"Unknown WebUI type: {webui_type}")
-                return False
-            
-            mappings = self.webui_mappings[webui_type]
-            
-            for webui_dir, storage_key in mappings.items():
-                webui_target = webui_path / webui_dir
-                
-                # Determine source path
-                if storage_key == 'models':
-                    source_path = self.storage_root / 'models'
-                elif storage_key in ['output', 'outputs']:
-                    source_path = self.storage_root / 'outputs'
-                elif storage_key == 'embeddings':
-                    source_path = self.storage_paths['models']['embeddings']
-                else:
-                    source_path = self.storage_root / storage_key
-                
-                # Backup existing directory if it exists
-                if webui_target.exists() and not webui_target.is_symlink():
-                    backup_path = webui_path / f"{webui_dir}_backup"
-                    shutil.move(str(webui_target), str(backup_path))
-                    logger.info(f"Backed up {webui_target} to {backup_path}")
-                
-                # Remove existing symlink if present
-                if webui_target.is_symlink():
-                    webui_target.unlink()
-                
-                # Create symbolic link
-                webui_target.symlink_to(source_path)
-                logger.info(f"Linked {webui_target} -> {source_path}")
-            
-            return True
+            result = LinkPlanner(self).link_webui(Path(webui_path), webui_type)
+            return not result['errors']
             
         except Exception as e:
             logger.error(f"Failed to link WebUI storage: {e}")
             return False
     
+    def seed_webui_hash_cache(self, webui_path: Path, webui_type: str = 'A1111',
+                              compute_missing: bool = False) -> int:
+        """Pre-seed the WebUI's cache.json with digests we already computed"""
+        from modules.enterprise.webui_hash_seeder import WebUIHashSeeder
+        
+        try:
+            return WebUIHashSeeder(self.hash_cache).seed(webui_path, webui_type, compute_missing)
+        except Exception as e:
+            logger.warning(f"Could not seed WebUI hash cache: {e}")
+            return 0
+    
     def get_storage_path(self, asset_type: str, sub_type: str = None) -> Path:
         """Get the appropriate storage path for an asset type"""
         if asset_type in self.storage_paths:
@@ -179,8 +185,86 @@ class UnifiedStorageManager:
         # Default fallback
         return self.storage_root / asset_type
     
+    def get_index(self, rescan: bool = False) -> StorageIndex:
+        """Get the storage index, loading or building it on first use"""
+        if self.index is None:
+            self.index = StorageIndex(self)
+            if not self.index.load():
+                rescan = True
+        
+        if rescan:
+            self.index.scan()
+            self.index.save()
+        
+        return self.index
+    
+    def start_watcher(self, callback: Callable = None, use_inotify: bool = True):
+        """Start the live storage watcher (inotify, or polling fallback)"""
+        from modules.enterprise.storage_watcher import StorageWatcher
+        
+        if self.watcher is None:
+            # Rescan so changes made while nobody was watching are picked up
+            self.watcher = StorageWatcher(self, self.get_index(rescan=True), use_inotify=use_inotify)
+        
+        if callback:
+            self.watcher.subscribe(callback)
+        
+        self.watcher.start()
+        return self.watcher
+    
+    def stop_watcher(self):
+        """Stop the live storage watcher and persist the index"""
+        if self.watcher:
+            self.watcher.stop()
+            self.watcher = None
+        if self.index:
+            self.index.save()
+    
+    def enable_tiered_storage(self, platform_manager=None, cold_root: Path = None,
+                              read_only: bool = False, hot_quota_gb: float = None):
+        """Put a local hot tier with a byte quota in front of persistent storage"""
+        from modules.enterprise.tiered_storage import TieredStorage
+        
+        if cold_root is None and platform_manager is not None:
+            persistent = platform_manager.get_persistent_storage(self.project_root)
+            if persistent:
+                cold_root, read_only = persistent
+        
+        if cold_root is None:
+            logger.info("No persistent store separate from local disk, tiered storage disabled")
+            return None
+        
+        if hot_quota_gb is None:
+            # Whatever is already local plus most of the remaining free space
+            self.storage_root.mkdir(parents=True, exist_ok=True)
+            free = shutil.disk_usage(self.storage_root).free
+            used = sum(
+                f.stat().st_size for path in self.storage_paths['models'].values() if path.exists()
+                for f in path.rglob('*') if f.is_file() and not f.is_symlink()
+            )
+            hot_quota_bytes = int(used + free * 0.8)
+        else:
+            hot_quota_bytes = int(hot_quota_gb * 1024**3)
+        
+        self.tiers = TieredStorage(
+            self.storage_root, Path(cold_root), hot_quota_bytes,
+            cold_read_only=read_only,
+            directories=list(self.storage_paths['models'].values())
+        )
+        self.tiers.scan()
+        self.tiers.enforce_quota()
+        
+        logger.info(f"Tiered storage enabled: hot {self.storage_root} "
+                    f"({hot_quota_bytes / 1024**3:.1f} GB quota) -> cold {cold_root}"
+                    f"{' (read-only)' if read_only else ''}")
+        return self.tiers
+    
     def get_storage_usage(self) -> Dict[str, Dict]:
         """Get storage usage statistics"""
+        # A watched index is always current, no need to walk the tree
+        if self.watcher and self.watcher.is_running:
+            return self.index.get_usage()
+        
         usage = {}
         
         for category, paths in self.storage_paths.items():
@@ -209,9 +293,8 @@ class UnifiedStorageManager:
         
         return usage
     
-    def organize_downloads(self, file_path: Path, asset_type: str) -> Path:
-        """Organize downloaded file into appropriate storage location"""
-        # Determine destination based on file type
+    def get_download_destination(self, asset_type: str) -> Path:
+        """Final directory for a downloaded asset, resolved before the transfer starts"""
         if asset_type == 'checkpoint':
             dest_dir = self.storage_paths['models']['checkpoints']
         elif asset_type == 'lora':
@@ -226,10 +309,22 @@ class UnifiedStorageManager:
             dest_dir = self.storage_root / 'downloads' / asset_type
         
         dest_dir.mkdir(parents=True, exist_ok=True)
-        dest_path = dest_dir / file_path.name
+        return dest_dir
+    
+    def organize_downloads(self, file_path: Path, asset_type: str) -> Path:
+        """Organize downloaded file into appropriate storage location"""
+        dest_path = self.get_download_destination(asset_type) / file_path.name
+        
+        # Downloads written in place are already organized
+        if file_path.parent.resolve() == dest_path.parent.resolve():
+            return file_path
         
-        # Move file to destination
-        shutil.move(str(file_path), str(dest_path))
+        # Rename when source and destination share a filesystem; only a
+        # cross-device move falls back to copy + delete
+        if file_path.stat().st_dev == dest_path.parent.stat().st_dev:
+            os.replace(file_path, dest_path)
+        else:
+            shutil.move(str(file_path), str(dest_path))
         logger.info(f"Organized {file_path.name} to {dest_path}")
         
         return dest_path
@@ -240,47 +335,32 @@ class UnifiedStorageManager:
             return False
         
         if expected_hash:
-            # Calculate file hash
-            sha256_hash = hashlib.sha256()
-            with open(file_path, "rb") as f:
-                for byte_block in iter(lambda: f.read(4096), b""):
-                    sha256_hash.update(byte_block)
-            
-            calculated_hash = sha256_hash.hexdigest()
-            return calculated_hash == expected_hash
+            # Only rehashes if the file changed since it was last hashed
+            return self.hash_cache.verify(file_path, expected_hash)
         
         # Basic integrity check
         return file_path.stat().st_size > 0
     
-    def cleanup_duplicates(self) -> int:
-        """Find and remove duplicate files"""
-        duplicates = []
-        hash_map = {}
-        
-        for category, paths in self.storage_paths.items():
-            if isinstance(paths, dict):
-                for name, path in paths.items():
-                    if path.exists():
-                        for file_path in path.rglob('*'):
-                            if file_path.is_file():
-                                file_hash = self._get_file_hash(file_path)
-                                if file_hash in hash_map:
-                                    duplicates.append(file_path)
-                                else:
-                                    hash_map[file_hash] = file_path
+    def get_all_storage_paths(self) -> List[Path]:
+        """Flatten the storage structure into a list of directories"""
+        paths = []
+        for category_paths in self.storage_paths.values():
+            if isinstance(category_paths, dict):
+                paths.extend(category_paths.values())
+            else:
+                paths.append(category_paths)
+        return paths
+    
+    def cleanup_duplicates(self, action: str = 'delete') -> int:
+        """Find duplicate files and hardlink, symlink or delete them"""
+        from modules.enterprise.deduplicator import StagedDeduplicator
         
-        # Remove duplicates
-        for dup_path in duplicates:
-            dup_path.unlink()
-            logger.info(f"Removed duplicate: {dup_path}")
+        deduplicator = StagedDeduplicator(hash_cache=self.hash_cache)
+        groups = deduplicator.find_duplicates(self.get_all_storage_paths())
+        result = deduplicator.resolve(groups, action=action)
         
-        return len(duplicates)
+        return result['resolved_files']
     
     def _get_file_hash(self, file_path: Path) -> str:
         """Get hash of a file"""
-        sha256_hash = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            # Read in chunks to handle large files
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        return sha256_hash.hexdigest()
\ No newline at end of file
+        return self.hash_cache.get_or_compute(file_path)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+WebUI Hash Seeder Module
+Pre-seeds A1111/Forge/ReForge cache.json so WebUIs skip rehashing shared models
+"""
+
+import os
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from modules.enterprise.hash_cache import HashCache
+from modules.enterprise.hashing import ADDNET_ALGORITHM
+
+logger = logging.getLogger(__name__)
+
+MODEL_EXTENSIONS = ('.safetensors', '.ckpt', '.pt', '.pth', '.bin')
+
+class WebUIHashSeeder:
+    """Writes WebUI-compatible hash entries from digests we already know
+
+    A1111 (and its Forge/ReForge forks) look up model hashes in cache.json
+    under a title such as "checkpoint/<relative path>" or "lora/<name>" and
+    reuse them as long as the file's mtime is not newer than the cached one.
+    Newer A1111 builds import cache.json into their cache/ directory on the
+    first start, which is exactly the fresh-install case this targets.
+    LoRA addnet digests are cached by DownloadManager when a LoRA lands;
+    seeding without `compute_missing` skips LoRAs that arrived any other way.
+    """
+
+    SUPPORTED_WEBUIS = ('A1111', 'Forge', 'ReForge')
+
+    # (WebUI model dir, title prefix, uses addnet hash for safetensors)
+    MODEL_DIRS = [
+        ('models/Stable-diffusion', 'checkpoint', False),
+        ('models/Lora', 'lora', True),
+        ('models/LyCORIS', 'lora', True),
+    ]
+
+    def __init__(self, hash_cache: HashCache):
+        self.hash_cache = hash_cache
+
+    def _iter_models(self, model_dir: Path):
+        """Yield model files below a (possibly symlinked) WebUI model dir"""
+        for dirpath, _, filenames in os.walk(model_dir, followlinks=True):
+            for filename in filenames:
+                if filename.lower().endswith(MODEL_EXTENSIONS):
+                    yield Path(dirpath) / filename
+
+    def collect_entries(self, webui_path: Path, compute_missing: bool = False) -> Dict[str, Dict]:
+        """Build {subsection: {title: {mtime, sha256}}} for the WebUI's models"""
+        sections: Dict[str, Dict] = {'hashes': {}, 'hashes-addnet': {}}
+        pending: List[Tuple[str, str, Path, str]] = []
+
+        for relative_dir, prefix, use_addnet in self.MODEL_DIRS:
+            model_dir = webui_path / relative_dir
+            if not model_dir.exists():
+                continue
+
+            for file_path in self._iter_models(model_dir):
+                if prefix == 'checkpoint':
+                    title = f"checkpoint/{file_path.relative_to(model_dir).as_posix()}"
+                else:
+                    title = f"lora/{file_path.stem}"
+
+                addnet = use_addnet and file_path.suffix.lower() == '.safetensors'
+                section = 'hashes-addnet' if addnet else 'hashes'
+                algorithm = ADDNET_ALGORITHM if addnet else 'sha256'
+                pending.append((section, title, file_path, algorithm))
+
+        for section, title, file_path, algorithm in pending:
+            if compute_missing:
+                try:
+                    digest = self.hash_cache.get_or_compute(file_path, algorithm)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Could not hash {file_path.name}: {e}")
+                    continue
+            else:
+                digest = self.hash_cache.lookup(file_path, algorithm)
+
+            if digest:
+                sections[section][title] = {
+                    'mtime': os.path.getmtime(file_path),
+                    'sha256': digest
+                }
+
+        return sections
+
+    def seed(self, webui_path: Path, webui_type: str = 'A1111',
+             compute_missing: bool = False) -> int:
+        """Merge known digests into <webui>/cache.json; returns entries written"""
+        if webui_type not in self.SUPPORTED_WEBUIS:
+            logger.debug(f"Hash cache seeding not supported for {webui_type}")
+            return 0
+
+        webui_path = Path(webui_path)
+        cache_file = Path(os.environ.get('SD_WEBUI_CACHE_FILE', webui_path / 'cache.json'))
+
+        if (webui_path / 'cache').is_dir():
+            logger.info(f"{webui_type} already has a cache/ directory; cache.json will not be imported")
+
+        cache_data = {}
+        if cache_file.exists():
+            try:
+                with open(cache_file, 'r', encoding='utf8') as f:
+                    cache_data = json.load(f)
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable {cache_file}: {e}")
+
+        written = 0
+        for section, entries in self.collect_entries(webui_path, compute_missing).items():
+            existing = cache_data.setdefault(section, {})
+            for title, entry in entries.items():
+                current = existing.get(title)
+                if current and current.get('sha256') == entry['sha256'] \
+                        and current.get('mtime', 0) >= entry['mtime']:
+                    continue
+                existing[title] = entry
+                written += 1
+
+        if written:
+            tmp_file = cache_file.with_name(cache_file.name + '.tmp')
+            with open(tmp_file, 'w', encoding='utf8') as f:
+                json.dump(cache_data, f, indent=4, ensure_ascii=False)
+            os.replace(tmp_file, cache_file)
+            logger.info(f"✅ Seeded {written} model hashes into {cache_file}")
+
+        return written
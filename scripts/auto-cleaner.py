@@ -11,7 +11,7 @@ import json
 import shutil
 import subprocess
 from typing import Dict, List, Tuple, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 import humanize
 import time
 import logging
@@ -44,6 +44,17 @@ except ImportError:
 
 # Import modules
 from modules.enterprise.unified_storage_manager import UnifiedStorageManager
+from modules.enterprise.deduplicator import StagedDeduplicator
+from modules.enterprise.model_inspector import ModelInspector
+from modules.enterprise.model_stager import ModelStager
+from modules.enterprise.storage_quota import StorageQuotaManager
+from modules.enterprise.output_archiver import OutputArchiver
+from modules.enterprise.retention_policy import RetentionEngine
+from modules.enterprise.cleanup_plan import CleanupItem, CleanupPlan, CleanupExecutor
+from modules.enterprise.hf_cache import HFCacheCleaner
+from modules.enterprise.storage_scanner import (
+    StorageScanner, UsageVisitor, SizeBucketVisitor, CategoryFilesVisitor, LargeFileVisitor
+)
 
 # Setup logging
 logging.basicConfig(
@@ -56,13 +67,26 @@ logger = logging.getLogger(__name__)
 # STORAGE CLEANER
 # ============================================================================
 
+# Cleanups run by "Complete Cleanup", in plan order
+CLEANUP_KINDS = ('duplicates', 'old_files', 'temp_files', 'cache')
+
 class StorageCleaner:
     """Advanced storage cleanup and optimization"""
     
+    # Scan results are reused by cleanup calls made within this many seconds
+    SCAN_TTL = 300
+    
+    # Smallest size the shared scan records as a "large file"
+    LARGE_FILE_FLOOR = 100 * 1024**2
+    
+    TEMP_PATTERNS = ['*.tmp', '*.temp', '*.cache', '*.bak', '*.backup', '~*']
+    
     def __init__(self):
         self.storage_manager = UnifiedStorageManager()
         self.cleanup_history = []
         self.protected_files = self._load_protected_files()
+        self._scan_results: Optional[Dict] = None
+        self._duplicate_groups: Optional[List] = None
         
     def _load_protected_files(self) -> List[str]:
         """Load list of protected files that should never be deleted"""
@@ -81,13 +105,75 @@ class StorageCleaner:
                 config = json.load(f)
                 if 'selected_models' in config:
                     protected.extend(config['selected_models'])
+                # Filenames behind the current session's model/LoRA selection
+                for filenames in ModelStager.resolve_selection(config).values():
+                    protected.extend(filenames)
         
         return protected
     
+    def scan_storage(self, force: bool = False) -> Dict:
+        """One pass over storage feeding every analyzer; cached for SCAN_TTL"""
+        if (not force and self._scan_results is not None
+                and time.time() - self._scan_results['scan_time'] < self.SCAN_TTL):
+            return self._scan_results
+        
+        paths = self.storage_manager.storage_paths
+        visitors = [
+            UsageVisitor(paths),
+            SizeBucketVisitor(),
+            CategoryFilesVisitor('output_files', 'outputs'),
+            LargeFileVisitor(self.LARGE_FILE_FLOOR),
+            CategoryFilesVisitor('temp_files', 'outputs', 'temp', patterns=self.TEMP_PATTERNS,
+                                 top_level_of=paths['outputs'].get('temp')),
+            CategoryFilesVisitor('cache_files', 'cache')
+        ]
+        self._scan_results = StorageScanner(self.storage_manager).scan(visitors)
+        self._duplicate_groups = None
+        return self._scan_results
+    
+    def _forget_paths(self, paths: List[str]):
+        """Drop removed files from the cached scan so later calls stay accurate"""
+        if self._scan_results is None or not paths:
+            return
+        removed = set(paths)
+        for key in ('output_files', 'large_files', 'temp_files', 'cache_files'):
+            self._scan_results[key] = [f for f in self._scan_results[key] if f.path not in removed]
+        for size, files in list(self._scan_results['size_buckets'].items()):
+            self._scan_results['size_buckets'][size] = [f for f in files if f[0] not in removed]
+        if self._duplicate_groups is not None:
+            for group in self._duplicate_groups:
+                group.paths = [p for p in group.paths if p not in removed]
+            self._duplicate_groups = [g for g in self._duplicate_groups if len(g.paths) > 1]
+    
+    def _unchanged_duplicate_groups(self) -> List:
+        """Cached duplicate groups minus files modified since the scan"""
+        scanned = {
+            path: (size, mtime)
+            for size, files in self.scan_storage()['size_buckets'].items()
+            for path, mtime in files
+        }
+        
+        groups = []
+        for group in self._find_duplicate_groups():
+            paths = []
+            for path in group.paths:
+                try:
+                    stat = os.stat(path, follow_symlinks=False)
+                except OSError:
+                    continue
+                if scanned.get(path) == (stat.st_size, stat.st_mtime):
+                    paths.append(path)
+            if len(paths) > 1:
+                group.paths = paths
+                groups.append(group)
+        return groups
+    
     def analyze_storage(self) -> Dict:
         """Analyze storage usage and identify cleanup opportunities"""
         logger.info("Analyzing storage...")
         
+        scan = self.scan_storage(force=True)
+        
         analysis = {
             'total_size': 0,
             'categories': {},
@@ -100,7 +186,7 @@ class StorageCleaner:
         }
         
         # Get storage usage by category
-        usage = self.storage_manager.get_storage_usage()
+        usage = scan['usage']
         
         for category, data in usage.items():
             if isinstance(data, dict):
@@ -147,255 +233,327 @@ class StorageCleaner:
     def _find_duplicates(self) -> List[Dict]:
         """Find duplicate files"""
         duplicates = []
-        hash_map = {}
         
-        for category_paths in self.storage_manager.storage_paths.values():
-            if isinstance(category_paths, dict):
-                paths = category_paths.values()
-            else:
-                paths = [category_paths]
-            
-            for path in paths:
-                if path.exists():
-                    for file_path in path.rglob('*'):
-                        if file_path.is_file() and file_path.name not in self.protected_files:
-                            file_hash = self._get_file_hash(file_path)
-                            
-                            if file_hash in hash_map:
-                                duplicates.append({
-                                    'path': str(file_path),
-                                    'duplicate_of': str(hash_map[file_hash]),
-                                    'size_gb': file_path.stat().st_size / (1024**3)
-                                })
-                            else:
-                                hash_map[file_hash] = file_path
+        for group in self._find_duplicate_groups():
+            for dup_path in group.duplicates:
+                if self._is_protected(dup_path):
+                    continue
+                duplicates.append({
+                    'path': dup_path,
+                    'duplicate_of': group.keeper,
+                    'size_gb': group.size / (1024**3)
+                })
         
         return duplicates
     
+    def _find_duplicate_groups(self) -> List:
+        """Find byte-identical file groups (size, partial hash, then full hash)"""
+        scan = self.scan_storage()
+        if self._duplicate_groups is None:
+            deduplicator = StagedDeduplicator(
+                is_protected=self._is_protected,
+                hash_cache=self.storage_manager.hash_cache
+            )
+            self._duplicate_groups = deduplicator.find_duplicates_in_buckets(scan['size_buckets'])
+        return self._duplicate_groups
+    
+    def _is_protected(self, path: str) -> bool:
+        """Check whether a file must never be removed"""
+        return Path(path).name in self.protected_files
+    
     def _find_old_files(self, days: int = 30) -> List[Dict]:
         """Find files older than specified days"""
-        old_files = []
-        cutoff_time = datetime.now() - timedelta(days=days)
-        
-        output_paths = self.storage_manager.storage_paths.get('outputs', {})
-        if isinstance(output_paths, dict):
-            paths = output_paths.values()
-        else:
-            paths = [output_paths]
-        
-        for path in paths:
-            if path.exists():
-                for file_path in path.rglob('*'):
-                    if file_path.is_file():
-                        mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
-                        if mtime < cutoff_time and file_path.name not in self.protected_files:
-                            old_files.append({
-                                'path': str(file_path),
-                                'age_days': (datetime.now() - mtime).days,
-                                'size_gb': file_path.stat().st_size / (1024**3)
-                            })
-        
-        return old_files
+        now = time.time()
+        cutoff = now - days * 86400
+        
+        return [
+            {
+                'path': f.path,
+                'age_days': int((now - f.mtime) // 86400),
+                'size_gb': f.size / (1024**3)
+            }
+            for f in self.scan_storage()['output_files']
+            if f.mtime < cutoff and os.path.basename(f.path) not in self.protected_files
+        ]
     
     def _find_large_files(self, size_gb: float = 1.0) -> List[Dict]:
         """Find files larger than specified size"""
-        large_files = []
-        
-        for category_paths in self.storage_manager.storage_paths.values():
-            if isinstance(category_paths, dict):
-                paths = category_paths.values()
-            else:
-                paths = [category_paths]
-            
-            for path in paths:
-                if path.exists():
-                    for file_path in path.rglob('*'):
-                        if file_path.is_file():
-                            file_size_gb = file_path.stat().st_size / (1024**3)
-                            if file_size_gb > size_gb:
-                                large_files.append({
-                                    'path': str(file_path),
-                                    'size_gb': file_size_gb,
-                                    'type': file_path.suffix
-                                })
-        
+        min_bytes = size_gb * 1024**3
+        if min_bytes >= self.LARGE_FILE_FLOOR:
+            candidates = self.scan_storage()['large_files']
+        else:
+            candidates = StorageScanner(self.storage_manager).scan(
+                [LargeFileVisitor(int(min_bytes))])['large_files']
+        
+        large_files = [
+            {
+                'path': f.path,
+                'size_gb': f.size / (1024**3),
+                'type': os.path.splitext(f.path)[1]
+            }
+            for f in candidates if f.size > min_bytes
+        ]
         return sorted(large_files, key=lambda x: x['size_gb'], reverse=True)
     
+    def _find_shrinkable_models(self) -> List[Dict]:
+        """Find fp32/bf16 or EMA checkpoints that convert to pruned fp16"""
+        shrinkable = []
+        
+        for path, info in ModelInspector(self.storage_manager).catalog(rescan=True):
+            if info['model_type'] != 'checkpoint' or self._is_protected(path):
+                continue
+            if info.get('dtype') in ('fp32', 'fp64', 'bf16') or info.get('has_ema'):
+                shrinkable.append({
+                    'path': path,
+                    'size_gb': os.path.getsize(path) / (1024**3),
+                    'dtype': info.get('dtype'),
+                    'has_ema': info.get('has_ema', False)
+                })
+        
+        return sorted(shrinkable, key=lambda x: x['size_gb'], reverse=True)
+    
     def _find_temp_files(self) -> List[Dict]:
         """Find temporary files"""
-        temp_files = []
-        temp_patterns = ['*.tmp', '*.temp', '*.cache', '*.bak', '*.backup', '~*']
-        
-        temp_dir = self.storage_manager.storage_paths['outputs'].get('temp')
-        if temp_dir and temp_dir.exists():
-            for pattern in temp_patterns:
-                for file_path in temp_dir.glob(pattern):
-                    if file_path.is_file():
-                        temp_files.append({
-                            'path': str(file_path),
-                            'size_gb': file_path.stat().st_size / (1024**3)
-                        })
-        
-        return temp_files
+        return [
+            {'path': f.path, 'size_gb': f.size / (1024**3)}
+            for f in self.scan_storage()['temp_files']
+        ]
     
     def _find_cache_files(self) -> List[Dict]:
         """Find cache files"""
-        cache_files = []
-        
-        cache_paths = self.storage_manager.storage_paths.get('cache', {})
-        if isinstance(cache_paths, dict):
-            for cache_type, cache_path in cache_paths.items():
-                if cache_path.exists():
-                    for file_path in cache_path.rglob('*'):
-                        if file_path.is_file():
-                            cache_files.append({
-                                'path': str(file_path),
-                                'type': cache_type,
-                                'size_gb': file_path.stat().st_size / (1024**3)
-                            })
-        
-        return cache_files
+        return [
+            {'path': f.path, 'type': f.subcategory, 'size_gb': f.size / (1024**3)}
+            for f in self.scan_storage()['cache_files']
+        ]
     
     def _get_file_hash(self, file_path: Path) -> str:
         """Calculate file hash"""
-        sha256_hash = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        return sha256_hash.hexdigest()
-    
-    def cleanup_duplicates(self) -> Dict:
-        """Remove duplicate files"""
-        logger.info("Cleaning up duplicate files...")
-        
-        duplicates = self._find_duplicates()
-        removed_count = 0
-        freed_space = 0
-        
-        for dup in duplicates:
-            try:
-                file_path = Path(dup['path'])
-                if file_path.exists():
-                    size = file_path.stat().st_size
-                    file_path.unlink()
-                    removed_count += 1
-                    freed_space += size
-                    logger.info(f"Removed duplicate: {file_path.name}")
-            except Exception as e:
-                logger.error(f"Failed to remove {dup['path']}: {e}")
+        return self.storage_manager.hash_cache.get_or_compute(file_path)
+    
+    def cleanup_duplicates(self, action: str = 'delete') -> Dict:
+        """Remove duplicate files, or replace them with hardlinks/symlinks"""
+        logger.info(f"Cleaning up duplicate files ({action})...")
+        
+        deduplicator = StagedDeduplicator(
+            is_protected=self._is_protected,
+            hash_cache=self.storage_manager.hash_cache
+        )
+        groups = self._unchanged_duplicate_groups()
+        resolved = deduplicator.resolve(groups, action=action)
+        self._forget_paths([p for g in groups for p in g.duplicates if not os.path.lexists(p)])
         
         result = {
-            'removed_files': removed_count,
-            'freed_space_gb': freed_space / (1024**3)
+            'removed_files': resolved['resolved_files'],
+            'freed_space_gb': resolved['freed_bytes'] / (1024**3),
+            'action': action
         }
         
         self._log_cleanup_action('duplicates', result)
         return result
     
-    def cleanup_old_files(self, days: int = 30) -> Dict:
+    def plan_cleanup(self, kinds: Tuple[str, ...] = CLEANUP_KINDS, days: int = 30) -> CleanupPlan:
+        """Everything the given cleanups would remove, from the cached scan"""
+        scan = self.scan_storage()
+        items = []
+        
+        if 'duplicates' in kinds:
+            for group in self._unchanged_duplicate_groups():
+                items.extend(
+                    CleanupItem(path, group.size, 'duplicates')
+                    for path in group.duplicates if not self._is_protected(path)
+                )
+        
+        if 'old_files' in kinds:
+            cutoff = time.time() - days * 86400
+            items.extend(
+                CleanupItem(f.path, f.size, 'old_files')
+                for f in scan['output_files']
+                if f.mtime < cutoff and os.path.basename(f.path) not in self.protected_files
+            )
+        
+        if 'temp_files' in kinds:
+            items.extend(CleanupItem(f.path, f.size, 'temp_files') for f in scan['temp_files'])
+        
+        if 'cache' in kinds:
+            items.extend(self._cache_items(scan['cache_files']))
+        
+        return CleanupPlan.from_items(items)
+    
+    def _cache_items(self, cache_files) -> List[CleanupItem]:
+        """HF hub revisions by last access, other caches as whole trees per root"""
+        hf_cache = HFCacheCleaner(self.storage_manager)
+        hub_roots = hf_cache.hub_roots()
+        items = list(hf_cache.plan().items)
+        
+        tops: Dict[str, List[int]] = {}
+        for f in cache_files:
+            if hf_cache.is_managed(f.path, hub_roots):
+                continue
+            root = str(self.storage_manager.storage_paths['cache'][f.subcategory])
+            top = os.path.join(root, os.path.relpath(f.path, root).split(os.sep)[0])
+            totals = tops.setdefault(top, [0, 0])
+            totals[0] += f.size
+            totals[1] += 1
+        
+        items.extend(
+            CleanupItem(top, size, 'cache', is_tree=os.path.isdir(top) and not os.path.islink(top),
+                        file_count=count)
+            for top, (size, count) in tops.items()
+        )
+        return items
+    
+    def execute_plan(self, plan: CleanupPlan, dry_run: bool = True,
+                     progress_callback=None) -> Dict:
+        """Run a cleanup plan; a dry run only reports what would be freed"""
+        executed = CleanupExecutor(progress_callback=progress_callback).execute(plan, dry_run=dry_run)
+        
+        if not dry_run:
+            if any(item.is_tree for item in plan.items):
+                # Tree removals are not itemised; the next call rescans
+                self._scan_results = None
+            else:
+                self._forget_paths(executed['removed_paths'])
+        return executed
+    
+    def _run_cleanup(self, kind: str, dry_run: bool, **plan_args) -> Dict:
+        executed = self.execute_plan(self.plan_cleanup((kind,), **plan_args), dry_run=dry_run)
+        totals = executed['by_reason'].get(kind, {'files': 0, 'bytes': 0})
+        result = {
+            'removed_files': totals['files'],
+            'freed_space_gb': totals['bytes'] / (1024**3),
+            'dry_run': dry_run
+        }
+        if not dry_run:
+            self._log_cleanup_action(kind, result)
+        return result
+    
+    def cleanup_old_files(self, days: int = 30, dry_run: bool = True) -> Dict:
         """Remove old files"""
         logger.info(f"Cleaning up files older than {days} days...")
+        return self._run_cleanup('old_files', dry_run, days=days)
+    
+    def cleanup_temp_files(self, dry_run: bool = True) -> Dict:
+        """Remove temporary files"""
+        logger.info("Cleaning up temporary files...")
+        return self._run_cleanup('temp_files', dry_run)
+    
+    def cleanup_cache(self, dry_run: bool = True) -> Dict:
+        """Clear caches; HF hub repos lose only idle, unneeded revisions"""
+        logger.info("Clearing cache...")
+        return self._run_cleanup('cache', dry_run)
+    
+    def archive_old_outputs(self, days: int = 30) -> Dict:
+        """Move outputs older than `days` into deduplicated zip bundles"""
+        logger.info(f"Archiving outputs older than {days} days...")
         
-        old_files = self._find_old_files(days)
-        removed_count = 0
-        freed_space = 0
+        archived = OutputArchiver(self.storage_manager).archive(older_than_days=days)
         
-        for old_file in old_files:
-            try:
-                file_path = Path(old_file['path'])
-                if file_path.exists():
-                    size = file_path.stat().st_size
-                    file_path.unlink()
-                    removed_count += 1
-                    freed_space += size
-                    logger.info(f"Removed old file: {file_path.name}")
-            except Exception as e:
-                logger.error(f"Failed to remove {old_file['path']}: {e}")
+        result = {
+            'archived_files': archived['archived_files'],
+            'deduplicated_files': archived['deduplicated_files'],
+            'freed_space_gb': archived['freed_bytes'] / (1024**3)
+        }
+        
+        self._log_cleanup_action('archive_outputs', result)
+        return result
+    
+    def apply_retention(self, dry_run: bool = True) -> Dict:
+        """Evaluate configs/retention_rules.json and carry out the matched actions"""
+        logger.info(f"Applying retention rules{' (dry run)' if dry_run else ''}...")
+        
+        engine = RetentionEngine(self.storage_manager, is_protected=self._is_protected)
+        applied = engine.apply(engine.evaluate(), dry_run=dry_run)
         
         result = {
-            'removed_files': removed_count,
-            'freed_space_gb': freed_space / (1024**3)
+            'processed_files': applied['processed_files'],
+            'freed_space_gb': applied['freed_bytes'] / (1024**3),
+            'rules': applied['rules'],
+            'dry_run': dry_run
         }
         
-        self._log_cleanup_action('old_files', result)
+        if not dry_run:
+            self._scan_results = None
+            self._log_cleanup_action('retention', result)
         return result
     
-    def cleanup_temp_files(self) -> Dict:
-        """Remove temporary files"""
-        logger.info("Cleaning up temporary files...")
+    def shrink_library(self, prune_ema: bool = True) -> Dict:
+        """Convert fp32/EMA checkpoints to pruned fp16 in place"""
+        from modules.enterprise.model_converter import shrink_checkpoint
+        
+        logger.info("Shrinking model library...")
         
-        temp_files = self._find_temp_files()
-        removed_count = 0
+        converted_count = 0
         freed_space = 0
         
-        for temp_file in temp_files:
+        for model in self._find_shrinkable_models():
             try:
-                file_path = Path(temp_file['path'])
-                if file_path.exists():
-                    size = file_path.stat().st_size
-                    file_path.unlink()
-                    removed_count += 1
-                    freed_space += size
-                    logger.info(f"Removed temp file: {file_path.name}")
+                converted = shrink_checkpoint(model['path'], prune_ema=prune_ema)
+                if converted:
+                    converted_count += 1
+                    freed_space += converted['saved_bytes']
             except Exception as e:
-                logger.error(f"Failed to remove {temp_file['path']}: {e}")
+                logger.error(f"Failed to shrink {model['path']}: {e}")
         
         result = {
-            'removed_files': removed_count,
+            'converted_files': converted_count,
             'freed_space_gb': freed_space / (1024**3)
         }
         
-        self._log_cleanup_action('temp_files', result)
+        self._log_cleanup_action('shrink_library', result)
         return result
     
-    def cleanup_cache(self) -> Dict:
-        """Clear cache files"""
-        logger.info("Clearing cache...")
-        
-        cache_files = self._find_cache_files()
-        removed_count = 0
-        freed_space = 0
+    def get_quota_manager(self) -> StorageQuotaManager:
+        """Quota manager that never evicts protected or session-selected files"""
+        return StorageQuotaManager(self.storage_manager, is_protected=self._is_protected)
+    
+    def cleanup_over_quota(self, free_gb: float = 0, dry_run: bool = True) -> Dict:
+        """Evict least recently used files until every category fits its quota"""
+        logger.info("Enforcing storage quotas...")
         
-        for cache_file in cache_files:
-            try:
-                file_path = Path(cache_file['path'])
-                if file_path.exists():
-                    size = file_path.stat().st_size
-                    file_path.unlink()
-                    removed_count += 1
-                    freed_space += size
-            except Exception as e:
-                logger.error(f"Failed to remove cache file: {e}")
+        # Quota decisions need a current view of the tree
+        self.storage_manager.get_index(rescan=True)
+        evicted = self.get_quota_manager().evict(int(free_gb * 1024**3), dry_run=dry_run)
         
         result = {
-            'removed_files': removed_count,
-            'freed_space_gb': freed_space / (1024**3)
+            'removed_files': evicted['evicted_files'],
+            'demoted_files': evicted['demoted_files'],
+            'freed_space_gb': evicted['freed_bytes'] / (1024**3),
+            'dry_run': dry_run
         }
         
-        self._log_cleanup_action('cache', result)
+        if not dry_run:
+            self._log_cleanup_action('quota_eviction', result)
         return result
     
-    def cleanup_all(self) -> Dict:
-        """Perform complete cleanup"""
+    def cleanup_all(self, dry_run: bool = True, days: int = 30) -> Dict:
+        """Perform complete cleanup from one scan and one plan"""
         logger.info("Performing complete cleanup...")
         
-        results = {
-            'duplicates': self.cleanup_duplicates(),
-            'old_files': self.cleanup_old_files(),
-            'temp_files': self.cleanup_temp_files(),
-            'cache': self.cleanup_cache()
-        }
+        plan = self.plan_cleanup(CLEANUP_KINDS, days=days)
+        executed = self.execute_plan(plan, dry_run=dry_run)
+        
+        results = {}
+        for kind in CLEANUP_KINDS:
+            totals = executed['by_reason'].get(kind, {'files': 0, 'bytes': 0})
+            results[kind] = {
+                'removed_files': totals['files'],
+                'freed_space_gb': totals['bytes'] / (1024**3)
+            }
+            if not dry_run:
+                self._log_cleanup_action(kind, results[kind])
         
-        total_freed = sum(r['freed_space_gb'] for r in results.values())
-        total_files = sum(r['removed_files'] for r in results.values())
+        total_freed = executed['freed_bytes'] / (1024**3)
+        total_files = executed['removed_files']
         
         summary = {
             'total_files_removed': total_files,
             'total_space_freed_gb': total_freed,
+            'dry_run': dry_run,
             'details': results
         }
         
-        logger.info(f"✅ Cleanup complete: Removed {total_files} files, freed {total_freed:.2f} GB")
+        verb = "Would remove" if dry_run else "Removed"
+        logger.info(f"✅ Cleanup complete: {verb} {total_files} files, freed {total_freed:.2f} GB")
         return summary
     
     def _log_cleanup_action(self, action_type: str, result: Dict):
@@ -521,26 +679,70 @@ def render_streamlit_interface():
         with col2:
             if st.button("📅 Remove Old Files", key="remove_old"):
                 with st.spinner("Removing old files..."):
-                    result = cleaner.cleanup_old_files()
+                    result = cleaner.cleanup_old_files(dry_run=False)
                     st.success(f"Removed {result['removed_files']} files, freed {result['freed_space_gb']:.2f} GB")
         
         with col3:
             if st.button("🗑️ Clear Temp", key="clear_temp"):
                 with st.spinner("Clearing temp files..."):
-                    result = cleaner.cleanup_temp_files()
+                    result = cleaner.cleanup_temp_files(dry_run=False)
                     st.success(f"Removed {result['removed_files']} files, freed {result['freed_space_gb']:.2f} GB")
         
         with col4:
             if st.button("💾 Clear Cache", key="clear_cache"):
                 with st.spinner("Clearing cache..."):
-                    result = cleaner.cleanup_cache()
+                    result = cleaner.cleanup_cache(dry_run=False)
                     st.success(f"Removed {result['removed_files']} files, freed {result['freed_space_gb']:.2f} GB")
         
+        # Quotas (configs/storage_quotas.json) with least-recently-used eviction
+        quota_usage = cleaner.get_quota_manager().get_usage()
+        quota_cols = st.columns(len(quota_usage))
+        for col, (group, usage) in zip(quota_cols, quota_usage.items()):
+            with col:
+                limit = f" / {usage['quota_gb']:.0f}" if usage['quota_gb'] is not None else ""
+                st.metric(f"Quota: {group}", f"{usage['used_gb']:.1f}{limit} GB",
+                          delta=f"-{usage['over_gb']:.1f} GB over" if usage['over_gb'] else None)
+        
+        if st.button("♻️ Enforce Quotas (LRU)", key="enforce_quotas"):
+            with st.spinner("Evicting least recently used files..."):
+                result = cleaner.cleanup_over_quota(dry_run=False)
+                st.success(f"Evicted {result['removed_files']} files, demoted {result['demoted_files']}, "
+                           f"freed {result['freed_space_gb']:.2f} GB")
+        
+        # Retention rules (configs/retention_rules.json): preview, then apply
+        if st.button("📜 Preview Retention Rules", key="preview_retention"):
+            preview = cleaner.apply_retention(dry_run=True)
+            st.info(f"{preview['processed_files']} files match, {preview['freed_space_gb']:.2f} GB")
+            st.json(preview['rules'])
+        
+        if st.button("📜 Apply Retention Rules", key="apply_retention"):
+            with st.spinner("Applying retention rules..."):
+                result = cleaner.apply_retention(dry_run=False)
+                st.success(f"Processed {result['processed_files']} files, freed {result['freed_space_gb']:.2f} GB")
+        
+        if st.button("📦 Archive Old Outputs", key="archive_outputs"):
+            with st.spinner("Archiving outputs older than 30 days..."):
+                result = cleaner.archive_old_outputs()
+                st.success(f"Archived {result['archived_files']} outputs "
+                           f"({result['deduplicated_files']} duplicates), freed {result['freed_space_gb']:.2f} GB")
+        
+        # Model shrinking rewrites checkpoints, so it is never part of "All"
+        if st.button("🗜️ Shrink Library (fp16, prune EMA)", key="shrink_library"):
+            with st.spinner("Converting checkpoints to pruned fp16..."):
+                result = cleaner.shrink_library()
+                st.success(f"Converted {result['converted_files']} models, freed {result['freed_space_gb']:.2f} GB")
+        
         # Complete cleanup
         st.markdown("---")
+        if st.button("🔎 Preview Complete Cleanup", key="preview_cleanup"):
+            preview = cleaner.cleanup_all(dry_run=True)
+            st.info(f"Would remove {preview['total_files_removed']} files, "
+                    f"freeing {preview['total_space_freed_gb']:.2f} GB")
+            st.json(preview['details'])
+        
         if st.button("🧹 Complete Cleanup (All)", key="cleanup_all", type="primary"):
             with st.spinner("Performing complete cleanup..."):
-                summary = cleaner.cleanup_all()
+                summary = cleaner.cleanup_all(dry_run=False)
                 st.success(f"✅ Complete! Removed {summary['total_files_removed']} files, freed {summary['total_space_freed_gb']:.2f} GB")
                 
                 # Show details
@@ -566,7 +768,7 @@ Storage Analysis:
 """
     
     def cleanup_all():
-        summary = cleaner.cleanup_all()
+        summary = cleaner.cleanup_all(dry_run=False)
         return f"✅ Removed {summary['total_files_removed']} files, freed {summary['total_space_freed_gb']:.2f} GB"
     
     with gr.Blocks(title="Storage Cleaner") as interface:
@@ -14,6 +14,11 @@ from datetime import datetime
 import hashlib
 import time
 
+try:
+    from modules.enterprise.download_calibration import load_cached_tuning
+except ImportError:
+    load_cached_tuning = None
+
 class CivitAIBrowser:
     """Browse and download models from CivitAI"""
     
@@ -30,6 +35,9 @@ class CivitAIBrowser:
         # Load cache
         self.cache = self._load_cache()
         
+        # Connection count and buffer size measured by the downloader, if it ran
+        self.tuning = load_cached_tuning() if load_cached_tuning else None
+        
     def _load_cache(self) -> Dict:
         """Load search cache"""
         if self.cache_file.exists():
@@ -216,12 +224,13 @@ class CivitAIBrowser:
             return False
     
     def _download_with_aria2(self, url: str, filepath: Path) -> bool:
-        """Download using aria2 with 16 connections"""
+        """Download using aria2 with the calibrated number of connections"""
+        segments = str(self.tuning.segments if self.tuning else 16)
         try:
             cmd = [
                 'aria2c',
-                '-x', '16',  # 16 connections
-                '-s', '16',  # 16 splits
+                '-x', segments,  # connections
+                '-s', segments,  # splits
                 '--file-allocation=none',
                 '--console-log-level=error',
                 '--summary-interval=10',
@@ -251,7 +260,8 @@ class CivitAIBrowser:
             
             with open(filepath, 'wb') as f:
                 downloaded = 0
-                for chunk in response.iter_content(chunk_size=8192):
+                chunk_size = self.tuning.chunk_size if self.tuning else 8192
+                for chunk in response.iter_content(chunk_size=chunk_size):
                     if chunk:
                         f.write(chunk)
                         downloaded += len(chunk)
@@ -58,6 +58,10 @@ sys.path.insert(0, str(project_root))
 # Import modules
 from modules.enterprise.unified_storage_manager import UnifiedStorageManager
 from modules.enterprise.download_manager import DownloadManager, DownloadTask
+from modules.enterprise.model_inspector import ModelInspector
+from modules.core.telemetry import get_telemetry_sampler
+from modules.core.platform_manager import get_platform_manager
+from modules.enterprise.download_calibration import DownloadCalibrator, publish_staged
 
 # Import data sources
 from scripts._models_data import model_list as sd15_models
@@ -86,7 +90,13 @@ DOWNLOAD_CONFIG = {
     'auto_organize': True,
     'preserve_filenames': True,
     'skip_existing': True,
-    'verify_checksums': True
+    'verify_checksums': True,
+    'shrink_checkpoints': False,  # Convert fp32/EMA checkpoints to pruned fp16 after download
+    'disk_wait_timeout': 900,     # Seconds a download waits for the disk watchdog before failing
+    # Measured per platform by DownloadCalibrator on first run
+    'segments': 16,
+    'min_split_mb': 1,
+    'staging_dir': None
 }
 
 MODEL_CATEGORIES = {
@@ -148,7 +158,25 @@ class AdvancedDownloadOrchestrator:
     
     def __init__(self):
         self.storage_manager = UnifiedStorageManager()
-        self.download_manager = DownloadManager(self.storage_manager, DOWNLOAD_CONFIG['max_concurrent'])
+        
+        # Concurrency, segments and buffers measured once per platform
+        tuning = DownloadCalibrator(self.storage_manager, get_platform_manager().platform).tuning()
+        DOWNLOAD_CONFIG.update({
+            'max_concurrent': tuning.max_concurrent,
+            'chunk_size': tuning.chunk_size,
+            'segments': tuning.segments,
+            'min_split_mb': tuning.min_split_mb,
+            'staging_dir': tuning.staging_dir
+        })
+        
+        self.download_manager = DownloadManager(
+            self.storage_manager,
+            DOWNLOAD_CONFIG['max_concurrent'],
+            shrink_checkpoints=DOWNLOAD_CONFIG['shrink_checkpoints'],
+            chunk_size=DOWNLOAD_CONFIG['chunk_size'],
+            staging_dir=DOWNLOAD_CONFIG['staging_dir'],
+            disk_wait_timeout=DOWNLOAD_CONFIG['disk_wait_timeout']
+        )
         self.session_config = self._load_session_config()
         self.download_queue = queue.PriorityQueue()
         self.active_downloads = {}
@@ -160,6 +188,12 @@ class AdvancedDownloadOrchestrator:
         # Initialize storage
         self.storage_manager.initialize_storage()
         
+        # Reclaim space (and hold new downloads) before the disk fills up
+        monitor = self.storage_manager.start_disk_monitor()
+        if DOWNLOAD_CONFIG['staging_dir']:
+            # Partial files land there, so it can fill up too
+            monitor.watch(DOWNLOAD_CONFIG['staging_dir'])
+        
         # Audio notification paths
         self.audio_paths = {
             'start': project_root / 'assets' / 'audio' / 'download-start.mp3',
@@ -193,6 +227,29 @@ class AdvancedDownloadOrchestrator:
         with open(config_file, 'w') as f:
             json.dump(self.session_config, f, indent=2)
     
+    def _auth_headers(self, url: str) -> Dict[str, str]:
+        """Host-specific headers for CivitAI and HuggingFace downloads"""
+        headers = {}
+        if 'civitai.com' in url:
+            headers['User-Agent'] = 'CivitaiLink:Automatic1111'
+            civitai_token = self.session_config.get('civitai_token')
+            if civitai_token:
+                headers['Authorization'] = f'Bearer {civitai_token}'
+        if 'huggingface.co' in url:
+            hf_token = self.session_config.get('hf_token')
+            if hf_token:
+                headers['Authorization'] = f'Bearer {hf_token}'
+        return headers
+    
+    def _remote_size(self, url: str, headers: Dict[str, str]) -> Optional[int]:
+        """Content-Length after redirects, or None if the server does not say"""
+        try:
+            response = requests.head(url, headers=headers, allow_redirects=True, timeout=15)
+            size = int(response.headers.get('Content-Length', 0))
+            return size if response.ok and size > 0 else None
+        except (requests.RequestException, ValueError):
+            return None
+    
     def download_with_aria2c(self, url: str, destination: Path, filename: Optional[str] = None) -> bool:
         """Download using aria2c for maximum speed"""
         try:
@@ -201,47 +258,64 @@ class AdvancedDownloadOrchestrator:
                 logger.warning("aria2c not found, falling back to standard download")
                 return False
             
-            # Prepare aria2c command
+            # Don't start while the watchdog is reclaiming space
+            monitor = self.storage_manager.disk_monitor
+            if monitor and not monitor.wait_for_space(DOWNLOAD_CONFIG['disk_wait_timeout']):
+                logger.error(f"Disk still full after {DOWNLOAD_CONFIG['disk_wait_timeout']}s, "
+                             f"not starting download: {url}")
+                return False
+            
+            headers = self._auth_headers(url)
+            
+            # Segmented writes are slow on network mounts; stage on faster disk if
+            # calibrated and the file is known to fit there
+            download_dir = destination
+            if filename and DOWNLOAD_CONFIG['staging_dir']:
+                staging_dir = Path(DOWNLOAD_CONFIG['staging_dir'])
+                size = self._remote_size(url, headers)
+                try:
+                    staging_dir.mkdir(parents=True, exist_ok=True)
+                    if size and shutil.disk_usage(staging_dir).free > size * 1.1:
+                        download_dir = staging_dir
+                except OSError:
+                    pass
+            
+            # Prepare aria2c command (connection counts from calibration)
+            segments = DOWNLOAD_CONFIG['segments']
             aria2_cmd = [
                 'aria2c',
                 '--allow-overwrite=true',
                 '--console-log-level=error',
                 '--summary-interval=5',
                 '-c',  # Continue/resume
-                '-x16',  # Max 16 connections per server
-                '-s16',  # Split into 16 segments
-                '-k1M',  # 1MB piece size
-                '-j5',  # 5 parallel downloads
-                '--dir=' + str(destination),
+                f"-x{segments}",  # Connections per server
+                f"-s{segments}",  # Segments per file
+                f"-k{DOWNLOAD_CONFIG['min_split_mb']}M",  # Minimum segment size
+                f"-j{DOWNLOAD_CONFIG['max_concurrent']}",  # Parallel downloads
+                '--dir=' + str(download_dir),
             ]
             
-            # Add filename if specified
+            # Add filename if specified; write to a hidden temp name in the
+            # final directory and publish it with an atomic rename
             if filename:
-                aria2_cmd.extend(['-o', filename])
-            
-            # Add CivitAI optimization
-            if 'civitai.com' in url:
-                aria2_cmd.extend(['--header', 'User-Agent: CivitaiLink:Automatic1111'])
-                # Add token if available
-                civitai_token = self.session_config.get('civitai_token')
-                if civitai_token:
-                    aria2_cmd.extend(['--header', f'Authorization: Bearer {civitai_token}'])
+                temp_name = f".{filename}.part"
+                aria2_cmd.extend(['-o', temp_name])
             
-            # Add HuggingFace token if available
-            if 'huggingface.co' in url:
-                hf_token = self.session_config.get('hf_token')
-                if hf_token:
-                    aria2_cmd.extend(['--header', f'Authorization: Bearer {hf_token}'])
+            # CivitAI user agent and CivitAI/HuggingFace tokens
+            for name, value in headers.items():
+                aria2_cmd.extend(['--header', f'{name}: {value}'])
             
             # Add the URL
             aria2_cmd.append(url)
             
-            logger.info(f"Downloading with aria2c (16x speed): {url}")
+            logger.info(f"Downloading with aria2c ({segments}x segments): {url}")
             
             # Execute aria2c
             result = subprocess.run(aria2_cmd, capture_output=True, text=True)
             
             if result.returncode == 0:
+                if filename:
+                    publish_staged(download_dir / temp_name, destination / filename)
                 logger.info(f"✅ Downloaded successfully with aria2c: {filename or url}")
                 return True
             else:
@@ -254,13 +328,25 @@ class AdvancedDownloadOrchestrator:
     
     async def download_with_metadata(self, url: str, metadata: DownloadMetadata = None) -> DownloadTask:
         """Download with enhanced metadata"""
-        destination = self.storage_manager.get_storage_path('models', metadata.model_type if metadata else 'checkpoint')
+        # Resolve the final directory before downloading so nothing is moved afterwards
+        destination = self.storage_manager.get_download_destination(metadata.model_type if metadata else 'checkpoint')
+        loop = asyncio.get_event_loop()
+        
+        # Wait for the disk watchdog off the event loop, and not forever
+        monitor = self.storage_manager.disk_monitor
+        timeout = DOWNLOAD_CONFIG['disk_wait_timeout']
+        if monitor and not await loop.run_in_executor(None, monitor.wait_for_space, timeout):
+            error = f"Disk still above the high watermark after {timeout}s of reclaiming"
+            logger.error(f"Download not started: {error}")
+            return DownloadTask(url=url, destination=destination, status='failed', error=error)
         
         # Try aria2c first for speed
         if shutil.which('aria2c'):
             filename = metadata.model_name if metadata else None
-            if self.download_with_aria2c(url, destination, filename):
+            if await loop.run_in_executor(None, self.download_with_aria2c, url, destination, filename):
                 logger.info(f"✅ Fast download complete with aria2c")
+                if filename and metadata:
+                    await self.download_manager.cache_webui_hashes(destination / filename, metadata.model_type)
                 # Create completed task for tracking
                 task = DownloadTask(
                     url=url,
@@ -382,7 +468,7 @@ class AdvancedDownloadOrchestrator:
     
     async def _wait_for_downloads(self, tasks: List[DownloadTask]):
         """Wait for multiple downloads to complete"""
-        while any(t.status in ['pending', 'downloading', 'retry'] for t in tasks):
+        while any(t.status in ['pending', 'paused', 'downloading', 'retry'] for t in tasks):
             await asyncio.sleep(1)
     
     def _play_audio(self, audio_type: str):
@@ -515,7 +601,7 @@ class ErrorHandler:
         # Try to free up space
         from scripts.auto_cleaner import StorageCleaner
         cleaner = StorageCleaner()
-        freed = cleaner.cleanup_temp_files()
+        freed = cleaner.cleanup_temp_files(dry_run=False)
         
         if freed['freed_space_gb'] > 1:  # Freed at least 1GB
             return True  # Retry
@@ -950,6 +1036,31 @@ class EnhancedDownloadInterface:
             
             # Table view
             st.dataframe(df, use_container_width=True)
+        
+        # Model catalog from safetensors headers (cached in the storage index)
+        st.markdown("#### 🧬 Model Catalog")
+        catalog = ModelInspector(self.orchestrator.storage_manager).catalog()
+        
+        if catalog:
+            base_models = sorted({info.get('base_model') or 'Unknown' for _, info in catalog})
+            selected_base = st.selectbox("Base Model", ['All'] + base_models, key="catalog_base_model")
+            
+            rows = [
+                {
+                    'File': Path(path).name,
+                    'Type': info['model_type'],
+                    'Base': info.get('base_model') or 'Unknown',
+                    'Dtype': info.get('dtype'),
+                    'Params (M)': round(info.get('parameter_count', 0) / 1e6, 1),
+                    'Inpainting': info.get('inpainting', False),
+                    'Pruned': info.get('pruned', True)
+                }
+                for path, info in catalog
+                if selected_base == 'All' or (info.get('base_model') or 'Unknown') == selected_base
+            ]
+            st.dataframe(pd.DataFrame(rows), use_container_width=True)
+        else:
+            st.info("No .safetensors models in storage yet")
     
     def _render_performance_metrics(self):
         """Render performance metrics"""
@@ -997,6 +1108,50 @@ class EnhancedDownloadInterface:
             )
             
             st.plotly_chart(fig, use_container_width=True)
+        
+        self._render_resource_telemetry()
+    
+    def _render_resource_telemetry(self):
+        """Render live system resources from the background sampler"""
+        import streamlit as st
+        import plotly.graph_objects as go
+        
+        st.markdown("### 🖥️ System Resources")
+        
+        # Started once per process; reruns only read its snapshot
+        sampler = get_telemetry_sampler().start()
+        snapshot = sampler.snapshot()
+        if not snapshot:
+            st.info("Collecting resource samples...")
+            return
+        
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("CPU", f"{snapshot.get('cpu_percent', 0):.0f}%")
+        with col2:
+            st.metric("RAM", f"{snapshot.get('ram_used_gb', 0):.1f} GB")
+        with col3:
+            st.metric("Disk Write", f"{snapshot.get('disk_write_mbps', 0):.1f} MB/s")
+        with col4:
+            st.metric("Network In", f"{snapshot.get('net_recv_mbps', 0):.1f} MB/s")
+        
+        for gpu in snapshot.get('gpus', []):
+            st.caption(f"GPU {gpu['index']}: {gpu['util_percent'] or 0:.0f}% util, "
+                       f"{gpu['vram_used_mb'] or 0:.0f}/{gpu['vram_total_mb'] or 0:.0f} MB VRAM")
+        
+        fig = go.Figure()
+        for metric, name in (('cpu_percent', 'CPU %'), ('gpu0_util_percent', 'GPU %'),
+                             ('net_recv_mbps', 'Net MB/s'), ('disk_write_mbps', 'Disk MB/s')):
+            points = sampler.history(metric, seconds=600)
+            if points:
+                fig.add_trace(go.Scatter(
+                    x=[datetime.fromtimestamp(t) for t, _ in points],
+                    y=[v for _, v in points],
+                    mode='lines',
+                    name=name
+                ))
+        fig.update_layout(title='Last 10 Minutes', template='plotly_dark')
+        st.plotly_chart(fig, use_container_width=True)
     
     def _render_extensions_manager(self):
         """Render extensions manager"""
@@ -46,8 +46,15 @@ except ImportError:
     pass  # Silently skip if not available
 
 # Import modules
-from modules.core.platform_manager import PlatformManager
+from modules.core.platform_manager import get_platform_manager
+from modules.core.telemetry import get_telemetry_sampler
+from modules.core.launch_profiles import ProfileDB, ProfileRecorder, run_api_benchmark
+from modules.core.instance_pool import get_instance_pool
+from modules.core.git_provisioner import RepoSpec, get_git_provisioner, read_repo_list
 from modules.enterprise.unified_storage_manager import UnifiedStorageManager
+from modules.enterprise.hashing import HashEngine, set_hash_engine
+from modules.enterprise.model_stager import ModelStager
+from modules.enterprise.snapshot_manager import SnapshotManager
 
 # Setup logging
 logging.basicConfig(
@@ -179,20 +186,39 @@ class LaunchConfig:
     extensions_enabled: bool = True
     api_enabled: bool = False
     auth: Optional[Tuple[str, str]] = None
+    gpu_instances: int = 1          # >1 starts one instance per GPU (0 = every GPU)
     theme: str = 'dark'
     
 class WebUILauncher:
     """Main WebUI launcher with multi-platform support"""
     
     def __init__(self):
-        self.platform_manager = PlatformManager()
+        self.platform_manager = get_platform_manager()
         self.storage_manager = UnifiedStorageManager()
+        
+        # Size the shared hashing pool for this machine
+        set_hash_engine(HashEngine.from_platform(self.platform_manager))
         self.webui_process = None
         self.tunnel_process = None
         self.monitor_thread = None
         self.launch_config = LaunchConfig()
         self.webui_path = None
+        self.telemetry = get_telemetry_sampler()
+        self.profile_db = ProfileDB()
+        self.profile_recorder = None
+        
+        # Multi-GPU fan-out: one instance per device, shared storage
+        self.pool = get_instance_pool()
+        self.pool.line_callback = lambda instance, line: self._handle_webui_line(line, f"WebUI:{instance.device}")
         self.start_time = None
+        self.stager = None
+        
+        # Clones share a bare-mirror object cache that outlives the WebUI dirs
+        self.git = get_git_provisioner(self.storage_manager.storage_root / 'git')
+        
+        # Incremental storage snapshots for ephemeral sessions (opt-in)
+        snapshot_target = SnapshotManager.default_target()
+        self.snapshots = SnapshotManager(self.storage_manager, snapshot_target) if snapshot_target else None
         
         # Audio paths
         self.audio_paths = {
@@ -211,29 +237,30 @@ class WebUILauncher:
         config = WEBUI_CONFIGS[webui_type]
         webui_dir = Path(self.platform_manager.platform_config['root']) / 'webuis' / webui_type
         
-        # Clone or update repository
-        if not webui_dir.exists():
-            logger.info(f"Cloning {webui_type} repository...")
-            try:
-                subprocess.run(
-                    ['git', 'clone', '--depth', '1', '-b', config['branch'], 
-                     config['repo'], str(webui_dir)],
-                    check=True
-                )
-                logger.info(f"✅ Cloned {webui_type} successfully")
-            except subprocess.CalledProcessError as e:
-                logger.error(f"Failed to clone repository: {e}")
-                return False
+        # Bring back yesterday's storage; only missing or changed files are fetched
+        if self.snapshots:
+            self.snapshots.restore()
+        
+        # Copy selected models from datasets/Drive while the WebUI is cloned
+        self.stager = ModelStager(
+            self.storage_manager,
+            ModelStager.default_source_roots(self.platform_manager)
+        ).start(load_session_config())
+        
+        # Fetch missing extensions into the object cache while the WebUI clones
+        extensions = self._extension_specs(webui_dir) if self.launch_config.extensions_enabled else []
+        self.git.prefetch(spec.url for spec in extensions if not spec.path.exists())
+        
+        # Clone or update repository (skipped when the remote head is unchanged)
+        logger.info(f"{'Updating' if webui_dir.exists() else 'Cloning'} {webui_type} repository...")
+        result = self.git.provision(RepoSpec(config['repo'], webui_dir, config['branch']))
+        if result.ok:
+            logger.info(f"✅ {webui_type} {result.action} ({result.seconds:.1f}s)")
+        elif not webui_dir.exists():
+            logger.error(f"Failed to clone repository: {result.error}")
+            return False
         else:
-            logger.info(f"Updating {webui_type} repository...")
-            try:
-                subprocess.run(
-                    ['git', 'pull'],
-                    cwd=webui_dir,
-                    check=True
-                )
-            except:
-                logger.warning("Git pull failed, continuing with existing version")
+            logger.warning(f"Git update failed, continuing with existing version: {result.error}")
         
         self.webui_path = webui_dir
         
@@ -241,9 +268,19 @@ class WebUILauncher:
         logger.info("Linking unified storage...")
         self.storage_manager.link_webui_storage(webui_dir, webui_type)
         
+        # Keep models on local disk in front of the persistent store, if any
+        if self.storage_manager.tiers is None:
+            self.storage_manager.enable_tiered_storage(self.platform_manager)
+        
+        # Generation and downloads share the disk; reclaim before it fills
+        self.storage_manager.start_disk_monitor()
+        
+        # Hand over known model hashes so the WebUI does not rehash on load
+        self.storage_manager.seed_webui_hash_cache(webui_dir, webui_type)
+        
         # Install extensions
-        if self.launch_config.extensions_enabled:
-            self._install_extensions(webui_dir)
+        if extensions:
+            self._install_extensions(extensions)
         
         # Note: WebUIs use their own native themes
         # We don't override them - users can configure themes within each WebUI
@@ -251,36 +288,33 @@ class WebUILauncher:
         
         return True
     
-    def _install_extensions(self, webui_dir: Path):
-        """Install extensions from _extensions.txt"""
+    def _extension_specs(self, webui_dir: Path) -> List[RepoSpec]:
+        """Extensions listed in _extensions.txt, placed under webui_dir/extensions"""
         extensions_file = project_root / 'scripts' / '_extensions.txt'
         
         if not extensions_file.exists():
             logger.warning("Extensions file not found")
-            return
-        
-        with open(extensions_file, 'r') as f:
-            extensions = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+            return []
         
         extensions_dir = webui_dir / 'extensions'
-        extensions_dir.mkdir(parents=True, exist_ok=True)
+        return [RepoSpec(url, extensions_dir / name) for url, name in read_repo_list(extensions_file)]
+    
+    def _install_extensions(self, extensions: List[RepoSpec]):
+        """Clone missing extensions concurrently; installed ones are left as they are"""
+        if extensions:
+            extensions[0].path.parent.mkdir(parents=True, exist_ok=True)
         
-        for ext_url in extensions:
-            ext_name = ext_url.split('/')[-1].replace('.git', '')
-            ext_path = extensions_dir / ext_name
-            
-            if not ext_path.exists():
-                try:
-                    subprocess.run(
-                        ['git', 'clone', '--depth', '1', ext_url, str(ext_path)],
-                        check=True,
-                        capture_output=True
-                    )
-                    logger.info(f"✅ Installed extension: {ext_name}")
-                except Exception as e:
-                    logger.error(f"Failed to install extension {ext_name}: {e}")
-            else:
+        start = time.time()
+        results = self.git.provision_many(extensions, update=False)
+        for result in results:
+            ext_name = result.spec.path.name
+            if result.action == 'failed':
+                logger.error(f"Failed to install extension {ext_name}: {result.error}")
+            elif result.action == 'current':
                 logger.info(f"Extension already installed: {ext_name}")
+            else:
+                logger.info(f"✅ Extension {result.action}: {ext_name}")
+        logger.info(f"Provisioned {len(results)} extensions in {time.time() - start:.1f}s")
     
     # REMOVED: Custom theme application for WebUIs
     # WebUIs should use their own native themes
@@ -331,18 +365,27 @@ class WebUILauncher:
         if not self.prepare_webui(self.launch_config.webui_type):
             return False
         
+        # Checkpoints must be in place before boot; LoRAs keep copying meanwhile
+        if self.stager and not self.stager.wait(asset_types=('checkpoint',), timeout=1800):
+            logger.warning("Checkpoint staging still running, launching anyway")
+        
         logger.info(f"Launching {self.launch_config.webui_type}...")
         
-        # Get platform-optimized launch arguments
-        launch_args = self.platform_manager.get_launch_args(self.launch_config.webui_type)
+        # Get platform-optimized launch arguments (fastest measured profile first)
+        webui_type = self.launch_config.webui_type
+        launch_args = self.platform_manager.get_launch_args(webui_type, self.profile_db)
+        
+        # Measure this flag set unless custom arguments make it ambiguous
+        fingerprint = self.platform_manager.gpu_fingerprint(webui_type)
+        self.profile_recorder = None
+        if fingerprint and not self.launch_config.launch_args:
+            self.profile_recorder = ProfileRecorder(
+                fingerprint, self.platform_manager.get_gpu_flags(webui_type, self.profile_db))
         
         # Add custom arguments
         if self.launch_config.launch_args:
             launch_args.extend(self.launch_config.launch_args)
         
-        # Add port
-        launch_args.extend(['--port', str(self.launch_config.port)])
-        
         # Add API if enabled
         if self.launch_config.api_enabled:
             launch_args.append('--api')
@@ -361,11 +404,13 @@ class WebUILauncher:
         launch_script = self.webui_path / webui_config['launch_script']
         
         # Build launch command
-        if self.launch_config.webui_type == 'ComfyUI':
-            launch_cmd = [sys.executable, str(launch_script)] + launch_args
-        else:
-            launch_cmd = [sys.executable, str(launch_script)] + launch_args
+        base_cmd = [sys.executable, str(launch_script)] + launch_args
         
+        devices = self._fanout_devices()
+        if len(devices) > 1:
+            return await self._launch_pool(base_cmd, env_vars, devices)
+        
+        launch_cmd = base_cmd + ['--port', str(self.launch_config.port)]
         logger.info(f"Launch command: {' '.join(launch_cmd)}")
         
         try:
@@ -380,6 +425,10 @@ class WebUILauncher:
                 bufsize=1
             )
             
+            # Live resource history for the status page and API
+            self.telemetry.set_processes([self.webui_process.pid])
+            self.telemetry.start()
+            
             # Start monitoring thread
             self.monitor_thread = threading.Thread(target=self._monitor_webui)
             self.monitor_thread.daemon = True
@@ -412,15 +461,70 @@ class WebUILauncher:
         
         for line in iter(self.webui_process.stdout.readline, ''):
             if line:
-                logger.info(f"[WebUI] {line.strip()}")
-                
-                # Check for errors
-                if 'error' in line.lower() or 'exception' in line.lower():
-                    logger.error(f"WebUI Error: {line.strip()}")
-                
-                # Check for ready state
-                if 'running on' in line.lower() or 'model loaded' in line.lower():
-                    logger.info("WebUI is ready!")
+                self._handle_webui_line(line)
+    
+    def _handle_webui_line(self, line: str, label: str = 'WebUI'):
+        """Log one line of WebUI output and feed the trackers"""
+        logger.info(f"[{label}] {line.strip()}")
+        
+        # Check for errors
+        if 'error' in line.lower() or 'exception' in line.lower():
+            logger.error(f"{label} Error: {line.strip()}")
+        
+        # Check for ready state
+        if 'running on' in line.lower() or 'model loaded' in line.lower():
+            logger.info(f"{label} is ready!")
+        
+        # Sampling speed for the launch profile database
+        if self.profile_recorder:
+            self.profile_recorder.feed(line)
+        
+        # Track model use for LRU eviction and hot-tier promotion
+        loaded_path = self.storage_manager.access_tracker.record_from_log(line)
+        if loaded_path and self.storage_manager.tiers:
+            self.storage_manager.tiers.touch(loaded_path)
+    
+    def _fanout_devices(self) -> List[str]:
+        """GPU indices to start one instance on each, or [] for a single instance"""
+        requested = self.launch_config.gpu_instances
+        devices = self.platform_manager.gpu_info['devices']
+        if requested == 1 or len(devices) < 2:
+            return []
+        count = len(devices) if requested <= 0 else min(requested, len(devices))
+        return [str(device['index']) for device in devices[:count]]
+    
+    async def _launch_pool(self, base_cmd: List[str], env_vars: Dict[str, str], devices: List[str]) -> bool:
+        """Start one instance per device on consecutive free ports"""
+        logger.info(f"Launching {len(devices)} instances on GPUs {', '.join(devices)}")
+        loop = asyncio.get_event_loop()
+        try:
+            # Blocks until the first instance has prepared the shared install
+            instances = await loop.run_in_executor(
+                None, self.pool.launch, lambda port: base_cmd + ['--port', str(port)],
+                self.webui_path, env_vars, devices, self.launch_config.port)
+        except RuntimeError as e:
+            logger.error(f"Failed to launch WebUI instances: {e}")
+            self._play_audio('error')
+            return False
+        
+        self.telemetry.set_processes([i.process.pid for i in instances if i.process])
+        self.telemetry.start()
+        
+        ready = await loop.run_in_executor(None, self.pool.wait_ready)
+        if not ready:
+            logger.error("No WebUI instance started")
+            self._play_audio('error')
+            return False
+        
+        # Tunnel, benchmark and status use the first ready instance
+        self.launch_config.port = ready[0].port
+        logger.info(f"✅ {len(ready)}/{len(instances)} instances ready: "
+                    f"{', '.join(i.url for i in ready)}")
+        self._play_audio('ready')
+        
+        if self.launch_config.share or self.platform_manager.platform_config.get('tunnel_required'):
+            await self._start_tunnel()
+        return True
     
     async def _wait_for_ready(self, timeout: int = 300) -> bool:
         """Wait for WebUI to be ready"""
@@ -562,12 +666,60 @@ class WebUILauncher:
             
             self.webui_process = None
         
+        if self.pool.instances:
+            self.pool.stop_all()
+        
+        if self.profile_recorder:
+            self.profile_recorder.commit(self.profile_db, self._peak_vram_mb())
+            self.profile_recorder = None
+        
+        self.telemetry.stop()
+        self.telemetry.set_processes([])
+        self.storage_manager.access_tracker.save()
+        self.storage_manager.stop_disk_monitor()
+        
+        # Persist fresh downloads before the ephemeral disk goes away
+        if self.storage_manager.tiers:
+            self.storage_manager.tiers.flush()
+            self.storage_manager.tiers.shutdown(wait=False)
+        
+        if self.snapshots:
+            try:
+                self.snapshots.snapshot()
+            except OSError as e:
+                logger.error(f"Snapshot failed: {e}")
+        
         logger.info("✅ WebUI stopped")
     
+    def _peak_vram_mb(self) -> Optional[float]:
+        """Highest VRAM use on GPU 0 since launch, from telemetry"""
+        since = time.time() - self.start_time if self.start_time else None
+        points = self.telemetry.history('gpu0_vram_used_mb', seconds=since)
+        return max(v for _, v in points) if points else None
+    
+    def benchmark_profile(self, steps: int = 20, runs: int = 3) -> Optional[Dict]:
+        """Time txt2img through the API and store it as this flag set's profile"""
+        if not self.get_status()['running'] or not self.profile_recorder:
+            logger.error("Benchmark needs a running WebUI launched without custom arguments")
+            return None
+        
+        try:
+            its_per_sec = run_api_benchmark(f"http://127.0.0.1:{self.launch_config.port}", steps, runs)
+        except Exception as e:
+            logger.error(f"Benchmark failed (is the API enabled?): {e}")
+            return None
+        if its_per_sec is None:
+            return None
+        profile = self.profile_db.record(self.profile_recorder.fingerprint, self.profile_recorder.flags,
+                                         its_per_sec, self._peak_vram_mb(), source='benchmark', samples=runs)
+        self.profile_db.save()
+        return {'flags': profile.flags, 'its_per_sec': its_per_sec, 'profile_its_per_sec': profile.its_per_sec}
+    
     def get_status(self) -> Dict:
         """Get WebUI status"""
         status = {
-            'running': self.webui_process is not None and self.webui_process.poll() is None,
+            'running': (self.webui_process is not None and self.webui_process.poll() is None)
+                       or bool(self.pool.ready_instances()),
             'webui_type': self.launch_config.webui_type,
             'port': self.launch_config.port,
             'platform': self.platform_manager.platform,
@@ -577,14 +729,15 @@ class WebUILauncher:
         if status['running'] and self.start_time:
             status['uptime'] = time.time() - self.start_time
         
-        # Get resource usage
-        if status['running'] and self.webui_process:
-            try:
-                process = psutil.Process(self.webui_process.pid)
-                status['cpu_percent'] = process.cpu_percent()
-                status['memory_mb'] = process.memory_info().rss / (1024 * 1024)
-            except:
-                pass
+        # Resource usage from the background sampler; nothing is probed here
+        if status['running']:
+            telemetry = self.telemetry.snapshot()
+            status['cpu_percent'] = telemetry.get('webui_cpu_percent')
+            status['memory_mb'] = telemetry.get('webui_rss_mb')
+            status['telemetry'] = telemetry
+        
+        if self.pool.instances:
+            status['instances'] = self.pool.get_status()
         
         return status
     
@@ -695,6 +848,13 @@ def render_streamlit_interface(session_config=None):
     with st.expander("Advanced Options"):
         api_enabled = st.checkbox("Enable API", key="api")
         extensions_enabled = st.checkbox("Install Extensions", value=True, key="extensions")
+        gpu_instances = st.number_input(
+            "WebUI instances (one per GPU, 0 = every GPU)",
+            min_value=0,
+            max_value=8,
+            value=1,
+            key="gpu_instances"
+        )
         
         auth_enabled = st.checkbox("Enable Authentication", key="auth_enabled")
         if auth_enabled:
@@ -720,7 +880,8 @@ def render_streamlit_interface(session_config=None):
             tunnel_service=tunnel_service,
             api_enabled=api_enabled,
             extensions_enabled=extensions_enabled,
-            auth=auth
+            auth=auth,
+            gpu_instances=int(gpu_instances)
         )
         
         with st.spinner(f"Launching {webui_type}..."):
@@ -745,6 +906,8 @@ def render_streamlit_interface(session_config=None):
         st.success(f"🟢 {status['webui_type']} is running on port {status['port']}")
         if status['uptime']:
             st.info(f"Uptime: {status['uptime']:.0f} seconds")
+        for instance in status.get('instances', []):
+            st.caption(f"GPU {instance['device']}: {instance['url']} ({instance['status']})")
 
 def render_gradio_interface(session_config=None):
     """Render Gradio launch interface (fallback)"""
@@ -41,6 +41,11 @@ except NameError:
         
 sys.path.insert(0, str(project_root))
 
+from modules.enterprise.unified_storage_manager import UnifiedStorageManager
+from modules.enterprise.webui_hash_seeder import WebUIHashSeeder
+from modules.core.platform_manager import get_platform_manager
+from modules.core.instance_pool import InstancePool, get_instance_pool
+
 # ============================================================================
 # PACKAGE CONFIGURATIONS
 # ============================================================================
@@ -142,15 +147,15 @@ class AnxietyPackageManager:
         self.packages_dir = self.project_root / 'packages'
         self.webuis_dir = self.project_root / 'webuis'
         self.venvs_dir = self.project_root / 'venvs'
-        self.storage_dir = self.project_root / 'storage'
+        
+        # Same storage layout as every other launcher
+        self.storage_manager = UnifiedStorageManager(self.project_root)
+        self.storage_dir = self.storage_manager.storage_root
         
         # Create directories
-        for dir_path in [self.packages_dir, self.webuis_dir, self.venvs_dir, self.storage_dir]:
+        for dir_path in [self.packages_dir, self.webuis_dir, self.venvs_dir]:
             dir_path.mkdir(parents=True, exist_ok=True)
-        
-        # Create storage subdirectories
-        for subdir in ['models', 'loras', 'vae', 'embeddings', 'hypernetworks', 'controlnet']:
-            (self.storage_dir / subdir).mkdir(parents=True, exist_ok=True)
+        self.storage_manager.initialize_storage()
     
     def download_with_progress(self, url: str, dest_path: Path, description: str = "Downloading"):
         """Download file with progress bar"""
@@ -215,68 +220,7 @@ class AnxietyPackageManager:
     def link_unified_storage(self, webui_path: Path, webui_type: str):
         """Create symbolic links to unified storage"""
         logger.info("Linking unified storage...")
-        
-        # Storage mapping for different WebUIs
-        storage_mappings = {
-            'A1111': {
-                'models/Stable-diffusion': self.storage_dir / 'models',
-                'models/Lora': self.storage_dir / 'loras',
-                'models/VAE': self.storage_dir / 'vae',
-                'embeddings': self.storage_dir / 'embeddings',
-                'models/hypernetworks': self.storage_dir / 'hypernetworks',
-                'models/ControlNet': self.storage_dir / 'controlnet'
-            },
-            'Forge': {
-                # Same as A1111
-                'models/Stable-diffusion': self.storage_dir / 'models',
-                'models/Lora': self.storage_dir / 'loras',
-                'models/VAE': self.storage_dir / 'vae',
-                'embeddings': self.storage_dir / 'embeddings',
-                'models/hypernetworks': self.storage_dir / 'hypernetworks',
-                'models/ControlNet': self.storage_dir / 'controlnet'
-            },
-            'ReForge': {
-                # Same as A1111
-                'models/Stable-diffusion': self.storage_dir / 'models',
-                'models/Lora': self.storage_dir / 'loras',
-                'models/VAE': self.storage_dir / 'vae',
-                'embeddings': self.storage_dir / 'embeddings',
-                'models/hypernetworks': self.storage_dir / 'hypernetworks',
-                'models/ControlNet': self.storage_dir / 'controlnet'
-            },
-            'ComfyUI': {
-                'models/checkpoints': self.storage_dir / 'models',
-                'models/loras': self.storage_dir / 'loras',
-                'models/vae': self.storage_dir / 'vae',
-                'models/embeddings': self.storage_dir / 'embeddings',
-                'models/controlnet': self.storage_dir / 'controlnet'
-            },
-            'Fooocus': {
-                'models/checkpoints': self.storage_dir / 'models',
-                'models/loras': self.storage_dir / 'loras',
-                'models/vae': self.storage_dir / 'vae'
-            }
-        }
-        
-        # Get mappings for this WebUI type
-        mappings = storage_mappings.get(webui_type, storage_mappings['A1111'])
-        
-        for webui_subpath, storage_path in mappings.items():
-            link_path = webui_path / webui_subpath
-            
-            # Create parent directory if needed
-            link_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Remove existing link or directory
-            if link_path.exists() or link_path.is_symlink():
-                if link_path.is_symlink():
-                    link_path.unlink()
-                elif link_path.is_dir():
-                    shutil.rmtree(link_path)
-            
-            # Create symbolic link
-            link_path.symlink_to(storage_path)
-            logger.info(f"  Linked: {webui_subpath} → {storage_path.name}")
+        self.storage_manager.link_webui_storage(webui_path, webui_type)
     
     def install_webui(self, webui_type: str) -> bool:
         """Install pre-configured WebUI package"""
@@ -295,6 +239,7 @@ class AnxietyPackageManager:
         # Check if already installed
         if webui_path.exists():
             logger.info(f"{webui_type} already installed at {webui_path}")
+            self.seed_hash_cache(webui_path, webui_type)
             return True
         
         logger.info(f"Installing {config['name']}...")
@@ -338,13 +283,22 @@ class AnxietyPackageManager:
         # Link unified storage
         self.link_unified_storage(webui_path, webui_type)
         
+        # Pre-seed model hashes so first generation skips rehashing
+        self.seed_hash_cache(webui_path, webui_type)
+        
         logger.info(f"✅ {config['name']} installed successfully!")
         return True
     
-    def launch_webui(self, webui_type: str, port: Optional[int] = None, 
-                    share: bool = False, api: bool = False) -> subprocess.Popen:
-        """Launch WebUI with its specific venv"""
-        
+    def seed_hash_cache(self, webui_path: Path, webui_type: str):
+        """Write known model digests into the WebUI's cache.json"""
+        try:
+            WebUIHashSeeder(self.storage_manager.hash_cache).seed(webui_path, webui_type)
+        except Exception as e:
+            logger.warning(f"Could not seed WebUI hash cache: {e}")
+    
+    def _build_launch_command(self, webui_type: str, share: bool = False,
+                              api: bool = False) -> Tuple[list, Path, Dict]:
+        """Launch command (without --port), WebUI directory and package config"""
         config = WEBUI_PACKAGES.get(webui_type)
         if not config:
             raise ValueError(f"Unknown WebUI type: {webui_type}")
@@ -362,11 +316,6 @@ class AnxietyPackageManager:
         # Build launch command
         cmd = [str(venv_python), config['launch_script']]
         
-        # Add port
-        if port is None:
-            port = config['default_port']
-        cmd.extend(['--port', str(port)])
-        
         # Add sharing
         if share:
             cmd.append('--share')
@@ -381,24 +330,53 @@ class AnxietyPackageManager:
         elif webui_type == 'ComfyUI':
             cmd.extend(['--normalvram', '--use-pytorch-cross-attention'])
         
+        return cmd, webui_path, config
+    
+    def launch_webui(self, webui_type: str, port: Optional[int] = None, 
+                    share: bool = False, api: bool = False,
+                    device: Optional[str] = None) -> subprocess.Popen:
+        """Launch WebUI with its specific venv, optionally pinned to one GPU"""
+        cmd, webui_path, config = self._build_launch_command(webui_type, share, api)
+        
+        # Add port
+        if port is None:
+            port = config['default_port']
+        cmd.extend(['--port', str(port)])
+        
+        env = {**os.environ, 'PYTORCH_CUDA_ALLOC_CONF': 'max_split_size_mb:512'}
+        if device is not None:
+            env['CUDA_VISIBLE_DEVICES'] = str(device)
+        
         logger.info(f"Launching {config['name']} on port {port}...")
         logger.info(f"Command: {' '.join(cmd)}")
         
         # Launch process
-        process = subprocess.Popen(
-            cmd,
-            cwd=webui_path,
-            env={
-                **os.environ,
-                'CUDA_VISIBLE_DEVICES': '0',
-                'PYTORCH_CUDA_ALLOC_CONF': 'max_split_size_mb:512'
-            }
-        )
+        process = subprocess.Popen(cmd, cwd=webui_path, env=env)
         
         logger.info(f"✅ {config['name']} launched! Access at http://localhost:{port}")
         
         return process
     
+    def launch_instances(self, webui_type: str, devices: Optional[list] = None,
+                         base_port: Optional[int] = None, api: bool = False,
+                         count: int = 0) -> InstancePool:
+        """Launch one WebUI per GPU on free ports; `count` GPUs, or every detected GPU if 0"""
+        cmd, webui_path, config = self._build_launch_command(webui_type, api=api)
+        if devices is None:
+            devices = [str(d['index']) for d in get_platform_manager().gpu_info['devices']] or ['0']
+        if count > 0:
+            devices = devices[:count]
+        
+        pool = get_instance_pool()
+        pool.line_callback = lambda instance, line: logger.info(f"[GPU {instance.device}] {line.rstrip()}")
+        env = {**os.environ, 'PYTORCH_CUDA_ALLOC_CONF': 'max_split_size_mb:512'}
+        pool.launch(lambda port: cmd + ['--port', str(port)], webui_path, env,
+                    devices, base_port or config['default_port'])
+        
+        for instance in pool.wait_ready():
+            logger.info(f"✅ {config['name']} on GPU {instance.device}: {instance.url}")
+        return pool
+    
     def get_installed_webuis(self) -> list:
         """Get list of installed WebUIs"""
         installed = []
@@ -412,8 +390,15 @@ class AnxietyPackageManager:
         """Get storage usage statistics"""
         stats = {}
         
-        for category in ['models', 'loras', 'vae', 'embeddings']:
-            category_path = self.storage_dir / category
+        model_paths = self.storage_manager.storage_paths['models']
+        categories = {
+            'models': model_paths['checkpoints'],
+            'loras': model_paths['lora'],
+            'vae': model_paths['vae'],
+            'embeddings': model_paths['embeddings']
+        }
+        
+        for category, category_path in categories.items():
             if category_path.exists():
                 files = list(category_path.glob('*'))
                 total_size = sum(f.stat().st_size for f in files if f.is_file())
@@ -479,7 +464,19 @@ def main():
         if auto_launch:
             try:
                 # Get port from config
-                port = session_config.get('launch_settings', {}).get('port', None)
+                launch_settings = session_config.get('launch_settings', {})
+                port = launch_settings.get('port', None)
+                gpu_instances = launch_settings.get('gpu_instances', 1)
+                if gpu_instances != 1:
+                    pool = manager.launch_instances(selected_webui, base_port=port, count=gpu_instances)
+                    print(f"✅ {len(pool.ready_instances())} {selected_webui} instances running")
+                    print("\nPress Ctrl+C to stop the WebUIs")
+                    try:
+                        while pool.ready_instances():
+                            time.sleep(5)
+                    finally:
+                        pool.stop_all()
+                    return
                 process = manager.launch_webui(selected_webui, port)
                 print(f"✅ {selected_webui} launched successfully!")
                 print(f"🌐 WebUI running with PID: {process.pid}")
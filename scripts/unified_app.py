@@ -21,6 +21,8 @@ import requests
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+from modules.core.platform_manager import get_platform_manager
+
 # Page configuration
 st.set_page_config(
     page_title="SD-DarkMaster-Pro",
@@ -133,14 +135,9 @@ def setup_page():
     with col2:
         st.info(f"Python: {sys.version.split()[0]}")
     with col3:
-        gpu_check = subprocess.run(['nvidia-smi'], capture_output=True, text=True)
-        if gpu_check.returncode == 0:
-            # Parse GPU name
-            gpu_name = "GPU Found"
-            for line in gpu_check.stdout.split('\n'):
-                if 'NVIDIA' in line and 'Off' not in line:
-                    gpu_name = line.split('|')[1].strip().split()[0]
-                    break
+        gpu_info = get_platform_manager().gpu_info
+        if gpu_info['available']:
+            gpu_name = gpu_info['devices'][0]['name'] if gpu_info['devices'] else "GPU Found"
             st.success(f"GPU: {gpu_name}")
         else:
             st.error("GPU: Not Found")
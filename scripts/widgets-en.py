@@ -10,7 +10,6 @@ from pathlib import Path
 import streamlit as st
 import json
 import platform
-import subprocess
 from datetime import datetime
 import psutil
 import time
@@ -253,12 +252,11 @@ def detect_environment():
     elif 'VAST' in os.environ:
         env_info['platform'] = 'Vast.ai'
     
-    # Check for GPU
+    # Check for GPU (probe shared with the launcher and cached per boot)
     try:
-        result = subprocess.run(['nvidia-smi'], capture_output=True, text=True, timeout=5)
-        if result.returncode == 0:
-            env_info['gpu'] = True
-    except:
+        from modules.core.platform_manager import get_platform_manager
+        env_info['gpu'] = get_platform_manager().gpu_info['available']
+    except Exception:
         pass
     
     return env_info
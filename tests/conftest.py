@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Tests import modules.* the way the scripts do, from the project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,81 @@
+import os
+import time
+from collections import namedtuple
+
+import pytest
+
+from modules.enterprise import disk_pressure
+from modules.enterprise.disk_pressure import DiskPressureMonitor, ReclaimStep
+from modules.enterprise.event_log import EventLog
+
+Usage = namedtuple('Usage', 'total used free')
+
+class FakeStorageManager:
+    def __init__(self, root):
+        self.storage_root = root / 'storage'
+        self.storage_paths = {'cache': {'huggingface': self.storage_root / 'cache'}}
+        self.storage_paths['cache']['huggingface'].mkdir(parents=True)
+        self.tiers = None
+        self.event_log = EventLog()
+
+@pytest.fixture
+def two_filesystems(tmp_path, monkeypatch):
+    """Storage on device 1, a staging dir on device 2; used bytes per device are editable"""
+    storage = FakeStorageManager(tmp_path)
+    staging = tmp_path / 'staging'
+    used = {1: 50, 2: 50}
+
+    def device(path):
+        return 2 if str(path).startswith(str(staging)) else 1
+
+    monkeypatch.setattr(DiskPressureMonitor, '_device', staticmethod(device))
+    monkeypatch.setattr(DiskPressureMonitor, 'filesystems',
+                        lambda self: {1: str(storage.storage_root), 2: str(staging)})
+    monkeypatch.setattr(disk_pressure.shutil, 'disk_usage',
+                        lambda path: Usage(100, used[device(path)], 100 - used[device(path)]))
+    return storage, staging, used
+
+def test_only_steps_on_the_full_filesystem_run(two_filesystems):
+    storage, staging, used = two_filesystems
+    ran = []
+
+    def reclaim(name, dev):
+        def step(wanted):
+            ran.append((name, wanted))
+            used[dev] -= wanted
+            return wanted
+        return step
+
+    monitor = DiskPressureMonitor(storage, steps=[
+        ReclaimStep('cache', reclaim('cache', 1), lambda: list(storage.storage_paths['cache'].values())),
+        ReclaimStep('staging', reclaim('staging', 2), lambda: [str(staging)]),
+    ])
+    monitor.watch(str(staging))
+    used[2] = 95
+
+    result = monitor.check()
+
+    assert ran == [('staging', 15)]
+    assert used == {1: 50, 2: 80}
+    assert result['over_high'] and monitor.downloads_allowed.is_set()
+
+def test_stale_partials_are_removed_from_the_staging_dir(two_filesystems):
+    storage, staging, used = two_filesystems
+    monitor = DiskPressureMonitor(storage)
+    monitor.watch(str(staging))
+    old = time.time() - disk_pressure.STALE_PARTIAL_SECONDS - 60
+    for name in ('.dead.safetensors.part', '.dead.safetensors.part.aria2', 'keep.bin'):
+        (staging / name).write_bytes(b'x' * 10)
+        os.utime(staging / name, (old, old))
+    (staging / '.live.safetensors.part').write_bytes(b'x' * 10)
+    monitor.steps = [s for s in monitor.steps if s.name in ('stale_partials', 'cache')]
+    cache_ran = []
+    monitor.steps[1] = ReclaimStep('cache', lambda wanted: cache_ran.append(wanted) or 0,
+                                   monitor.steps[1].paths)
+    used[2] = 95
+
+    result = monitor.check()
+
+    assert sorted(os.listdir(staging)) == ['.live.safetensors.part', 'keep.bin']
+    assert result['steps'][0] == {'step': 'stale_partials', 'wanted_bytes': 15, 'freed_bytes': 20}
+    assert cache_ran == []
@@ -0,0 +1,102 @@
+import os
+import threading
+import http.server
+from types import SimpleNamespace
+
+import pytest
+
+from modules.enterprise.download_calibration import (DownloadCalibrator, DownloadTuning,
+                                                     load_cached_tuning, publish_staged)
+
+PAYLOAD = os.urandom(8 * 1024 * 1024)
+
+class RangeHandler(http.server.BaseHTTPRequestHandler):
+    """Serves PAYLOAD, honouring single byte ranges unless ignore_range is set"""
+    ignore_range = False
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        header = self.headers.get('Range')
+        if header and not self.ignore_range:
+            start, end = (int(x) for x in header.split('=')[1].split('-'))
+            body = PAYLOAD[start:end + 1]
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{start + len(body) - 1}/{len(PAYLOAD)}")
+        else:
+            body = PAYLOAD
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+@pytest.fixture
+def server():
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), RangeHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}/model.safetensors", httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+def calibrator(tmp_path, url, **kwargs):
+    storage = SimpleNamespace(storage_root=tmp_path / 'storage', tiers=None)
+    return DownloadCalibrator(storage, 'test', probe_url=url, cache_file=tmp_path / 'calibration.json',
+                              segment_bytes=1024 * 1024, **kwargs)
+
+def test_derive_picks_fewest_connections_near_the_best():
+    tuning = DownloadCalibrator.derive({'/storage': 500.0}, {1: 10.0, 2: 19.0, 4: 35.0, 8: 38.0},
+                                       '/storage')
+
+    assert tuning.segments == 4                 # 35 is within 10% of 38
+    assert tuning.chunk_size & (tuning.chunk_size - 1) == 0
+    assert 64 * 1024 <= tuning.chunk_size <= 4 * 1024**2
+    assert tuning.max_concurrent == 4           # ~16 connections in flight
+    assert tuning.staging_dir is None
+
+def test_derive_limits_parallel_files_on_a_slow_disk_and_stages_elsewhere():
+    tuning = DownloadCalibrator.derive({'/storage': 20.0, '/tmp': 400.0}, {1: 50.0}, '/storage')
+
+    assert tuning.max_concurrent == 2
+    assert tuning.staging_dir == os.path.join('/tmp', 'sd-darkmaster-downloads')
+
+def test_derive_without_measurements_keeps_defaults():
+    assert DownloadCalibrator.derive({}, {}, '/storage') == DownloadTuning(max_concurrent=2)
+
+def test_measure_network_against_a_local_range_server(tmp_path, server):
+    url, _ = server
+    probe = calibrator(tmp_path, url, probe_seconds=0.2)
+
+    assert probe._fetch_range(1024 * 1024) == 1024 * 1024
+    assert probe.measure_network(1) > 0
+    assert probe.measure_network(4) > 0
+
+def test_server_ignoring_range_is_rejected(tmp_path, server, monkeypatch):
+    url, _ = server
+    monkeypatch.setattr(RangeHandler, 'ignore_range', True)
+
+    with pytest.raises(ValueError):
+        calibrator(tmp_path, url, probe_seconds=0.2).measure_network(1)
+
+def test_tuning_is_cached_per_platform(tmp_path, server):
+    url, _ = server
+    probe = calibrator(tmp_path, url, probe_seconds=0.1, write_mb=4)
+
+    first = probe.tuning()
+
+    assert probe.load()['platform'] == 'test'
+    assert load_cached_tuning(tmp_path / 'calibration.json') == first
+    other = calibrator(tmp_path, url)
+    other.platform = 'colab'
+    assert other.load() is None
+
+def test_publish_staged_moves_into_place(tmp_path):
+    staged = tmp_path / 'staging' / '.model.part'
+    staged.parent.mkdir()
+    staged.write_bytes(b'weights')
+    target = tmp_path / 'models' / 'model.safetensors'
+    target.parent.mkdir()
+
+    publish_staged(staged, target)
+
+    assert target.read_bytes() == b'weights' and not staged.exists()
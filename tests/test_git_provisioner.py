@@ -0,0 +1,113 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from modules.core.git_provisioner import (GitObjectCache, GitProvisioner, RepoSpec,
+                                          read_repo_list, run_git)
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason="git not installed")
+
+GIT_IDENTITY = {'GIT_AUTHOR_NAME': 'test', 'GIT_AUTHOR_EMAIL': 'test@example.com',
+                'GIT_COMMITTER_NAME': 'test', 'GIT_COMMITTER_EMAIL': 'test@example.com'}
+
+def git(*args, cwd=None):
+    subprocess.run(['git', *args], cwd=cwd, check=True, capture_output=True,
+                   env={**os.environ, **GIT_IDENTITY})
+
+def commit(work, content):
+    (work / 'file.txt').write_text(content)
+    git('add', 'file.txt', cwd=work)
+    git('commit', '-q', '-m', content, cwd=work)
+    git('push', '-q', 'origin', 'HEAD:main', cwd=work)
+
+@pytest.fixture
+def remote(tmp_path):
+    """A local bare repo on branch main, plus a work tree that pushes to it"""
+    bare = tmp_path / 'remote.git'
+    git('init', '-q', '--bare', '-b', 'main', str(bare))
+    work = tmp_path / 'work'
+    git('clone', '-q', str(bare), str(work))
+    git('checkout', '-q', '-b', 'main', cwd=work)
+    commit(work, 'one')
+    return f"file://{bare}", work
+
+@pytest.fixture
+def provisioner(tmp_path):
+    provisioner = GitProvisioner(GitObjectCache(tmp_path / 'cache'), max_workers=4)
+    yield provisioner
+    provisioner.shutdown()
+
+def head(path):
+    return run_git(['rev-parse', 'HEAD'], cwd=path).strip()
+
+def test_clone_borrows_objects_from_the_mirror(tmp_path, remote, provisioner):
+    url, _ = remote
+    result = provisioner.provision(RepoSpec(url, tmp_path / 'checkout', 'main'))
+
+    assert result.action == 'cloned'
+    mirror = provisioner.cache.mirror_path(url)
+    alternates = tmp_path / 'checkout' / '.git' / 'objects' / 'info' / 'alternates'
+    assert alternates.read_text().strip() == str(mirror / 'objects')
+    # Borrowed objects must never be garbage collected out from under the clone
+    assert run_git(['config', 'gc.pruneExpire'], cwd=mirror).strip() == 'never'
+    assert run_git(['config', 'gc.auto'], cwd=mirror).strip() == '0'
+
+def test_unchanged_remote_is_not_pulled(tmp_path, remote, provisioner):
+    url, _ = remote
+    spec = RepoSpec(url, tmp_path / 'checkout', 'main')
+    provisioner.provision(spec)
+    # ls-remote uses spec.url; a pull would go to origin and fail
+    git('remote', 'set-url', 'origin', f"file://{tmp_path / 'gone.git'}", cwd=spec.path)
+
+    assert provisioner.provision(spec).action == 'current'
+
+def test_moved_remote_is_fast_forwarded(tmp_path, remote, provisioner):
+    url, work = remote
+    spec = RepoSpec(url, tmp_path / 'checkout', 'main')
+    provisioner.provision(spec)
+    commit(work, 'two')
+
+    result = provisioner.provision(spec)
+
+    assert result.action == 'updated'
+    assert head(spec.path) == head(work)
+    assert (spec.path / 'file.txt').read_text() == 'two'
+
+def test_update_false_leaves_existing_checkouts_alone(tmp_path, remote, provisioner):
+    url, work = remote
+    spec = RepoSpec(url, tmp_path / 'checkout', 'main')
+    provisioner.provision(spec)
+    before = head(spec.path)
+    commit(work, 'two')
+
+    assert provisioner.provision(spec, update=False).action == 'current'
+    assert head(spec.path) == before
+
+def test_provision_many_reports_each_repo(tmp_path, remote, provisioner):
+    url, _ = remote
+    specs = [RepoSpec(url, tmp_path / 'a'), RepoSpec(url, tmp_path / 'b'),
+             RepoSpec(f"file://{tmp_path / 'missing.git'}", tmp_path / 'c')]
+
+    results = provisioner.provision_many(specs)
+
+    assert [r.action for r in results] == ['cloned', 'cloned', 'failed']
+    assert results[2].error
+
+def test_read_repo_list(tmp_path):
+    list_file = tmp_path / '_extensions.txt'
+    list_file.write_text(
+        "## Section\n"
+        "https://github.com/anxety-solo/webui_timer timer\n"
+        "https://github.com/anxety-solo/anxety-theme\n"
+        "# https://github.com/commented/out Name\n"
+        "\n"
+        "https://github.com/Bing-su/adetailer.git  # trailing comment\n"
+    )
+
+    assert read_repo_list(list_file) == [
+        ('https://github.com/anxety-solo/webui_timer', 'timer'),
+        ('https://github.com/anxety-solo/anxety-theme', 'anxety-theme'),
+        ('https://github.com/Bing-su/adetailer.git', 'adetailer'),
+    ]
@@ -0,0 +1,117 @@
+import socket
+import itertools
+
+import pytest
+
+from modules.core.instance_pool import InstancePool, allocate_ports
+
+class FakeProcess:
+    _pids = itertools.count(1000)
+
+    def __init__(self):
+        self.pid = next(self._pids)
+        self.returncode = None
+
+    def poll(self):
+        return self.returncode
+
+class StubBackend:
+    """Spawns nothing; readiness and crashes are scripted per device"""
+
+    def __init__(self, ready=(), crash=()):
+        self.ready = set(ready)
+        self.crash = set(crash)
+        self.spawned = []
+
+    def spawn(self, command, cwd, env):
+        process = FakeProcess()
+        device = env['CUDA_VISIBLE_DEVICES']
+        if device in self.crash:
+            process.returncode = 1
+        self.spawned.append((device, command))
+        return process
+
+    def is_ready(self, instance):
+        return instance.device in self.ready
+
+    def stop(self, instance, timeout=10):
+        instance.process.returncode = -15
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('', 0))
+        return sock.getsockname()[1]
+
+def launch(pool, devices, **kwargs):
+    return pool.launch(lambda port: ['webui', '--port', str(port)], '.', {}, devices,
+                       free_port(), timeout=kwargs.pop('timeout', 1), poll_interval=0.01, **kwargs)
+
+def test_allocate_ports_skips_bound_and_excluded():
+    with socket.socket() as busy:
+        busy.bind(('', 0))
+        start = busy.getsockname()[1]
+        ports = allocate_ports(2, start, exclude=[start + 1])
+
+    assert start not in ports and start + 1 not in ports
+    assert len(set(ports)) == 2 and all(p > start + 1 for p in ports)
+
+def test_allocate_ports_raises_when_range_is_exhausted():
+    with socket.socket() as busy:
+        busy.bind(('', 0))
+        with pytest.raises(RuntimeError):
+            allocate_ports(1, busy.getsockname()[1], limit=1)
+
+def test_each_instance_gets_its_own_gpu_and_port():
+    backend = StubBackend(ready={'0', '1', '2'})
+    pool = InstancePool(backend)
+
+    instances = launch(pool, ['0', '1', '2'])
+
+    assert [device for device, _ in backend.spawned] == ['0', '1', '2']
+    assert len({i.port for i in instances}) == 3
+    assert [cmd[-1] for _, cmd in backend.spawned] == [str(i.port) for i in instances]
+
+def test_wait_ready_marks_crashed_and_slow_instances_failed():
+    pool = InstancePool(StubBackend(ready={'0'}, crash={'1'}))
+    launch(pool, ['0', '1', '2'], warm_first=False)
+
+    ready = pool.wait_ready(timeout=0.2, poll_interval=0.05)
+
+    assert [i.device for i in ready] == ['0']
+    assert [i.status for i in pool.instances] == ['ready', 'failed', 'failed']
+    assert not pool.instances[2].running
+
+def test_rest_wait_for_the_first_instance():
+    backend = StubBackend(ready={'1'})     # GPU 0 never comes up
+    pool = InstancePool(backend)
+
+    launched = launch(pool, ['0', '1'], timeout=0.2)
+
+    assert [device for device, _ in backend.spawned] == ['0']
+    assert [i.status for i in launched] == ['failed']
+    assert not launched[0].running
+
+def test_acquire_hands_out_the_least_busy_instance():
+    pool = InstancePool(StubBackend(ready={'0', '1'}))
+    launch(pool, ['0', '1'])
+    pool.wait_ready(timeout=1, poll_interval=0.01)
+
+    with pool.acquire() as first, pool.acquire() as second, pool.acquire() as third:
+        assert {first.device, second.device} == {'0', '1'}
+        assert third.in_flight == 2
+    assert all(i.in_flight == 0 for i in pool.instances)
+
+def test_acquire_without_ready_instances_raises():
+    pool = InstancePool(StubBackend())
+    with pytest.raises(RuntimeError):
+        with pool.acquire():
+            pass
+
+def test_stop_all_clears_the_pool():
+    pool = InstancePool(StubBackend(ready={'0', '1'}))
+    instances = launch(pool, ['0', '1'])
+
+    pool.stop_all()
+
+    assert pool.instances == []
+    assert all(not i.running and i.status == 'stopped' for i in instances)
@@ -0,0 +1,80 @@
+import pytest
+
+from modules.core.launch_profiles import ProfileDB, ProfileRecorder, gpu_fingerprint
+
+FINGERPRINT = gpu_fingerprint({'name': 'NVIDIA T4', 'vram_total': '15360 MiB'}, '535.104', 'A1111')
+
+@pytest.fixture
+def db(tmp_path):
+    """A profile DB seeded from fixture measurements, as on a CPU-only box"""
+    db = ProfileDB(tmp_path / 'launch_profiles.json')
+    db.record(FINGERPRINT, ['--xformers'], 4.0, peak_vram_mb=6000, source='fixture', samples=3)
+    db.record(FINGERPRINT, ['--opt-sdp-attention'], 5.0, peak_vram_mb=14000, source='fixture')
+    db.record(FINGERPRINT, ['--xformers', '--medvram'], 3.0, peak_vram_mb=4000, source='fixture')
+    return db
+
+def test_fingerprint_separates_gpu_driver_and_webui():
+    assert FINGERPRINT == 'NVIDIA T4|15360|535.104|A1111'
+    assert gpu_fingerprint({'name': 'NVIDIA T4', 'vram_total': '15360 MiB'}, '535.104', 'Forge') != FINGERPRINT
+
+def test_record_averages_by_sample_count(db):
+    profile = db.record(FINGERPRINT, ['--xformers'], 8.0, peak_vram_mb=5000, samples=1)
+
+    assert profile.its_per_sec == pytest.approx((4.0 * 3 + 8.0) / 4)
+    assert profile.samples == 4
+    assert profile.peak_vram_mb == 6000     # peak is the max, not an average
+
+def test_best_is_fastest_within_vram_limit(db):
+    assert db.best(FINGERPRINT).flags == ['--opt-sdp-attention']
+    assert db.best(FINGERPRINT, vram_limit_mb=8000).flags == ['--xformers']
+    assert db.best(FINGERPRINT, vram_limit_mb=1000) is None
+    assert db.best('unknown|0|unknown|A1111') is None
+
+def test_profiles_survive_a_reload(db, tmp_path):
+    db.save()
+    reloaded = ProfileDB(tmp_path / 'launch_profiles.json')
+
+    assert [p.flags for p in reloaded.profiles(FINGERPRINT)] == [p.flags for p in db.profiles(FINGERPRINT)]
+    assert reloaded.best(FINGERPRINT).source == 'fixture'
+
+@pytest.mark.parametrize('line, expected', [
+    ("100%|██████████| 20/20 [00:03<00:00,  6.02it/s]", 6.02),
+    ("Total progress: 100%|██████████| 20/20 [00:04<00:00,  4.87it/s]", 4.87),
+    ("100%|██████████| 30/30 [01:00<00:00,  2.00s/it]", 0.5),
+    (" 45%|████▌     | 9/20 [00:01<00:02,  5.10it/s]", None),     # partial bar
+    ("Model loaded in 4.2s (load weights from disk: 1.1s)", None),
+])
+def test_parse_speed(line, expected):
+    speed = ProfileRecorder.parse_speed(line)
+    if expected is None:
+        assert speed is None
+    else:
+        assert speed == pytest.approx(expected)
+
+def test_recorder_commits_median_without_warm_up(tmp_path):
+    db = ProfileDB(tmp_path / 'launch_profiles.json')
+    recorder = ProfileRecorder(FINGERPRINT, ['--xformers'])
+    for speed in ('1.00', '6.00', '5.00', '7.00'):
+        recorder.feed(f"100%|██████████| 20/20 [00:03<00:00,  {speed}it/s]")
+
+    profile = recorder.commit(db, peak_vram_mb=5500)
+
+    assert profile.its_per_sec == pytest.approx(6.0)
+    assert profile.samples == 3
+    assert ProfileRecorder(FINGERPRINT, []).commit(db) is None     # too few runs
+
+def test_heuristic_flags_leave_fp16_alone(tmp_path):
+    pytest.importorskip('psutil')
+    from modules.core.platform_manager import PlatformManager, ProbeCache
+
+    manager = PlatformManager(ProbeCache(tmp_path / 'probes.json'))
+    manager._optimizations = {'xformers': True, 'sdp_attention': True, 'mixed_precision': 'fp16',
+                              'cpu_offload': True, 'sequential_cpu_offload': True}
+
+    flags = manager._heuristic_gpu_flags('A1111')
+
+    assert '--precision' not in flags and '--no-half' not in flags
+    assert flags == ['--xformers', '--lowvram']
+
+    manager._optimizations['mixed_precision'] = 'fp32'
+    assert manager._heuristic_gpu_flags('A1111')[1:4] == ['--precision', 'full', '--no-half']
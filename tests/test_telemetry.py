@@ -0,0 +1,72 @@
+import sys
+import time
+
+import pytest
+
+from modules.core.telemetry import GPUStream, TelemetrySampler
+
+CANNED = ["0, 45, 1024, 15360, 61, 70.25", "1, 3, 0, 15360, 40, [N/A]"]
+
+def stub_command(lines, linger: float = 30):
+    """Stands in for `nvidia-smi -l`: prints canned lines, then stays alive"""
+    script = f"import time\nfor line in {lines!r}: print(line, flush=True)\ntime.sleep({linger})"
+    return [sys.executable, '-c', script]
+
+def wait_for(condition, timeout: float = 5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+def test_parse_line():
+    assert GPUStream.parse_line(CANNED[0]) == {
+        'index': 0, 'util_percent': 45.0, 'vram_used_mb': 1024.0, 'vram_total_mb': 15360.0,
+        'temperature_c': 61.0, 'power_w': 70.25
+    }
+
+def test_parse_line_keeps_unsupported_fields_as_none():
+    reading = GPUStream.parse_line("0, [N/A], 512, 8192, [Not Supported], [N/A]")
+    assert reading['util_percent'] is None and reading['power_w'] is None
+    assert reading['temperature_c'] is None and reading['vram_used_mb'] == 512.0
+
+@pytest.mark.parametrize('line', ["", "No devices were found", "[N/A], 1, 2, 3, 4, 5", "0, 1, 2"])
+def test_parse_line_rejects_non_readings(line):
+    assert GPUStream.parse_line(line) is None
+
+def test_stream_reads_one_reading_per_gpu():
+    stream = GPUStream(command=stub_command(CANNED))
+    try:
+        assert stream.start()
+        assert wait_for(lambda: len(stream.readings()) == 2)
+        assert [r['index'] for r in stream.readings()] == [0, 1]
+    finally:
+        stream.stop()
+
+def test_stream_drops_readings_when_the_process_exits():
+    stream = GPUStream(command=stub_command(CANNED, linger=0))
+    stream.start()
+    assert wait_for(lambda: not stream.available)
+    assert stream.readings() == []
+
+def test_missing_binary_is_reported_unavailable():
+    stream = GPUStream(command=['/nonexistent/nvidia-smi'])
+    assert stream.start() is False
+    assert stream.readings() == []
+
+def test_history_is_bounded():
+    stream = GPUStream(command=stub_command(CANNED))
+    sampler = TelemetrySampler(interval=60, history=5, gpu_stream=stream)
+    stream.start()
+    try:
+        assert wait_for(lambda: len(stream.readings()) == 2)
+        for _ in range(12):
+            sampler.sample()
+    finally:
+        stream.stop()
+
+    points = sampler.history('gpu0_util_percent')
+    assert len(points) == 5 and all(value == 45.0 for _, value in points)
+    assert 'gpu1_power_w' not in sampler.metrics()     # [N/A] is not a sample
+    assert sampler.snapshot()['gpus'][1]['power_w'] is None